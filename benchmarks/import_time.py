@@ -0,0 +1,94 @@
+# Measures import cost with ``python -X importtime``, against the eager
+# ``__init__`` that lazy loading replaced.
+#
+#   python benchmarks/import_time.py [--runs N] [--baseline REV]
+#
+# The baseline is the tree before ``_LAZY_ATTRIBUTES`` was introduced, taken
+# from git and imported through PYTHONPATH; --baseline picks another revision.
+# Exits non-zero if ``from strictyamlx import load, DMap`` is not cheaper than
+# on the baseline, i.e. if lazy loading stopped paying off.
+import argparse
+import io
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = [
+    ("import strictyaml", "import strictyaml"),
+    ("import strictyamlx", "import strictyamlx"),
+    ("load + DMap", "from strictyamlx import load, DMap"),
+]
+
+
+def git(*args):
+    return subprocess.run(["git", "-C", ROOT] + list(args), capture_output=True, check=True).stdout
+
+
+def eager_revision():
+    # The parent of the commit that made the imports lazy.
+    added = git("log", "--format=%H", "--reverse", "-S", "_LAZY_ATTRIBUTES", "--", "src/strictyamlx/__init__.py")
+    return added.decode().split()[0] + "^"
+
+
+def extract(revision, directory):
+    archive = git("archive", "--format=tar", revision, "src")
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        if hasattr(tarfile, "data_filter"):
+            tar.extractall(directory, filter="data")
+        else:
+            tar.extractall(directory)
+    return os.path.join(directory, "src")
+
+
+def import_time(statement, source):
+    environment = dict(os.environ, PYTHONPATH=source)
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=environment,
+    )
+    total = 0
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Only top-level entries; nested ones are already in their parent's total.
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            total += int(cumulative)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=15)
+    parser.add_argument("--baseline", help="git revision with the eager imports")
+    args = parser.parse_args()
+
+    revision = args.baseline or eager_revision()
+    with tempfile.TemporaryDirectory() as directory:
+        trees = [("current", os.path.join(ROOT, "src")), ("eager", extract(revision, directory))]
+        results = {}
+        print("{0:<20} {1:>10} {2:>10}".format("", "eager", "current"))
+        for label, statement in SCENARIOS:
+            for tree, source in trees:
+                results[tree, label] = statistics.median(import_time(statement, source) for _ in range(args.runs))
+            print(
+                "{0:<20} {1:>7.1f} ms {2:>7.1f} ms".format(
+                    label, results["eager", label] / 1000, results["current", label] / 1000
+                )
+            )
+
+    gain = results["eager", "load + DMap"] - results["current", "load + DMap"]
+    print("{0:<20} {1:>7.1f} ms".format("lazy loading saves", gain / 1000))
+    return 0 if gain > 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
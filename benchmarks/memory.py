@@ -0,0 +1,289 @@
+# Measures memory allocated per document with ``tracemalloc``.
+#
+#   python benchmarks/memory.py [--docs N] [--lines N] [--scenario NAME] [--path load|data]
+#
+# For every scenario and path it reports the peak traced memory while one
+# document is validated and the memory still held once its result is dropped.
+# The per-line breakdown comes from a snapshot taken by a root constraint in an
+# extra, unmeasured run: root constraints run at the end of validation while the
+# frames, raw copies and merged values of the whole document are still alive.
+# Allocations made inside the standard library (copy.deepcopy and friends) are
+# charged to the strictyaml/strictyamlx line that called into it.
+import argparse
+import gc
+import linecache
+import os
+import sys
+import sysconfig
+import tracemalloc
+
+from strictyamlx import (
+    Bool,
+    Case,
+    Control,
+    DMap,
+    ForwardRef,
+    Int,
+    KeyedChoiceMap,
+    Map,
+    Optional,
+    Overlay,
+    Seq,
+    Str,
+    load,
+    validate_data,
+)
+
+SNAPSHOTS = []
+CAPTURE = [False]
+STDLIB = os.path.abspath(sysconfig.get_paths()["stdlib"]) + os.sep
+# site-packages usually lives inside the stdlib directory.
+SITE_PACKAGES = tuple(
+    os.path.abspath(sysconfig.get_paths()[name]) + os.sep for name in ("purelib", "platlib")
+)
+TRACEBACK_FRAMES = 30
+
+
+def take_snapshot(raw, ctrl, val):
+    if CAPTURE[0] and tracemalloc.is_tracing():
+        SNAPSHOTS.append(tracemalloc.take_snapshot())
+    return True
+
+
+def nested_dmaps(depth=30):
+    ref = ForwardRef()
+    node = DMap(
+        Control(Map({"kind": Str()})),
+        [
+            Case(
+                when=lambda raw, ctrl: ctrl["kind"] == "node",
+                schema=Map({"value": Int(), Optional("child"): ref}),
+                constraints=[lambda raw, ctrl, val: val["value"] >= 0],
+            ),
+            Overlay(when=lambda raw, ctrl: "debug" in raw, schema=Map({"debug": Bool()})),
+        ],
+    )
+    ref.set(node)
+    schema = DMap(
+        Control(Map({"kind": Str()})),
+        [Case(when=True, schema=Map({"root": node}))],
+        constraints=[take_snapshot],
+    )
+
+    data = {"kind": "node", "value": depth, "debug": True}
+    for level in range(depth - 1, 0, -1):
+        data = {"kind": "node", "value": level, "child": data}
+    return schema, {"kind": "tree", "root": data}
+
+
+def dmap_sequence(count=500):
+    item = DMap(
+        Control(Map({"kind": Str()})),
+        [
+            Case(
+                when=lambda raw, ctrl: ctrl["kind"] == "item",
+                schema=Map({"name": Str(), "size": Int()}),
+                constraints=[lambda raw, ctrl, val: val["size"] >= 0],
+            ),
+            Case(when=lambda raw, ctrl: ctrl["kind"] == "note", schema=Map({"text": Str()})),
+            Overlay(when=lambda raw, ctrl: "flag" in raw, schema=Map({"flag": Bool()})),
+        ],
+    )
+    schema = DMap(
+        Control(Map({"kind": Str()})),
+        [Case(when=True, schema=Map({"items": Seq(item)}))],
+        constraints=[take_snapshot],
+    )
+    items = []
+    for index in range(count):
+        if index % 5:
+            items.append({"kind": "item", "name": "item-{0}".format(index), "size": index})
+        else:
+            items.append({"kind": "note", "text": "note {0}".format(index), "flag": True})
+    return schema, {"kind": "list", "items": items}
+
+
+def wide_keyed_choice_map(width=200, used=100):
+    choices = [("key{0}".format(index), Int() if index % 2 else Str()) for index in range(width)]
+    schema = DMap(
+        Control(Map({"kind": Str()})),
+        [Case(when=True, schema=Map({"match": KeyedChoiceMap(choices=choices, maximum_keys=None)}))],
+        constraints=[take_snapshot],
+    )
+    match = {
+        "key{0}".format(index): index if index % 2 else "value {0}".format(index)
+        for index in range(used)
+    }
+    return schema, {"kind": "match", "match": match}
+
+
+def cold_builder(count=50):
+    # A fresh schema per document, so every merged validator is built (and every
+    # ValidatorBuilder deepcopy made) inside the measured region.
+    def make():
+        cases = [
+            Case(
+                when=(lambda name: lambda raw, ctrl: ctrl["kind"] == name)("kind{0}".format(index)),
+                schema=Map({"value": Int(), Optional("extra"): Map({"a": Str(), "b": Str()})}),
+            )
+            for index in range(count)
+        ]
+        return DMap(
+            Control(Map({"kind": Str()})),
+            [Case(when=True, schema=Map({"items": Seq(DMap(Control(Map({"kind": Str()})), cases))}))],
+            constraints=[take_snapshot],
+        )
+
+    data = {
+        "kind": "list",
+        "items": [{"kind": "kind{0}".format(index), "value": index} for index in range(count)],
+    }
+    return make, data
+
+
+SCENARIOS = {
+    "nested DMaps": nested_dmaps,
+    "sequence of DMaps": dmap_sequence,
+    "wide KeyedChoiceMap": wide_keyed_choice_map,
+    "cold builder": cold_builder,
+}
+
+
+def to_yaml_text(data, indent=""):
+    lines = []
+    for key, value in data.items():
+        if isinstance(value, dict):
+            lines.append("{0}{1}:".format(indent, key))
+            lines.append(to_yaml_text(value, indent + "  "))
+        elif isinstance(value, list):
+            lines.append("{0}{1}:".format(indent, key))
+            for item in value:
+                text = to_yaml_text(item, indent + "  ")
+                lines.append("{0}- {1}".format(indent, text[len(indent) + 2:]))
+        elif isinstance(value, bool):
+            lines.append("{0}{1}: {2}".format(indent, key, "yes" if value else "no"))
+        else:
+            lines.append("{0}{1}: {2}".format(indent, key, value))
+    return "\n".join(lines)
+
+
+def runner(path, schema_or_factory, data):
+    factory = schema_or_factory if callable(schema_or_factory) and not isinstance(schema_or_factory, DMap) else None
+    text = to_yaml_text(data) + "\n"
+
+    def run():
+        schema = factory() if factory else schema_or_factory
+        if path == "load":
+            return load(text, schema).data
+        return validate_data(data, schema)
+
+    return run
+
+
+def measure(run, docs):
+    # Warm up once so lazily built caches do not count as per-document memory.
+    run()
+    gc.collect()
+    tracemalloc.start(1)
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        peaks = []
+        for _ in range(docs):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            result = run()
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+            del result
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0] - start
+    finally:
+        tracemalloc.stop()
+    return max(peaks), retained / docs
+
+
+def in_flight(run):
+    gc.collect()
+    del SNAPSHOTS[:]
+    tracemalloc.start(TRACEBACK_FRAMES)
+    CAPTURE[0] = True
+    try:
+        baseline = tracemalloc.take_snapshot()
+        run()
+    finally:
+        CAPTURE[0] = False
+        tracemalloc.stop()
+    snapshot = SNAPSHOTS.pop() if SNAPSHOTS else None
+    del SNAPSHOTS[:]
+    return baseline, snapshot
+
+
+def owning_frame(traceback):
+    # Most recent frame outside the standard library and this script.
+    this_file = os.path.abspath(__file__)
+    for frame in reversed(traceback):
+        filename = os.path.abspath(frame.filename)
+        if frame.filename.startswith("<") or filename == this_file:
+            continue
+        if filename.startswith(STDLIB) and not filename.startswith(SITE_PACKAGES):
+            continue
+        return frame
+    return None
+
+
+def top_lines(baseline, snapshot, limit):
+    totals = {}
+    for stat in snapshot.compare_to(baseline, "traceback"):
+        if stat.size_diff <= 0:
+            continue
+        frame = owning_frame(stat.traceback)
+        if frame is None:
+            continue
+        key = (frame.filename, frame.lineno)
+        size, count = totals.get(key, (0, 0))
+        totals[key] = (size + stat.size_diff, count + stat.count_diff)
+
+    for (filename, lineno), (size, count) in sorted(totals.items(), key=lambda item: -item[1][0])[:limit]:
+        shown = filename
+        for marker in ("strictyamlx" + os.sep, "site-packages" + os.sep):
+            if marker in shown:
+                shown = shown.split(marker, 1)[1]
+                break
+        print(
+            "    {0:>10.1f} KiB {1:>7} blocks  {2}:{3}  {4}".format(
+                size / 1024,
+                count,
+                shown,
+                lineno,
+                linecache.getline(filename, lineno).strip()[:60],
+            )
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=5)
+    parser.add_argument("--lines", type=int, default=8)
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), action="append")
+    parser.add_argument("--path", choices=["load", "data"], action="append")
+    args = parser.parse_args()
+
+    print("{0:<22} {1:<5} {2:>14} {3:>16}".format("scenario", "path", "peak/doc", "retained/doc"))
+    for name in args.scenario or SCENARIOS:
+        schema, data = SCENARIOS[name]()
+        for path in args.path or ["load", "data"]:
+            run = runner(path, schema, data)
+            peak, retained = measure(run, args.docs)
+            print(
+                "{0:<22} {1:<5} {2:>10.1f} KiB {3:>12.1f} KiB".format(
+                    name, path, peak / 1024, retained / 1024
+                )
+            )
+            if args.lines:
+                baseline, snapshot = in_flight(run)
+                if snapshot is not None:
+                    top_lines(baseline, snapshot, args.lines)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
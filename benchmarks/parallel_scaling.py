@@ -0,0 +1,99 @@
+# Measures how validate_parallel scales with the number of workers.
+#
+#   python benchmarks/parallel_scaling.py [--size KB] [--workers 1,2,4,8] [--backend process|interpreter]
+#
+# A generated top-level sequence of DMap items is validated serially, then with
+# each backend and worker count; every run must return the serial result. The
+# interpreter backend needs Python 3.14+ and is skipped before that. Speedups
+# above 1 need as many free cores as workers.
+import argparse
+import io
+import sys
+import time
+
+from strictyamlx import (
+    Bool,
+    Case,
+    Control,
+    DMap,
+    DocumentGenerator,
+    Enum,
+    Int,
+    Map,
+    Optional,
+    Seq,
+    Str,
+    load,
+    validate_parallel,
+)
+from strictyamlx.parallel import InterpreterPoolExecutor
+
+# Workers import this file by module name, not as __main__.
+FACTORY = "parallel_scaling:inventory_schema"
+
+
+def item_schema():
+    return DMap(
+        Control(Map({"kind": Enum(["host", "switch"])})),
+        [
+            Case(
+                when=lambda raw, ctrl: ctrl["kind"] == "host",
+                schema=Map({"name": Str(), "cores": Int(), Optional("tags"): Seq(Str())}),
+                constraints=[lambda raw, ctrl, val: val["cores"] >= 0],
+            ),
+            Case(
+                when=lambda raw, ctrl: ctrl["kind"] == "switch",
+                schema=Map({"ports": Int(), "managed": Bool()}),
+            ),
+        ],
+    )
+
+
+def inventory_schema():
+    return Seq(item_schema())
+
+
+def document(size):
+    stream = io.StringIO()
+    items = DocumentGenerator(item_schema(), seed=1).write_yaml(stream, size)
+    return stream.getvalue(), items
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=512, help="document size in KB")
+    parser.add_argument("--workers", default="1,2,4,8")
+    parser.add_argument("--backend", choices=["process", "interpreter"], action="append")
+    args = parser.parse_args()
+
+    text, items = document(args.size * 1024)
+    serial_time, expected = timed(lambda: load(text, inventory_schema()).data)
+    print("{0} items, {1} KB".format(items, len(text) // 1024))
+    print("{0:<12} {1:>7} {2:>10} {3:>8}".format("backend", "workers", "time", "speedup"))
+    print("{0:<12} {1:>7} {2:>8.2f} s {3:>7.2f}x".format("serial", 1, serial_time, 1.0))
+
+    for backend in args.backend or ["process", "interpreter"]:
+        if backend == "interpreter" and InterpreterPoolExecutor is None:
+            print("{0:<12} skipped: needs Python 3.14+".format(backend))
+            continue
+        for workers in [int(count) for count in args.workers.split(",")]:
+            if workers < 2:
+                continue
+            elapsed, result = timed(
+                lambda: validate_parallel(text, FACTORY, workers=workers, min_items=0, backend=backend)
+            )
+            assert result == expected, "{0} backend returned a different result".format(backend)
+            print(
+                "{0:<12} {1:>7} {2:>8.2f} s {3:>7.2f}x".format(backend, workers, elapsed, serial_time / elapsed)
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,58 @@
 from strictyaml import *
 
-from .forwardref import ForwardRef
-from .dmap import DMap
-from .control import Control
-from .blocks import Block, Case, Overlay
-from .builder import ValidatorBuilder
-from .keyed_choice_map import KeyedChoiceMap
-from .utils import ensure_validator_dict, unpack
+# strictyamlx's own modules are imported on first attribute access, so that
+# ``import strictyamlx`` costs little more than ``import strictyaml``.
+_LAZY_ATTRIBUTES = {
+    "ForwardRef": "forwardref",
+    "DMap": "dmap",
+    "Control": "control",
+    "Block": "blocks",
+    "Case": "blocks",
+    "Overlay": "blocks",
+    "Selection": "blocks",
+    "ValidatorBuilder": "builder",
+    "KeyedChoiceMap": "keyed_choice_map",
+    "ensure_validator_dict": "utils",
+    "unpack": "utils",
+    "DataValidationError": "native",
+    "validate_data": "native",
+    "CompiledSchema": "codegen",
+    "compile_schema": "codegen",
+    "prescan": "scanner",
+    "ParsedDocument": "document",
+    "parse": "document",
+    "CallbackProfiler": "profiler",
+    "profile_callbacks": "profiler",
+    "selection_of": "selection",
+    "selection_at": "selection",
+    "selections": "selection",
+    "validate_parallel": "parallel",
+    "ConfigWatcher": "watcher",
+    "BatchValidator": "batch",
+    "validate_batch": "batch",
+    "Expr": "expr",
+    "Match": "matching",
+    "matches": "matching",
+    "SchemaRegistry": "registry",
+    "DocumentGenerator": "generator",
+    "NumberArray": "number_array",
+    "Table": "table",
+}
+
+__all__ = [name for name in dir() if not name.startswith("_")] + list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError("module {0!r} has no attribute {1!r}".format(__name__, name))
+    # The builtin __import__ (unlike importlib.import_module) is what
+    # ``-X importtime`` instruments, so lazy loads stay visible there.
+    module = __import__(module_name, globals(), None, [name], 1)
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
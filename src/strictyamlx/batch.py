@@ -0,0 +1,207 @@
+from strictyaml.exceptions import YAMLValidationError
+
+from .dmap import DMap, _Frame
+from .expr import Expr
+from .native import VALIDATORS, DataChunk, _control_contents, _expect_mapping, _resolve
+
+
+class BatchResult:
+    def __init__(self, results, errors, groups):
+        # results[i] is None where errors has an entry for i.
+        self.results = results
+        self.errors = errors
+        # (case, overlays) -> number of documents that selected it.
+        self.groups = groups
+
+    def __repr__(self):
+        return "BatchResult(documents={0}, errors={1}, groups={2})".format(
+            len(self.results), len(self.errors), len(self.groups)
+        )
+
+
+class _Item:
+    __slots__ = ("index", "document", "chunk", "frame", "pending")
+
+    def __init__(self, index, document, parent):
+        self.index = index
+        self.document = document
+        self.chunk = DataChunk(document, (index,))
+        self.frame = _Frame(document, parent)
+        self.pending = []
+
+
+class BatchValidator:
+    # Validates many plain-data documents against one DMap in three passes:
+    # controls and `when` predicates for every document, then each
+    # (case, overlays) group against its one merged validator, then each group's
+    # deferred constraints. Results and errors are those of
+    # validate_data(documents, Seq(dmap)).
+    def __init__(self, dmap, compiled=False):
+        assert isinstance(dmap, DMap), "batch validation needs a DMap"
+        self.dmap = dmap
+        self.compiled = compiled
+        self._validators = {}
+        self._validate_control = None
+        if dmap.control is not None:
+            self._validate_control = self._function_for(dmap.control._validator)
+
+    def _function_for(self, validator):
+        # A (data, path) -> result function, resolved once rather than per document.
+        if self.compiled:
+            from .codegen import CompiledSchema
+
+            return CompiledSchema(validator)._validate
+        handler = VALIDATORS.get(type(validator)) or _resolve(type(validator))
+        return lambda document, path: handler(validator, document, path)
+
+    def _validator_for(self, group):
+        validate = self._validators.get(group)
+        if validate is None:
+            validate = self._validators[group] = self._function_for(
+                self.dmap._merged_validator(group[0], list(group[1]))
+            )
+        return validate
+
+    def _root_constraints(self, case, overlays):
+        # (constraint, caller, where) for the DMap itself, in the order
+        # _queue_constraints would queue them.
+        dmap = self.dmap
+        constraint_callers = dmap._callers()[1]
+        owners = [(None, dmap.constraints, "when evaluating DMap constraints")]
+        if case is not None:
+            owners.append((case, case.constraints, "when evaluating DMap case constraints"))
+        owners.extend(
+            (overlay, overlay.constraints, "when evaluating DMap overlay constraints") for overlay in overlays
+        )
+        return [
+            (constraint, caller, where)
+            for owner, constraints, where in owners
+            for constraint, caller in zip(constraints or [], constraint_callers[owner])
+        ]
+
+    @staticmethod
+    def _columns(root, items):
+        # Expressions are evaluated for the whole group at once (with NumPy when
+        # it is installed); other constraints are called per document. While a
+        # profiler is timing callbacks, everything goes through the callers.
+        if DMap._profiler is not None:
+            return [None] * len(root)
+        columns = None
+        results = []
+        for constraint, _, _ in root:
+            if not isinstance(constraint, Expr):
+                results.append(None)
+                continue
+            if columns is None:
+                columns = (
+                    [item.document for item in items],
+                    [item.frame.ctrl for item in items],
+                    [item.frame.val for item in items],
+                )
+            results.append(constraint.evaluate_many(*columns))
+        return results
+
+    def collect(self, documents, stop_at_first=False):
+        documents = list(documents)
+        dmap = self.dmap
+        control = dmap.control
+        validate_control = self._validate_control
+        select_blocks = dmap._select_blocks
+        state = DMap._local
+        parent = state.frame
+        saved_pending = state.pending_constraints
+        errors = {}
+        results = [None] * len(documents)
+        groups = {}
+        # With stop_at_first, documents after the first failure cannot change
+        # which error is reported, so they are skipped.
+        limit = len(documents)
+
+        # Each document is validated as if it were the root of its own
+        # validation: its frame is current and nested DMaps defer their
+        # constraints into its own list.
+        state.active_validations += 1
+        try:
+            for index, document in enumerate(documents):
+                item = _Item(index, document, parent)
+                frame = item.frame
+                state.frame = frame
+                state.pending_constraints = item.pending
+                try:
+                    _expect_mapping(document, item.chunk.path)
+                    if validate_control is not None:
+                        frame.ctrl = validate_control(*_control_contents(control, document, item.chunk.path))
+                    case, overlays = select_blocks(item.chunk, document, frame.ctrl, frame)
+                except YAMLValidationError as error:
+                    errors[index] = error
+                    if stop_at_first:
+                        limit = index
+                        break
+                    continue
+                groups.setdefault((case, tuple(overlays)), []).append(item)
+
+            for group, items in groups.items():
+                validate = self._validator_for(group)
+                case, overlays = group
+                # Items are in document order within a group.
+                for item in items:
+                    if item.index > limit:
+                        break
+                    state.frame = item.frame
+                    state.pending_constraints = item.pending
+                    try:
+                        item.frame.val = validate(item.document, item.chunk.path)
+                    except YAMLValidationError as error:
+                        errors[item.index] = error
+                        item.pending = None
+                        if stop_at_first:
+                            limit = item.index
+                            break
+
+                # The DMap's own constraints are at depth 0, so they run before
+                # anything nested deferred into the item's list.
+                ready = [item for item in items if item.pending is not None and item.index <= limit]
+                root = self._root_constraints(case, overlays)
+                columns = BatchValidator._columns(root, ready)
+                for position, item in enumerate(ready):
+                    if item.index > limit:
+                        break
+                    pending = item.pending
+                    item.pending = None
+                    try:
+                        for (_, caller, where), column in zip(root, columns):
+                            if not (caller(item.frame) if column is None else column[position]):
+                                item.chunk.expecting_but_found(where, "constraints not fulfilled")
+                        for _, constraint, frame, chunk, where in sorted(pending, key=lambda queued: queued[0]):
+                            if not constraint(frame):
+                                chunk.expecting_but_found(where, "constraints not fulfilled")
+                    except YAMLValidationError as error:
+                        errors[item.index] = error
+                        if stop_at_first:
+                            limit = item.index
+                            break
+                        continue
+                    results[item.index] = item.frame.val
+        finally:
+            state.active_validations -= 1
+            state.frame = parent
+            state.pending_constraints = saved_pending
+
+        return BatchResult(
+            results,
+            errors,
+            {group: len(items) for group, items in groups.items()},
+        )
+
+    def validate(self, documents):
+        batch = self.collect(documents, stop_at_first=True)
+        if batch.errors:
+            raise batch.errors[min(batch.errors)]
+        return batch.results
+
+    def __repr__(self):
+        return "BatchValidator({0}{1})".format(repr(self.dmap), ", compiled=True" if self.compiled else "")
+
+
+def validate_batch(documents, dmap, compiled=False):
+    return BatchValidator(dmap, compiled=compiled).validate(documents)
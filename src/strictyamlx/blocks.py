@@ -1,5 +1,6 @@
 from strictyaml import Validator
-from collections.abc import Callable
+from collections.abc import Callable, Iterable
+from .utils import unpack
 
 
 class Block:
@@ -8,18 +9,39 @@ class Block:
         when: Callable[..., bool],
         schema: Validator,
         constraints: list[Callable[..., bool]] | None = None,
+        requires_keys: Iterable[str] | bool | None = None,
     ):
         assert isinstance(schema, Validator), "schema must be of type Validator"
+        assert requires_keys is None or requires_keys is True or not isinstance(
+            requires_keys, (str, bool)
+        ), "requires_keys must be True or an iterable of keys"
         self.when = when
         self._validator = schema
         self.constraints = constraints
+        if requires_keys is not None and requires_keys is not True:
+            requires_keys = frozenset(requires_keys)
+        self.requires_keys = requires_keys
+
+    def required_keys(self):
+        # None means the block is always evaluated. True derives the keys from the
+        # schema lazily, since a ForwardRef in it may not be set yet.
+        if self.requires_keys is None:
+            return None
+        if self.requires_keys is True:
+            return frozenset(getattr(unpack(self._validator), "_required_keys", ()))
+        return self.requires_keys
 
     def __repr__(self):
-        return "{0}(when={1}, schema={2}{3})".format(
+        return "{0}(when={1}, schema={2}{3}{4})".format(
             self.__class__.__name__,
             repr(self.when),
             repr(self._validator),
             ", constraints={0}".format(repr(self.constraints)) if self.constraints else "",
+            ", requires_keys={0}".format(
+                repr(self.requires_keys if self.requires_keys is True else sorted(self.requires_keys))
+            )
+            if self.requires_keys is not None
+            else "",
         )
 
 
@@ -29,8 +51,9 @@ class Case(Block):
         when: Callable[..., bool],
         schema: Validator,
         constraints: list[Callable[..., bool]] | None = None,
+        requires_keys: Iterable[str] | bool | None = None,
     ):
-        super().__init__(when, schema, constraints)
+        super().__init__(when, schema, constraints, requires_keys)
 
 
 # TODO: implement in DMap
@@ -40,5 +63,36 @@ class Overlay(Block):
         when: Callable[..., bool],
         schema: Validator,
         constraints: list[Callable[..., bool]] | None = None,
+        requires_keys: Iterable[str] | bool | None = None,
     ):
-        super().__init__(when, schema, constraints)
+        super().__init__(when, schema, constraints, requires_keys)
+
+
+class Selection:
+    # `nested` is the selection made by a DMap used as this one's case schema,
+    # which validates the same node.
+    __slots__ = ("case", "overlays", "ctrl", "nested")
+
+    def __init__(self, case: Case | None, overlays: list[Overlay], ctrl, nested=None):
+        self.case = case
+        self.overlays = tuple(overlays)
+        self.ctrl = ctrl
+        self.nested = nested
+
+    def __eq__(self, other):
+        if not isinstance(other, Selection):
+            return NotImplemented
+        return (
+            self.case is other.case
+            and self.overlays == other.overlays
+            and self.ctrl == other.ctrl
+            and self.nested == other.nested
+        )
+
+    def __repr__(self):
+        return "Selection(case={0}, overlays={1}, ctrl={2}{3})".format(
+            repr(self.case),
+            repr(list(self.overlays)),
+            repr(self.ctrl),
+            ", nested={0}".format(repr(self.nested)) if self.nested is not None else "",
+        )
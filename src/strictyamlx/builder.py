@@ -1,6 +1,7 @@
 from strictyaml import Validator
 from strictyaml.validators import MapValidator
 from strictyaml import Map, MapCombined
+from strictyaml.exceptions import InvalidValidatorError
 import copy
 from .utils import unpack, ensure_validator_dict
 
@@ -8,7 +9,7 @@ from .utils import unpack, ensure_validator_dict
 class ValidatorBuilder:
     def __init__(
         self,
-        control_validator: Validator,
+        control_validator: Validator | None,
         case_validator: Validator,
         overlay_validators: list[Validator] | None = None,
         control_source: tuple[str] | str | None = None,
@@ -86,8 +87,12 @@ class ValidatorBuilder:
         return Map(new_dict)
 
     def _build(self):
-        control_validator = copy.deepcopy(unpack(self.control_validator))
-        if self.control_source:
+        if self.control_validator is None:
+            # Control-less DMaps have no control keys to merge into the case.
+            control_validator = None
+        else:
+            control_validator = copy.deepcopy(unpack(self.control_validator))
+        if control_validator is not None and self.control_source:
             if isinstance(self.control_source, str):
                 self.control_source = [self.control_source]
             for key in reversed(self.control_source):
@@ -101,18 +106,29 @@ class ValidatorBuilder:
             for overlay_validator in self.overlay_validators
         ]
 
+        if hasattr(case_validator, 'control') and case_validator.control is None:
+            if control_validator is not None or overlay_validators:
+                raise InvalidValidatorError(
+                    "a DMap without a Control cannot be used as a case schema "
+                    "when there are control or overlay keys to merge into it"
+                )
+            return case_validator
+
         if hasattr(case_validator, 'control') and hasattr(case_validator.control, '_validator'):
             nested_validator = copy.deepcopy(ensure_validator_dict(case_validator.control._validator))
             for overlay_validator in overlay_validators:
                 self.merge_recursive(overlay_validator, nested_validator)
-            self.merge_recursive(control_validator, nested_validator)
+            if control_validator is not None:
+                self.merge_recursive(control_validator, nested_validator)
             case_validator.control._validator = self.rebuild_validator_recursive(nested_validator)
+            case_validator._merged_validators = {}
             return case_validator
 
         result_validator = case_validator
         for overlay_validator in overlay_validators:
             self.merge_recursive(overlay_validator, result_validator)
-        self.merge_recursive(control_validator, result_validator)
+        if control_validator is not None:
+            self.merge_recursive(control_validator, result_validator)
         final_validator = self.rebuild_validator_recursive(result_validator)
 
         return final_validator
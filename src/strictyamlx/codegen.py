@@ -0,0 +1,397 @@
+import hashlib
+import threading
+
+from strictyaml import Map, MapCombined, Seq
+from strictyaml.validators import OrValidator
+from strictyaml.scalar import ScalarValidator, Str, Int, Bool, Float
+from strictyaml.exceptions import YAMLValidationError
+from .dmap import DMap
+from .blocks import Case, Overlay
+from .keyed_choice_map import KeyedChoiceMap
+from .utils import unpack
+from . import native
+
+CODEGEN_VERSION = 2
+
+SCALAR_CHECKS = {
+    Str: ("isinstance({0}, str)", "{0}"),
+    Int: ("type({0}) is int", "{0}"),
+    Bool: ("type({0}) is bool", "{0}"),
+    Float: ("type({0}) in (int, float)", "float({0})"),
+}
+
+RUNTIME = {
+    "_fail": native._fail,
+    "_scalar": native._validate_scalar,
+    "_interp": native.validate_data,
+    "_control_contents": native._control_contents,
+    "_DataChunk": native.DataChunk,
+    "_YAMLValidationError": YAMLValidationError,
+}
+
+
+class SchemaCompiler:
+    def __init__(self, schema, prefix="v"):
+        self.prefix = prefix
+        self.constants = []
+        self._constant_names = {}
+        self._function_names = {}
+        self._functions = []
+        self._compiled = []
+        self.entry = self.function_for(schema)
+
+    @property
+    def source(self):
+        lines = [
+            "# Generated by strictyamlx.codegen (version {0}). Do not edit.".format(CODEGEN_VERSION),
+            "",
+            "",
+            "def build(K, combo, _fail, _scalar, _interp, _control_contents, _DataChunk, _YAMLValidationError):",
+        ]
+        for index in range(len(self.constants)):
+            lines.append("    K{0} = K[{0}]".format(index))
+        for function in self._functions:
+            lines.append("")
+            lines.extend("    " + line if line else "" for line in function)
+        lines.append("")
+        lines.append("    return {0}".format(self.entry))
+        return "\n".join(lines) + "\n"
+
+    def constant(self, value):
+        key = id(value)
+        if key not in self._constant_names:
+            self._constant_names[key] = "K{0}".format(len(self.constants))
+            self.constants.append(value)
+        return self._constant_names[key]
+
+    def function_for(self, validator):
+        validator = unpack(validator)
+        key = id(validator)
+        if key in self._function_names:
+            return self._function_names[key]
+        name = "_{0}{1}".format(self.prefix, len(self._function_names))
+        self._function_names[key] = name
+        # Keep the validator alive so ids stay unique while compiling.
+        self._compiled.append(validator)
+
+        validator_type = type(validator)
+        if validator_type is DMap:
+            body = self._dmap(name, validator)
+        elif validator_type in (Map, MapCombined) and self._literal_keys(validator._validator_dict):
+            body = self._map(name, validator)
+        elif validator_type is KeyedChoiceMap and self._literal_keys(validator._validator):
+            body = self._keyed_choice_map(name, validator)
+        elif validator_type is Seq:
+            body = self._seq(name, validator)
+        elif validator_type is OrValidator:
+            body = self._or(name, validator)
+        elif isinstance(validator, ScalarValidator):
+            body = [
+                "def {0}(value, path):".format(name),
+                "    return _scalar({0}, value, path)".format(self.constant(validator)),
+            ]
+        else:
+            body = [
+                "def {0}(value, path):".format(name),
+                "    return _interp(value, {0}, path)".format(self.constant(validator)),
+            ]
+        self._functions.append(body)
+        return name
+
+    @staticmethod
+    def _literal_keys(keys):
+        return all(isinstance(key if not hasattr(key, "key") else key.key, str) for key in keys)
+
+    def _assign(self, target, source, path, validator, indent):
+        validator = unpack(validator)
+        pad = " " * indent
+        checks = SCALAR_CHECKS.get(type(validator))
+        if checks is None:
+            return ["{0}{1} = {2}({3}, {4})".format(pad, target, self.function_for(validator), source, path)]
+        check, convert = checks
+        return [
+            "{0}if {1}:".format(pad, check.format(source)),
+            "{0}    {1} = {2}".format(pad, target, convert.format(source)),
+            "{0}else:".format(pad),
+            "{0}    {1} = _scalar({2}, {3}, {4})".format(pad, target, self.constant(validator), source, path),
+        ]
+
+    def _strict_key(self, key_validator, indent):
+        pad = " " * indent
+        if type(key_validator) is Str:
+            return [
+                "{0}if isinstance(key, str):".format(pad),
+                "{0}    strict_key = key".format(pad),
+                "{0}else:".format(pad),
+                "{0}    strict_key = _scalar({1}, key, path + (key,))".format(pad, self.constant(key_validator)),
+            ]
+        return ["{0}strict_key = _scalar({1}, key, path + (key,))".format(pad, self.constant(key_validator))]
+
+    def _map(self, name, validator):
+        is_combined = isinstance(validator, MapCombined)
+        lines = [
+            "def {0}(value, path):".format(name),
+            "    if not isinstance(value, dict):",
+            "        _fail(value, path, \"when expecting a mapping\")",
+            "    result = {}",
+            "    for key, item in value.items():",
+        ]
+        lines.extend(self._strict_key(validator.key_validator, 8))
+        branch = "if"
+        for key, value_validator in validator._validator_dict.items():
+            lines.append("        {0} key == {1!r}:".format(branch, key))
+            lines.extend(self._assign("result[strict_key]", "item", "path + (key,)", value_validator, 12))
+            branch = "elif"
+        if is_combined:
+            lines.append("        else:" if branch == "elif" else "        if True:")
+            lines.extend(
+                self._assign("result[strict_key]", "item", "path + (key,)", validator._value_validator, 12)
+            )
+        else:
+            lines.append("        else:" if branch == "elif" else "        if True:")
+            lines.append(
+                "            _fail(key, path + (key,), \"while parsing a mapping\", "
+                "\"unexpected key not in schema '{0}'\".format(str(key)))"
+            )
+        for default_key, default_data in validator._defaults.items():
+            lines.append("    if {0!r} not in value:".format(default_key))
+            lines.append(
+                "        result[{0!r}] = {1}({2}, path + ({0!r},))".format(
+                    default_key,
+                    self.function_for(validator.get_validator(default_key)),
+                    self.constant(default_data),
+                )
+            )
+        required = list(validator._required_keys)
+        if required:
+            lines.append(
+                "    if not ({0}):".format(" and ".join("{0!r} in value".format(key) for key in required))
+            )
+            lines.append("        missing = set({0!r}).difference(value.keys())".format(required))
+            lines.append(
+                "        _fail(value, path, \"while parsing a mapping\", "
+                "\"required key(s) '{0}' not found\".format(\"', '\".join(sorted(missing))))"
+            )
+        lines.append("    return result")
+        return lines
+
+    def _keyed_choice_map(self, name, validator):
+        lines = [
+            "def {0}(value, path):".format(name),
+            "    if not isinstance(value, dict):",
+            "        _fail(value, path, \"when expecting a mapping\")",
+            "    result = {}",
+            "    for key, item in value.items():",
+        ]
+        lines.extend(self._strict_key(validator.key_validator, 8))
+        branch = "if"
+        resolved = {}
+        for key, value_validator in validator._validator.items():
+            resolved.setdefault(key.key if hasattr(key, "key") else key, value_validator)
+        for key in validator._validator:
+            if isinstance(key, str):
+                resolved[key] = validator._validator[key]
+        for key, value_validator in resolved.items():
+            lines.append("        {0} strict_key == {1!r}:".format(branch, key))
+            lines.extend(self._assign("result[strict_key]", "item", "path + (key,)", value_validator, 12))
+            branch = "elif"
+        lines.append("        else:")
+        lines.append(
+            "            _fail(key, path + (key,), \"while parsing a mapping\", "
+            "\"unexpected key not in schema '{0}'\".format(str(strict_key)))"
+        )
+        lines.append(
+            "    choice_key_count = sum(1 for k in result if k in {0!r})".format(
+                frozenset(validator.choice_keys)
+            )
+        )
+        for limit, compare, word in (
+            (validator.minimum_keys, "<", "minimum"),
+            (validator.maximum_keys, ">", "maximum"),
+        ):
+            if limit is None:
+                continue
+            lines.append("    if choice_key_count {0} {1}:".format(compare, limit))
+            lines.append(
+                "        _fail(value, path, \"while parsing a mapping\", "
+                "\"expected a {0} of {1} choice key{2}, found {{0}}.\".format(choice_key_count))".format(
+                    word, limit, "s" if limit != 1 else ""
+                )
+            )
+        lines.append("    return result")
+        return lines
+
+    def _seq(self, name, validator):
+        lines = [
+            "def {0}(value, path):".format(name),
+            "    if not isinstance(value, list):",
+            "        _fail(value, path, \"when expecting a sequence\")",
+            "    result = []",
+            "    for index, item in enumerate(value):",
+        ]
+        lines.extend(self._assign("validated", "item", "path + (index,)", validator._validator, 8))
+        lines.append("        result.append(validated)")
+        lines.append("    return result")
+        return lines
+
+    def _or(self, name, validator):
+        return [
+            "def {0}(value, path):".format(name),
+            "    try:",
+            "        return {0}(value, path)".format(self.function_for(validator._validator_a)),
+            "    except _YAMLValidationError:",
+            "        return {0}(value, path)".format(self.function_for(validator._validator_b)),
+        ]
+
+    def _dmap(self, name, validator):
+        dmap = self.constant(validator)
+        validate_control = self._validate_control(validator)
+
+        if validator.first_match:
+            # Adaptive ordering keeps state on the DMap, so use its own selection.
+            select_function = "{0}._select_blocks".format(dmap)
+            select = None
+        else:
+            select_function = "{0}_select".format(name)
+            select = self._select(name, validator)
+
+        selected = [
+            "def {0}_selected(value, path, case, overlays):".format(name),
+            "    if overlays:",
+            "        validated = combo({0}, case, overlays)(value, path)".format(dmap),
+        ]
+        cases = [block for block in validator.blocks if isinstance(block, Case)]
+        for block in cases + [None]:
+            function = self.function_for(validator._merged_validator(block, []))
+            if block is None:
+                selected.append("    else:")
+            else:
+                selected.append("    elif case is {0}:".format(self.constant(block)))
+            selected.append("        validated = {0}(value, path)".format(function))
+        selected.append("    return validated, validated")
+
+        if select is not None:
+            self._functions.append(select)
+        self._functions.append(selected)
+        return [
+            "def {0}(value, path):".format(name),
+            "    if not isinstance(value, dict):",
+            "        _fail(value, path, \"when expecting a mapping\")",
+            "",
+        ] + validate_control + [
+            "",
+            "    return {0}._validate_node(".format(dmap),
+            "        _DataChunk(value, path),",
+            "        value,",
+            "        validate_control,",
+            "        lambda case, overlays: {0}_selected(value, path, case, overlays),".format(name),
+            "        {0},".format(select_function),
+            "    )",
+        ]
+
+    def _validate_control(self, validator):
+        if validator.control is None:
+            return [
+                "    def validate_control():",
+                "        return None",
+            ]
+        control = self.constant(validator.control)
+        control_function = self.function_for(validator.control._validator)
+        return [
+            "    def validate_control():",
+            "        contents, control_path = _control_contents({0}, value, path)".format(control),
+            "        return {0}(contents, control_path)".format(control_function),
+        ]
+
+    def _select(self, name, validator):
+        select = [
+            "def {0}_select(chunk, raw, ctrl, frame):".format(name),
+            "    if {0}._profiler is not None:".format(self.constant(validator)),
+            "        return {0}._select_blocks(chunk, raw, ctrl, frame)".format(self.constant(validator)),
+            "    case = None",
+            "    overlays = []",
+        ]
+        for block in validator.blocks:
+            when = self.constant(validator._when_callers[block])
+            block_name = self.constant(block)
+            required = block.required_keys()
+            if required:
+                select.append(
+                    "    if {0} <= raw.keys() and {1}(raw, ctrl, frame):".format(
+                        self.constant(required), when
+                    )
+                )
+            else:
+                select.append("    if {0}(raw, ctrl, frame):".format(when))
+            if isinstance(block, Case):
+                select.append("        if case is not None:")
+                select.append(
+                    "            chunk.expecting_but_found(\"when evaluating DMap blocks\", "
+                    "\"multiple cases were true\")"
+                )
+                select.append("        case = {0}".format(block_name))
+            elif isinstance(block, Overlay):
+                select.append("        overlays.append({0})".format(block_name))
+            else:
+                select.append(
+                    "        chunk.expecting_but_found(\"when evaluating DMap blocks\", "
+                    "\"unknown block type; expected Case or Overlay\")"
+                )
+        select.append("    return case, overlays")
+        return select
+
+
+# Fingerprint of generated source -> its build function. Generating the source
+# is cheap next to compiling it, and constants (callbacks, validators) are only
+# bound by build(), so schemas with the same structure share an entry.
+_BUILDS = {}
+_BUILDS_LOCK = threading.Lock()
+
+
+def _load_module(source):
+    fingerprint = hashlib.sha256(source.encode("utf-8")).hexdigest()
+    build = _BUILDS.get(fingerprint)
+    if build is None:
+        namespace = {}
+        exec(compile(source, "<strictyamlx-{0}>".format(fingerprint[:12]), "exec"), namespace)
+        with _BUILDS_LOCK:
+            build = _BUILDS.setdefault(fingerprint, namespace["build"])
+    return fingerprint, build
+
+
+class CompiledSchema:
+    def __init__(self, schema):
+        self.schema = schema
+        compiler = SchemaCompiler(schema)
+        self.source = compiler.source
+        self._combinations = {}
+        self.fingerprint, build = _load_module(self.source)
+        self._validate = build(compiler.constants, self._combination, **RUNTIME)
+
+    def _combination(self, dmap, case, overlays):
+        key = (id(dmap), case, tuple(overlays))
+        if key not in self._combinations:
+            compiler = SchemaCompiler(
+                dmap._merged_validator(case, overlays),
+                prefix="c{0}_".format(len(self._combinations)),
+            )
+            _, build = _load_module(compiler.source)
+            self._combinations[key] = build(compiler.constants, self._combination, **RUNTIME)
+        return self._combinations[key]
+
+    def __call__(self, data, selections=None, memoize=False):
+        return self.validate(data, selections, memoize)
+
+    def validate(self, data, selections=None, memoize=False):
+        if selections is not None:
+            return native.recording(selections, self.validate, data, None, memoize)
+        if memoize:
+            return native.memoizing(self._validate, data, ())
+        return self._validate(data, ())
+
+    def __repr__(self):
+        return "CompiledSchema({0})".format(repr(self.schema))
+
+
+def compile_schema(schema):
+    return CompiledSchema(schema)
@@ -10,7 +10,6 @@ class Control:
     def __init__(self, validator: Validator, source: tuple[str] | str | None = None):
         self._validator = validator
         self.source = source
-        self.validated = None
 
         assert isinstance(
             self._validator, Validator
@@ -66,18 +65,18 @@ class Control:
                     
         return CommentedMap(projected_chunk)
 
-    def validate(self, chunk):
-        from .utils import unpack
-
+    def locate(self, contents):
         if self.source and self.source != "":
             if isinstance(self.source, str):
-                chunk_pointer = chunk.contents[self.source]
+                return contents[self.source]
             elif isinstance(self.source, tuple):
-                chunk_pointer = reduce(
-                    lambda d, key: d[key], self.source, chunk.contents
-                )
-        else:
-            chunk_pointer = chunk.contents
+                return reduce(lambda d, key: d[key], self.source, contents)
+        return contents
+
+    def validate(self, chunk):
+        from .utils import unpack
+
+        chunk_pointer = self.locate(chunk.contents)
         unpacked_validator = unpack(self._validator)
         is_mapping_validator = (
             hasattr(unpacked_validator, "_validator_dict")
@@ -90,7 +89,7 @@ class Control:
             projected = self.projection(chunk_pointer, self._validator)
             if not isinstance(chunk_pointer, CommentedMap):
                 projected = unpacked_validator.to_yaml(projected)
-            source_chunk = YAMLChunk(projected)
+            source_chunk = YAMLChunk(projected, label=chunk.label)
         else:
-            source_chunk = YAMLChunk(chunk_pointer)
-        self.validated = self._validator(source_chunk)
+            source_chunk = YAMLChunk(chunk_pointer, label=chunk.label)
+        return self._validator(source_chunk)
@@ -3,24 +3,259 @@ from strictyaml.validators import MapValidator
 from strictyaml.exceptions import YAMLSerializationError
 from strictyaml import Map
 from .control import Control
-from .blocks import Block, Case, Overlay
+from .blocks import Block, Case, Overlay, Selection
 from collections.abc import Callable
 from .builder import ValidatorBuilder
+from .expr import Expr
 from strictyaml.yamllocation import YAMLChunk
-import inspect
+import copy
 import threading
+import warnings
+
+
+class _Frame:
+    # One per DMap node being validated. Frames link to their parent instead of
+    # copying the stack, and the `parents` lists callbacks see are only built
+    # for callbacks that take them.
+    __slots__ = ("raw", "ctrl", "val", "parent", "depth")
+
+    def __init__(self, raw, parent=None):
+        self.raw = raw
+        self.ctrl = None
+        self.val = None
+        self.parent = parent
+        self.depth = 0 if parent is None else parent.depth + 1
+
+    def ancestors(self):
+        frames = []
+        frame = self.parent
+        while frame is not None:
+            frames.append(frame)
+            frame = frame.parent
+        frames.reverse()
+        return frames
+
+    def when_parents(self):
+        return [{"raw": frame.raw, "ctrl": frame.ctrl} for frame in self.ancestors()]
+
+    def constraint_parents(self):
+        return [
+            {"raw": frame.raw, "ctrl": frame.ctrl, "val": frame.val}
+            for frame in self.ancestors()
+        ]
+
+
+class _ValidationState(threading.local):
+    def __init__(self):
+        self.frame = None
+        self.active_validations = 0
+        self.pending_constraints = []
+        # Path -> Selection while validate_data/compiled schemas are recording.
+        self.selections = None
+        # _Memo while validate_data, compiled schemas or ParsedDocument.validate
+        # run with memoize=True.
+        self.memo = None
+
+
+def copy_data(value):
+    if isinstance(value, dict):
+        return {key: copy_data(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [copy_data(item) for item in value]
+    return value
+
+
+class _MemoResult:
+    __slots__ = ("result", "depth", "path", "queued")
+
+    def __init__(self, result, depth, path, queued):
+        self.result = result
+        self.depth = depth
+        self.path = path
+        self.queued = queued
+
+    def replay(self, state, chunk):
+        # The constraints queued under the first copy are queued again for this
+        # one, rebased onto its path, so a failure still names the right copy.
+        depth = 0 if state.frame is None else state.frame.depth + 1
+        prefix = len(self.path)
+        pending = state.pending_constraints
+        for queued_depth, constraint, frame, origin, where in self.queued:
+            pending.append(
+                (
+                    queued_depth - self.depth + depth,
+                    constraint,
+                    frame,
+                    type(origin)(origin.contents, chunk.path + origin.path[prefix:]),
+                    where,
+                )
+            )
+        return copy_data(self.result)
+
+
+class _MemoSelection:
+    # For YAML, where each copy has its own marks: what the first copy selected,
+    # so later copies skip control validation and `when` but are still validated
+    # against the merged schema, and the outcome of each of its constraints,
+    # shared by the copies so every constraint runs once.
+    __slots__ = ("ctrl", "case", "overlays", "outcomes")
+
+    def __init__(self, ctrl, case, overlays):
+        self.ctrl = ctrl
+        self.case = case
+        self.overlays = overlays
+        self.outcomes = {}
+
+    def shared(self, index, constraint):
+        outcomes = self.outcomes
+
+        def check(frame):
+            if index not in outcomes:
+                outcomes[index] = constraint(frame)
+            return outcomes[index]
+
+        return check
+
+
+class _MemoEntry:
+    __slots__ = ("needs_context", "results")
+
+    def __init__(self):
+        self.needs_context = False
+        # Ancestor context (None when no callback below looks at parents) -> _MemoResult.
+        self.results = {}
+
+
+class _Memo:
+    # Interns raw subtrees into small ints, so identical content gets the same
+    # token whichever copy it comes from. Each container is tokenised once, and
+    # kept alive so its id is not reused by another one while the memo lasts.
+    def __init__(self):
+        self.tokens = {}
+        self.by_id = {}
+        self.kept = []
+        self.entries = {}
+        # Bumped for every node with a parent-aware callback, so a node can tell
+        # whether anything in its subtree looked at the ancestors.
+        self.parent_aware = 0
+
+    def token(self, value):
+        if isinstance(value, dict):
+            token = self.by_id.get(id(value))
+            if token is None:
+                shape = (dict, tuple((key, self.token(item)) for key, item in value.items()))
+                token = self.by_id[id(value)] = self.tokens.setdefault(shape, len(self.tokens))
+                self.kept.append(value)
+            return token
+        if isinstance(value, list):
+            token = self.by_id.get(id(value))
+            if token is None:
+                shape = (list, tuple(self.token(item) for item in value))
+                token = self.by_id[id(value)] = self.tokens.setdefault(shape, len(self.tokens))
+                self.kept.append(value)
+            return token
+        try:
+            return self.tokens.setdefault((type(value), value), len(self.tokens))
+        except TypeError:
+            # Unhashable leaves only ever match themselves.
+            return self.tokens.setdefault((object, id(value)), len(self.tokens))
+
+    def context(self, frame):
+        tokens = []
+        while frame is not None:
+            tokens.append(self.token(frame.raw))
+            frame = frame.parent
+        return tuple(tokens)
+
+
+def no_control():
+    # validate_control for DMaps without a Control: blocks select on raw alone
+    # and see ctrl as None.
+    return None
+
+
+class _KeyIndex:
+    # Blocks with the same required keys form one group, filed under one of those
+    # keys; a node only looks at the groups filed under keys it actually has.
+    def __init__(self, blocks):
+        self.blocks = blocks
+        self.always = []
+        groups = {}
+        for position, block in enumerate(blocks):
+            required = block.required_keys()
+            if required:
+                groups.setdefault(required, []).append(position)
+            else:
+                self.always.append(position)
+        self.by_key = {}
+        for required, positions in groups.items():
+            self.by_key.setdefault(min(required), []).append((required, positions))
+
+    def candidates(self, raw):
+        if not isinstance(raw, dict):
+            return [self.blocks[position] for position in self.always]
+        keys = raw.keys()
+        positions = list(self.always)
+        if len(keys) <= len(self.by_key):
+            anchors = [self.by_key[key] for key in keys if key in self.by_key]
+        else:
+            anchors = [groups for key, groups in self.by_key.items() if key in keys]
+        for groups in anchors:
+            for required, group in groups:
+                if required <= keys:
+                    positions.extend(group)
+        # Declaration order decides overlay precedence, so restore it.
+        positions.sort()
+        return [self.blocks[position] for position in positions]
+
+
+class _CaseOrder:
+    # Hit counters and evaluation order for first_match DMaps. Reordering builds
+    # a new list and swaps it in, so concurrent selections never see it half-sorted.
+    def __init__(self, cases, overlays, reorder_every):
+        self.cases = cases
+        self.overlays = overlays
+        self.hits = [0] * len(cases)
+        self.misses = 0
+        self.order = list(range(len(cases)))
+        self.reorder_every = reorder_every
+        self.countdown = reorder_every
+        self.required = None
+
+    def requirements(self):
+        if self.required is None:
+            self.required = (
+                [case.required_keys() for case in self.cases],
+                [overlay.required_keys() for overlay in self.overlays],
+            )
+        return self.required
+
+    def record(self, index):
+        if index is None:
+            self.misses += 1
+        else:
+            self.hits[index] += 1
+        self.countdown -= 1
+        if self.countdown <= 0:
+            self.countdown = self.reorder_every
+            hits = self.hits
+            self.order = sorted(range(len(hits)), key=lambda i: -hits[i])
 
 
 class DMap(MapValidator):
-    _local = threading.local()
+    _local = _ValidationState()
+    # Set by CallbackProfiler while it is active; see _callers().
+    _profiler = None
 
     def __init__(
         self,
-        control: Control,
+        control: Control | None,
         blocks: list[Block],
         constraints: list[Callable[..., bool]] | None = None,
+        first_match: bool = False,
+        reorder_every: int = 1000,
     ):
-        assert isinstance(control, Control), "control must be of type Control"
+        assert control is None or isinstance(control, Control), "control must be of type Control or None"
         assert isinstance(blocks, list), "blocks must be a list of Block"
         for block in blocks:
             assert isinstance(block, Block), "all blocks must be of type Block"
@@ -30,38 +265,90 @@ class DMap(MapValidator):
             for constraint in constraints:
                 assert callable(constraint), "every constraint must be callable"
 
+        if first_match:
+            for block in blocks:
+                assert isinstance(block, (Case, Overlay)), "first_match blocks must be Case or Overlay"
+            assert reorder_every > 0, "reorder_every must be positive"
+
         self.control = control
         self.blocks = blocks
         self.constraints = constraints
+        self.first_match = first_match
+        self._merged_validators = {}
+        self._parent_aware = None
+        self._prefiltered = any(block.requires_keys is not None for block in blocks)
+        self._key_index = None
+        # Callback signatures are inspected once here rather than on every node.
+        self._when_callers = {block: DMap._when_caller(block.when) for block in blocks}
+        # DMap-level constraints are filed under None; blocks under themselves.
+        self._constraint_callers = {
+            owner: [
+                DMap._constraint_caller(constraint)
+                for constraint in (constraints if owner is None else owner.constraints) or []
+            ]
+            for owner in [None] + blocks
+        }
+        self._case_order = None
+        if first_match:
+            self._case_order = _CaseOrder(
+                [block for block in blocks if isinstance(block, Case)],
+                [block for block in blocks if isinstance(block, Overlay)],
+                reorder_every,
+            )
+
+    def __deepcopy__(self, memo):
+        # Blocks are never mutated, so copies made by ValidatorBuilder share them
+        # (and everything derived from them) with the original.
+        copied = DMap.__new__(DMap)
+        memo[id(self)] = copied
+        copied.__dict__.update(self.__dict__)
+        copied.control = copy.deepcopy(self.control, memo)
+        return copied
 
     def __call__(self, chunk):
-        self.validate(chunk)
-        return self.validated
+        return self.validate(chunk)
 
+    @staticmethod
+    def _reset_constraint_state(state):
+        state.active_validations = 0
+        state.pending_constraints = []
+
+    # Deprecated views of the per-thread state in its old shape, for code that
+    # used to reach into it. Validation itself no longer goes through them.
     @classmethod
     def get_stack(cls):
-        if not hasattr(cls._local, 'stack'):
-            cls._local.stack = []
-        return cls._local.stack
+        warnings.warn("DMap.get_stack() is deprecated; it returns a copy", DeprecationWarning, stacklevel=2)
+        frame = cls._local.frame
+        if frame is None:
+            return []
+        stack = []
+        for current in frame.ancestors() + [frame]:
+            stack.append(
+                {"raw": current.raw, "ctrl": current.ctrl, "val": current.val, "parents": list(stack)}
+            )
+        return stack
 
     @classmethod
     def get_constraint_state(cls):
-        if not hasattr(cls._local, 'constraint_state'):
-            cls._local.constraint_state = {
-                "active_validations": 0,
-                "pending_constraints": [],
-            }
-        return cls._local.constraint_state
+        warnings.warn("DMap.get_constraint_state() is deprecated; it returns a copy", DeprecationWarning, stacklevel=2)
+        state = cls._local
+        return {
+            "active_validations": state.active_validations,
+            "pending_constraints": [
+                {"constraint": constraint, "frame": frame, "chunk": chunk, "where": where, "depth": depth}
+                for depth, constraint, frame, chunk, where in state.pending_constraints
+            ],
+        }
 
     @classmethod
     def reset_constraint_state(cls):
-        cls._local.constraint_state = {
-            "active_validations": 0,
-            "pending_constraints": [],
-        }
+        warnings.warn("DMap.reset_constraint_state() is deprecated", DeprecationWarning, stacklevel=2)
+        DMap._reset_constraint_state(cls._local)
 
     @staticmethod
     def _callback_shape(func):
+        import inspect
+
         try:
             sig = inspect.signature(func)
         except (TypeError, ValueError):
@@ -100,6 +387,53 @@ class DMap(MapValidator):
             return lambda raw, ctrl, val, parents=None: when(raw, ctrl, val)
         return lambda raw, ctrl, val, parents=None: bool(when)
 
+    @staticmethod
+    def _when_caller(when):
+        # Like compile_when, but takes the node's frame and builds `parents` from
+        # it only when the callback accepts them.
+        if isinstance(when, Expr):
+            return when.when_caller()
+        if callable(when):
+            positional_count, has_var_positional, has_var_keyword, has_named_parents = DMap._callback_shape(when)
+            if positional_count >= 3 or has_var_positional:
+                return lambda raw, ctrl, frame: when(raw, ctrl, frame.when_parents())
+            if has_named_parents or has_var_keyword:
+                return lambda raw, ctrl, frame: when(raw, ctrl, parents=frame.when_parents())
+            return lambda raw, ctrl, frame: when(raw, ctrl)
+        return lambda raw, ctrl, frame: bool(when)
+
+    @staticmethod
+    def _constraint_caller(constraint):
+        if isinstance(constraint, Expr):
+            return constraint.constraint_caller()
+        if callable(constraint):
+            positional_count, has_var_positional, has_var_keyword, has_named_parents = DMap._callback_shape(constraint)
+            if positional_count >= 4 or has_var_positional:
+                return lambda frame: constraint(frame.raw, frame.ctrl, frame.val, frame.constraint_parents())
+            if has_named_parents or has_var_keyword:
+                return lambda frame: constraint(
+                    frame.raw, frame.ctrl, frame.val, parents=frame.constraint_parents()
+                )
+            return lambda frame: constraint(frame.raw, frame.ctrl, frame.val)
+        return lambda frame: bool(constraint)
+
+    @staticmethod
+    def _takes_parents(callback, positional_count):
+        if isinstance(callback, Expr) or not callable(callback):
+            return False
+        count, has_var_positional, has_var_keyword, has_named_parents = DMap._callback_shape(callback)
+        return count >= positional_count or has_var_positional or has_var_keyword or has_named_parents
+
+    def _is_parent_aware(self):
+        if self._parent_aware is None:
+            constraints = list(self.constraints or [])
+            for block in self.blocks:
+                constraints.extend(block.constraints or [])
+            self._parent_aware = any(
+                DMap._takes_parents(block.when, 3) for block in self.blocks
+            ) or any(DMap._takes_parents(constraint, 4) for constraint in constraints)
+        return self._parent_aware
+
     @staticmethod
     def normalize_raw(raw):
         if isinstance(raw, dict):
@@ -114,155 +448,302 @@ class DMap(MapValidator):
                 return False
         return raw
 
-    def validate(self, chunk):
-        constraint_state = DMap.get_constraint_state()
-        is_root_validation = constraint_state["active_validations"] == 0
-        constraint_state["active_validations"] += 1
-        validation_succeeded = False
-        stack = DMap.get_stack()
-        chunk.expect_mapping()
-        raw = DMap.normalize_raw(chunk.contents)
-        parents = list(stack)
-        when_parents = [{"raw": parent["raw"], "ctrl": parent["ctrl"]} for parent in parents]
+    def case_hits(self):
+        assert self.first_match, "case hits are only counted when first_match=True"
+        case_order = self._case_order
+        hits = dict(zip(case_order.cases, case_order.hits))
+        hits[None] = case_order.misses
+        return hits
 
-        # Push a provisional frame before control validation so control-nested DMaps
-        # can still inspect parent raw/context (ctrl may be None until resolved).
-        frame = {"ctrl": None, "raw": raw, "val": None, "parents": parents}
-        stack.append(frame)
-        try:
-            self.control.validate(chunk)
-            ctrl = self.control.validated.data
-            frame["ctrl"] = ctrl
-        except Exception:
-            stack.pop()
-            constraint_state["active_validations"] -= 1
-            if is_root_validation:
-                DMap.reset_constraint_state()
-            raise
-
-        control_validator = self.control._validator
+    def _select_first_match(self, chunk, raw, ctrl, frame, record=True):
+        # Cases are declared disjoint, so the first true case wins and the rest
+        # are never evaluated; overlays are still all evaluated, in declaration order.
+        # record=False leaves the hit counters alone, for a look ahead of the
+        # validation that will count this node.
+        case_order = self._case_order
+        when_callers = self._callers()[0]
+        keys = raw.keys() if isinstance(raw, dict) else ()
+        if self._prefiltered:
+            case_required, overlay_required = case_order.requirements()
+        else:
+            case_required = [None] * len(case_order.cases)
+            overlay_required = [None] * len(case_order.overlays)
         true_case_block = None
+        hit = None
+        for index in case_order.order:
+            required = case_required[index]
+            if required and not required <= keys:
+                continue
+            case = case_order.cases[index]
+            if when_callers[case](raw, ctrl, frame):
+                true_case_block = case
+                hit = index
+                break
+        if record:
+            case_order.record(hit)
         true_overlay_blocks = []
+        for overlay, required in zip(case_order.overlays, overlay_required):
+            if required and not required <= keys:
+                continue
+            if when_callers[overlay](raw, ctrl, frame):
+                true_overlay_blocks.append(overlay)
+        return true_case_block, true_overlay_blocks
 
-        try:
-            # TODO: what if the user doesn't really want a control validator and only selects based on raw
-            for block in self.blocks:
-                if not DMap.compile_when(block.when)(raw, ctrl, parents=when_parents):
-                    continue
-                if isinstance(block, Case):
-                    if true_case_block is None:
-                        true_case_block = block
-                    else:
-                        chunk.expecting_but_found("when evaluating DMap blocks", "multiple cases were true")
-                elif isinstance(block, Overlay):
-                    true_overlay_blocks.append(block)
+    def _callers(self):
+        # (when callers by block, constraint callers by owner); timed copies of
+        # both while a CallbackProfiler is active.
+        profiler = DMap._profiler
+        if profiler is None:
+            return self._when_callers, self._constraint_callers
+        return profiler.callers_for(self)
+
+    def _candidate_blocks(self, raw):
+        # Blocks declaring requires_keys are skipped, without calling `when`,
+        # when the node lacks any of those keys.
+        if not self._prefiltered:
+            return self.blocks
+        if self._key_index is None:
+            self._key_index = _KeyIndex(self.blocks)
+        return self._key_index.candidates(raw)
+
+    def _record_selection(self, case):
+        # Counts a node selected with record=False that is not validated after all.
+        if self.first_match:
+            case_order = self._case_order
+            case_order.record(None if case is None else case_order.cases.index(case))
+
+    def _select_blocks(self, chunk, raw, ctrl, frame, record=True):
+        if self.first_match:
+            return self._select_first_match(chunk, raw, ctrl, frame, record)
+        when_callers = self._callers()[0]
+        true_case_block = None
+        true_overlay_blocks = []
+        for block in self._candidate_blocks(raw):
+            if not when_callers[block](raw, ctrl, frame):
+                continue
+            if isinstance(block, Case):
+                if true_case_block is None:
+                    true_case_block = block
                 else:
-                    chunk.expecting_but_found(
-                        "when evaluating DMap blocks",
-                        "unknown block type; expected Case or Overlay",
-                    )
-    
-            final_validator = ValidatorBuilder(
-                control_validator,
+                    chunk.expecting_but_found("when evaluating DMap blocks", "multiple cases were true")
+            elif isinstance(block, Overlay):
+                true_overlay_blocks.append(block)
+            else:
+                chunk.expecting_but_found(
+                    "when evaluating DMap blocks",
+                    "unknown block type; expected Case or Overlay",
+                )
+        return true_case_block, true_overlay_blocks
+
+    def _merged_validator(self, true_case_block, true_overlay_blocks):
+        # The merged validator only depends on which blocks were selected, so it is
+        # built once per combination instead of once per validated node.
+        key = (true_case_block, tuple(true_overlay_blocks))
+        if key not in self._merged_validators:
+            self._merged_validators[key] = ValidatorBuilder(
+                self.control._validator if self.control is not None else None,
                 true_case_block._validator if true_case_block is not None else Map({}),
                 [overlay._validator for overlay in true_overlay_blocks],
-                self.control.source,
+                self.control.source if self.control is not None else None,
             ).validator
-    
-            self.validated = final_validator(chunk)
-            val = self.validated.data
-            frame["val"] = val
-
-            if self.constraints:
-                for constraint in self.constraints:
-                    constraint_state["pending_constraints"].append(
-                        {
-                            "constraint": constraint,
-                            "frame": frame,
-                            "chunk": chunk,
-                            "where": "when evaluating DMap constraints",
-                            "depth": len(frame["parents"]),
-                        }
-                    )
-            if true_case_block and true_case_block.constraints:
-                for constraint in true_case_block.constraints:
-                    constraint_state["pending_constraints"].append(
-                        {
-                            "constraint": constraint,
-                            "frame": frame,
-                            "chunk": chunk,
-                            "where": "when evaluating DMap case constraints",
-                            "depth": len(frame["parents"]),
-                        }
-                    )
-            for overlay in true_overlay_blocks:
-                if overlay.constraints:
-                    for constraint in overlay.constraints:
-                        constraint_state["pending_constraints"].append(
-                            {
-                                "constraint": constraint,
-                                "frame": frame,
-                                "chunk": chunk,
-                                "where": "when evaluating DMap overlay constraints",
-                                "depth": len(frame["parents"]),
-                            }
+        return self._merged_validators[key]
+
+    def _queue_constraints(self, state, frame, chunk, true_case_block, true_overlay_blocks, memoized=None):
+        constraint_callers = self._callers()[1]
+        queued = [(constraint, "when evaluating DMap constraints") for constraint in constraint_callers[None]]
+        if true_case_block is not None:
+            queued.extend(
+                (constraint, "when evaluating DMap case constraints")
+                for constraint in constraint_callers[true_case_block]
+            )
+        for overlay in true_overlay_blocks:
+            queued.extend(
+                (constraint, "when evaluating DMap overlay constraints") for constraint in constraint_callers[overlay]
+            )
+        pending = state.pending_constraints
+        for index, (constraint, where) in enumerate(queued):
+            if memoized is not None:
+                constraint = memoized.shared(index, constraint)
+            pending.append((frame.depth, constraint, frame, chunk, where))
+
+    @staticmethod
+    def _run_pending_constraints(state):
+        for depth, constraint, frame, chunk, where in sorted(
+            state.pending_constraints,
+            key=lambda pending: pending[0],
+        ):
+            if not constraint(frame):
+                chunk.expecting_but_found(where, "constraints not fulfilled")
+
+    def _validate_node(self, chunk, raw, validate_control, validate_selected, select_blocks=None, positioned=False):
+        # validate_control() returns ctrl data and validate_selected(case, overlays)
+        # returns (result, val), so YAML chunks, plain Python data and compiled
+        # schemas share this pipeline. Results that are tied to their chunk
+        # (positioned=True) only memoize the selection, not the result.
+        state = DMap._local
+        memo = state.memo if state.selections is None else None
+        is_root_validation = state.active_validations == 0
+        state.active_validations += 1
+        validation_succeeded = False
+        try:
+            cached = None
+            if memo is not None:
+                entry, context, cached = self._memo_lookup(memo, state.frame, raw)
+            hit = cached is not None
+            if hit and not positioned:
+                result = cached.replay(state, chunk)
+            else:
+                if memo is not None:
+                    seen, queued_from = self._memo_begin(memo, state)
+                # Push a provisional frame before control validation so control-nested DMaps
+                # can still inspect parent raw/context (ctrl may be None until resolved).
+                frame = _Frame(raw, state.frame)
+                state.frame = frame
+                try:
+                    if hit:
+                        frame.ctrl = copy_data(cached.ctrl)
+                        true_case_block, true_overlay_blocks = cached.case, list(cached.overlays)
+                    else:
+                        frame.ctrl = validate_control()
+                        true_case_block, true_overlay_blocks = (select_blocks or self._select_blocks)(
+                            chunk, raw, frame.ctrl, frame
+                        )
+                        if memo is not None and positioned:
+                            cached = _MemoSelection(copy_data(frame.ctrl), true_case_block, tuple(true_overlay_blocks))
+                    result, frame.val = validate_selected(true_case_block, true_overlay_blocks)
+                    path = getattr(chunk, "path", None) if state.selections is not None else None
+                    if path is not None:
+                        # Only plain-data chunks carry a path; YAML results hold their own.
+                        selections = state.selections
+                        selections[path] = Selection(
+                            true_case_block,
+                            true_overlay_blocks,
+                            frame.ctrl,
+                            selections.get(path),
                         )
+
+                    self._queue_constraints(state, frame, chunk, true_case_block, true_overlay_blocks, cached)
+                finally:
+                    state.frame = frame.parent
+                if memo is not None and not hit:
+                    stored = cached if positioned else _MemoResult(
+                        result, frame.depth, chunk.path, state.pending_constraints[queued_from:]
+                    )
+                    DMap._memo_store(memo, entry, context, seen, frame, stored)
             validation_succeeded = True
         finally:
-            stack.pop()
-            constraint_state["active_validations"] -= 1
+            state.active_validations -= 1
+            if is_root_validation and not validation_succeeded:
+                DMap._reset_constraint_state(state)
 
-        if is_root_validation and validation_succeeded:
+        if is_root_validation:
             try:
-                for pending in sorted(
-                    constraint_state["pending_constraints"],
-                    key=lambda item: item["depth"],
-                ):
-                    parent_frames = pending["frame"]["parents"]
-                    parent_context = [
-                        {
-                            "raw": parent["raw"],
-                            "ctrl": parent["ctrl"],
-                            "val": parent["val"],
-                        }
-                        for parent in parent_frames
-                    ]
-                    if not DMap.compile_constraint(pending["constraint"])(
-                        pending["frame"]["raw"],
-                        pending["frame"]["ctrl"],
-                        pending["frame"]["val"],
-                        parents=parent_context,
-                    ):
-                        pending["chunk"].expecting_but_found(
-                            pending["where"],
-                            "constraints not fulfilled",
-                        )
+                DMap._run_pending_constraints(state)
             finally:
-                DMap.reset_constraint_state()
-        elif is_root_validation:
-            DMap.reset_constraint_state()
+                DMap._reset_constraint_state(state)
+        return result
+
+    def _memo_lookup(self, memo, parent, raw):
+        # A DMap validates identical content to identical data, so later copies of
+        # a subtree reuse the first result. _merged_validators is shared by a DMap
+        # and the copies ValidatorBuilder makes of it, so it identifies the DMap.
+        key = (id(self._merged_validators), memo.token(raw))
+        entry = memo.entries.get(key)
+        if entry is None:
+            entry = memo.entries[key] = _MemoEntry()
+        context = memo.context(parent) if entry.needs_context else None
+        cached = entry.results.get(context)
+        if cached is not None and entry.needs_context:
+            memo.parent_aware += 1
+        return entry, context, cached
+
+    def _memo_begin(self, memo, state):
+        seen = memo.parent_aware
+        if self._is_parent_aware():
+            memo.parent_aware += 1
+        return seen, len(state.pending_constraints)
+
+    @staticmethod
+    def _memo_store(memo, entry, context, seen, frame, stored):
+        if memo.parent_aware != seen and not entry.needs_context:
+            # Something in this subtree reads its parents, so the result is only
+            # reused under ancestors with the same content.
+            entry.needs_context = True
+            context = memo.context(frame.parent)
+        entry.results[context] = stored
+
+    def validate(self, chunk):
+        chunk.expect_mapping()
+        raw = DMap.normalize_raw(chunk.contents)
+
+        def validate_selected(true_case_block, true_overlay_blocks):
+            validated = self._merged_validator(true_case_block, true_overlay_blocks)(chunk)
+            # Kept on the result so callers can dispatch on it without re-running
+            # `when`; a DMap case schema returns the same object, hence `nested`.
+            validated._selection = Selection(
+                true_case_block,
+                true_overlay_blocks,
+                DMap._local.frame.ctrl,
+                getattr(validated, "_selection", None),
+            )
+            return validated, validated.data
+
+        # The result is returned rather than kept on the schema, so a long-lived
+        # schema never holds on to the last document it validated.
+        return self._validate_node(
+            chunk,
+            raw,
+            no_control if self.control is None else lambda: self.control.validate(chunk).data,
+            validate_selected,
+            positioned=True,
+        )
+
+    def select(self, document):
+        # Only the control is validated and the `when` predicates evaluated;
+        # nothing is merged, validated against a case or queued as a constraint.
+        return self._selection(document)
+
+    def _selection(self, document, record=True):
+        from .document import ParsedDocument, parse
+
+        if isinstance(document, dict):
+            from .native import DataChunk, _validate_control
+
+            chunk = DataChunk(document)
+            raw = document
+            ctrl = None if self.control is None else _validate_control(self.control, document, ())
+        else:
+            if isinstance(document, str):
+                document = parse(document)
+            if isinstance(document, ParsedDocument):
+                # Control validation only reads the tree, so skip the deep copy
+                # YAMLChunk would otherwise make for the strictparsed document.
+                document = YAMLChunk(document.contents, label=document.label, strictparsed=document.contents)
+            chunk = document
+            if not chunk.is_mapping():
+                chunk.expecting_but_found("when expecting a mapping", "found {0}".format(chunk.found()))
+            raw = DMap.normalize_raw(chunk.contents)
+            ctrl = None if self.control is None else self.control.validate(chunk).data
+        frame = _Frame(raw)
+        frame.ctrl = ctrl
+        true_case_block, true_overlay_blocks = self._select_blocks(chunk, raw, ctrl, frame, record)
+        return Selection(true_case_block, true_overlay_blocks, ctrl)
 
     def to_yaml(self, data):
         self._should_be_mapping(data)
-        stack = DMap.get_stack()
+        state = DMap._local
         raw = DMap.normalize_raw(data)
-        parents = list(stack)
-        when_parents = [{"raw": parent["raw"], "ctrl": parent["ctrl"]} for parent in parents]
-        frame = {"ctrl": None, "raw": raw, "val": None, "parents": parents}
-        stack.append(frame)
+        frame = _Frame(raw, state.frame)
+        state.frame = frame
         try:
-            self.control.validate(YAMLChunk(data))
-            ctrl = self.control.validated.data
-            frame["ctrl"] = ctrl
-        except Exception:
-            stack.pop()
-            raise
+            ctrl = None if self.control is None else self.control.validate(YAMLChunk(data)).data
+            frame.ctrl = ctrl
 
-        try:
+            when_callers = self._callers()[0]
             true_case_block = None
             true_overlay_blocks = []
-            for block in self.blocks:
-                if not DMap.compile_when(block.when)(raw, ctrl, parents=when_parents):
+            for block in self._candidate_blocks(raw):
+                if not when_callers[block](raw, ctrl, frame):
                     continue
                 if isinstance(block, Case):
                     if true_case_block is None:
@@ -273,20 +754,16 @@ class DMap(MapValidator):
                     true_overlay_blocks.append(block)
                 else:
                     raise YAMLSerializationError("Unknown DMap block type; expected Case or Overlay")
-    
-            final_validator = ValidatorBuilder(
-                self.control._validator,
-                true_case_block._validator if true_case_block is not None else Map({}),
-                [overlay._validator for overlay in true_overlay_blocks],
-                self.control.source,
-            ).validator
+
+            final_validator = self._merged_validator(true_case_block, true_overlay_blocks)
             return final_validator.to_yaml(data)
         finally:
-            stack.pop()
+            state.frame = frame.parent
 
     def __repr__(self):
-        return "DMap({0}, {1}{2})".format(
+        return "DMap({0}, {1}{2}{3})".format(
             repr(self.control),
             repr(self.blocks),
             ", constraints={0}".format(repr(self.constraints)) if self.constraints else "",
+            ", first_match=True" if self.first_match else "",
         )
@@ -0,0 +1,90 @@
+import copy
+
+from strictyaml import ruamel as ruamelyaml
+from strictyaml import utils
+from strictyaml.any_validator import Any
+from strictyaml.parser import StrictYAMLLoader
+from strictyaml.ruamel.comments import CommentedMap, CommentedSeq
+from strictyaml.yamllocation import YAMLChunk
+
+
+def copy_tree(node, memo=None):
+    # copy.deepcopy for parsed documents. ruamel's CommentedSeq copies its
+    # comment and line/column attributes once per item, so deepcopy takes time
+    # quadratic in the length of a sequence; here they are copied once.
+    if type(node) is str:
+        return node
+    memo = {} if memo is None else memo
+    if id(node) in memo:
+        return memo[id(node)]
+    if type(node) is CommentedSeq:
+        result = CommentedSeq()
+        memo[id(node)] = result
+        # Plain list methods: the comments are copied with the attributes below.
+        list.extend(result, [copy_tree(item, memo) for item in list.__iter__(node)])
+    elif type(node) is CommentedMap:
+        result = CommentedMap()
+        memo[id(node)] = result
+        for key in node:
+            result[key] = copy_tree(node[key], memo)
+    else:
+        return copy.deepcopy(node, memo)
+    node.copy_attributes(result, memo=memo)
+    return result
+
+
+class ParsedDocument:
+    def __init__(self, document, label="<unicode string>"):
+        self._document = document
+        self.label = label
+
+    @property
+    def contents(self):
+        return self._document
+
+    def chunk(self):
+        # Each validation works on its own copy, so nothing a validator or the
+        # returned YAML object does can leak into the next validation.
+        return YAMLChunk(
+            copy_tree(self._document),
+            label=self.label,
+            strictparsed=copy_tree(self._document),
+        )
+
+    def validate(self, schema=None, memoize=False):
+        if schema is None:
+            schema = Any()
+        if memoize:
+            from .native import memoizing
+
+            return memoizing(schema, self.chunk())
+        return schema(self.chunk())
+
+    def __repr__(self):
+        return "ParsedDocument(label={0})".format(repr(self.label))
+
+
+def parse(yaml_string, label="<unicode string>", allow_flow_style=False):
+    if not utils.is_string(yaml_string):
+        raise TypeError("StrictYAML can only read a string of valid YAML.")
+
+    DynamicStrictYAMLLoader = type(
+        "DynamicStrictYAMLLoader",
+        (StrictYAMLLoader,),
+        {"label": label, "allow_flow_style": allow_flow_style},
+    )
+
+    try:
+        document = ruamelyaml.load(yaml_string, Loader=DynamicStrictYAMLLoader)
+    except ruamelyaml.YAMLError as parse_error:
+        if parse_error.context_mark is not None:
+            parse_error.context_mark.name = label
+        if parse_error.problem_mark is not None:
+            parse_error.problem_mark.name = label
+        raise parse_error
+
+    # Document is just a (string, int, etc.)
+    if type(document) not in (CommentedMap, CommentedSeq):
+        document = yaml_string
+
+    return ParsedDocument(document, label=label)
@@ -0,0 +1,440 @@
+import operator
+
+from .utils import _numpy
+
+
+class _Missing:
+    __slots__ = ()
+
+    def __repr__(self):
+        return "MISSING"
+
+
+# Stands in for a field a document does not have. Comparisons involving it are
+# false; present() is how to ask for it explicitly.
+MISSING = _Missing()
+# Read-only stand-in for a missing mapping halfway along a path.
+_EMPTY = {}
+
+OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+SOURCES = ("raw", "ctrl", "val")
+
+class _Source:
+    # Constants and field fetches for the generated evaluate function.
+    def __init__(self):
+        self.namespace = {"_MISSING": MISSING, "_EMPTY": _EMPTY}
+        # Each distinct field is fetched once, up front.
+        self.fields = {}
+        self.fetches = []
+
+    def field(self, field):
+        key = (field.source, field.path)
+        name = self.fields.get(key)
+        if name is None:
+            name = self.fields[key] = "f{0}".format(len(self.fields))
+            code = field.source
+            for position, part in enumerate(field.path):
+                default = "_MISSING" if position == len(field.path) - 1 else "_EMPTY"
+                code = "{0}.get({1}, {2})".format(code, self.constant(part), default)
+            self.fetches.append("        {0} = {1}".format(name, code))
+        return name
+
+    def constant(self, value):
+        name = "c{0}".format(len(self.namespace))
+        self.namespace[name] = value
+        return name
+
+
+class _Columns:
+    # One batch of documents; field values are extracted once per distinct field.
+    def __init__(self, raws, ctrls, vals):
+        self.rows = (raws, ctrls, vals)
+        self.size = len(vals)
+        self.values = {}
+        self.arrays = {}
+
+
+class Expr:
+    # Expressions are constraints (and `when` predicates, if they only read raw
+    # and ctrl): DMap calls the compiled function directly instead of adapting a
+    # callback, and BatchValidator evaluates them a column at a time.
+    __hash__ = object.__hash__
+
+    def __and__(self, other):
+        return And(self, other)
+
+    def __or__(self, other):
+        return Or(self, other)
+
+    def __invert__(self):
+        return Not(self)
+
+    def __bool__(self):
+        # `a < x < b`, `and`, `or` and `not` would ask for the truth value of
+        # a clause and silently drop it.
+        raise TypeError(
+            "the truth value of an expression is ambiguous; combine expressions "
+            "with & (and), | (or) and ~ (not), and split a < x < b into (a < x) & (x < b)"
+        )
+
+    def __call__(self, raw, ctrl, val=None):
+        return self.compile()(raw, ctrl, val)
+
+    def compile(self):
+        compiled = self.__dict__.get("_compiled")
+        if compiled is None:
+            compiled = self.__dict__["_compiled"] = self._generate()
+        return compiled
+
+    def _generate(self):
+        # One flat function with dict.get lookups and no calls between nodes.
+        # Anything unusual (a non-mapping on a path, values that cannot be
+        # ordered) goes to the node-by-node closures, which define the semantics.
+        source = _Source()
+        body = self._source(source)
+        source.namespace["_exact"] = self._closure()
+        code = "\n".join(
+            ["def evaluate(raw, ctrl, val):", "    try:"]
+            + source.fetches
+            + [
+                "        return bool({0})".format(body),
+                "    except (TypeError, AttributeError):",
+                "        return _exact(raw, ctrl, val)",
+            ]
+        )
+        exec(compile(code, "<strictyamlx.expr {0!r}>".format(self), "exec"), source.namespace)
+        return source.namespace["evaluate"]
+
+    def sources(self):
+        return set()
+
+    def constraint_caller(self):
+        evaluate = self.compile()
+        return lambda frame: evaluate(frame.raw, frame.ctrl, frame.val)
+
+    def when_caller(self):
+        assert "val" not in self.sources(), "a `when` expression cannot read val"
+        evaluate = self.compile()
+        return lambda raw, ctrl, frame: evaluate(raw, ctrl, None)
+
+    def evaluate_many(self, raws, ctrls, vals, use_numpy=None):
+        # One boolean per document: a NumPy array when NumPy is installed (or
+        # use_numpy=True), otherwise a list.
+        numpy = _numpy() if use_numpy is not False else None
+        assert numpy is not None or not use_numpy, "use_numpy=True needs NumPy"
+        if numpy is None:
+            evaluate = self.compile()
+            return [evaluate(raw, ctrl, val) for raw, ctrl, val in zip(raws, ctrls, vals)]
+        return self._column(numpy, _Columns(raws, ctrls, vals))
+
+    def _column(self, numpy, columns):
+        # Fallback for nodes with no vectorized form: the compiled function per row.
+        evaluate = self.compile()
+        return numpy.fromiter(
+            (evaluate(raw, ctrl, val) for raw, ctrl, val in zip(*columns.rows)),
+            dtype=bool,
+            count=columns.size,
+        )
+
+
+class Field(Expr):
+    __hash__ = Expr.__hash__
+
+    def __init__(self, source, path):
+        assert source in SOURCES, "source must be one of: raw, ctrl, val"
+        self.source = source
+        self.path = tuple(path)
+
+    def _closure(self):
+        position = SOURCES.index(self.source)
+        path = self.path
+
+        def get(raw, ctrl, val):
+            value = (raw, ctrl, val)[position]
+            for key in path:
+                try:
+                    value = value[key]
+                except (KeyError, IndexError, TypeError):
+                    return MISSING
+            return value
+
+        return get
+
+    def _source(self, source):
+        return source.field(self)
+
+    def sources(self):
+        return {self.source}
+
+    def present(self):
+        return Present(self)
+
+    def isin(self, values):
+        return In(self, values)
+
+    def __eq__(self, other):
+        return Compare("==", self, other)
+
+    def __ne__(self, other):
+        return Compare("!=", self, other)
+
+    def __lt__(self, other):
+        return Compare("<", self, other)
+
+    def __le__(self, other):
+        return Compare("<=", self, other)
+
+    def __gt__(self, other):
+        return Compare(">", self, other)
+
+    def __ge__(self, other):
+        return Compare(">=", self, other)
+
+    def values(self, columns):
+        key = (self.source, self.path)
+        values = columns.values.get(key)
+        if values is None:
+            rows = columns.rows[SOURCES.index(self.source)]
+            if len(self.path) == 1:
+                name = self.path[0]
+                try:
+                    values = [row.get(name, MISSING) for row in rows]
+                except AttributeError:
+                    values = None
+            if values is None:
+                get = self._closure()
+                values = [get(*row) for row in zip(*columns.rows)]
+            columns.values[key] = values
+        return values
+
+    def array(self, numpy, columns):
+        # (object array, present mask). Object arrays compare element by element
+        # with Python's own semantics, so big integers, mixed int/float and
+        # strings behave exactly as in the per-document function.
+        key = (self.source, self.path)
+        if key not in columns.arrays:
+            columns.arrays[key] = _array(numpy, self.values(columns))
+        return columns.arrays[key]
+
+    def __repr__(self):
+        return "{0}({1})".format(self.source, ", ".join(repr(key) for key in self.path))
+
+
+class Compare(Expr):
+    def __init__(self, op, left, right):
+        assert op in OPERATORS, "op must be one of: {0}".format(", ".join(OPERATORS))
+        self.op = op
+        self.left = left
+        self.right = right
+
+    def _closure(self):
+        compare = OPERATORS[self.op]
+        get_left = self.left._closure()
+        if isinstance(self.right, Field):
+            get_right = self.right._closure()
+        else:
+            constant = self.right
+            get_right = lambda raw, ctrl, val: constant
+
+        def evaluate(raw, ctrl, val):
+            left = get_left(raw, ctrl, val)
+            right = get_right(raw, ctrl, val)
+            if left is MISSING or right is MISSING:
+                return False
+            try:
+                return compare(left, right)
+            except TypeError:
+                # Like a missing field: "1" >= 1 is simply not fulfilled.
+                return False
+
+        return evaluate
+
+    def _source(self, source):
+        left = self.left._source(source)
+        if isinstance(self.right, Field):
+            right = self.right._source(source)
+            return "({0} is not _MISSING and {1} is not _MISSING and {0} {2} {1})".format(left, right, self.op)
+        return "({0} is not _MISSING and {0} {1} {2})".format(left, self.op, source.constant(self.right))
+
+    def sources(self):
+        sources = self.left.sources()
+        if isinstance(self.right, Field):
+            sources |= self.right.sources()
+        return sources
+
+    def _column(self, numpy, columns):
+        left, left_present = self.left.array(numpy, columns)
+        if isinstance(self.right, Field):
+            right, right_present = self.right.array(numpy, columns)
+        else:
+            right, right_present = self.right, True
+            if isinstance(right, (list, tuple, set, frozenset, dict, numpy.ndarray)):
+                # A 0-d array, so each row is compared with the whole value
+                # rather than NumPy comparing element by element.
+                right = numpy.empty((), dtype=object)
+                right[()] = self.right
+        try:
+            result = OPERATORS[self.op](left, right)
+        except (TypeError, ValueError):
+            # Values that cannot be ordered; only some rows are false.
+            return Expr._column(self, numpy, columns)
+        if not isinstance(result, numpy.ndarray):
+            return Expr._column(self, numpy, columns)
+        return result.astype(bool, copy=False) & left_present & right_present
+
+    def __repr__(self):
+        return "({0!r} {1} {2!r})".format(self.left, self.op, self.right)
+
+
+class In(Expr):
+    def __init__(self, field, values):
+        self.field = field
+        self.choices = frozenset(values)
+
+    def _closure(self):
+        get = self.field._closure()
+        choices = self.choices
+
+        def evaluate(raw, ctrl, val):
+            value = get(raw, ctrl, val)
+            try:
+                return value is not MISSING and value in choices
+            except TypeError:
+                return False
+
+        return evaluate
+
+    def _source(self, source):
+        value = self.field._source(source)
+        return "({0} is not _MISSING and {0} in {1})".format(value, source.constant(self.choices))
+
+    def sources(self):
+        return self.field.sources()
+
+    def __repr__(self):
+        return "{0!r}.isin({1!r})".format(self.field, sorted(self.choices, key=repr))
+
+
+class Present(Expr):
+    def __init__(self, field):
+        self.field = field
+
+    def _closure(self):
+        get = self.field._closure()
+        return lambda raw, ctrl, val: get(raw, ctrl, val) is not MISSING
+
+    def _source(self, source):
+        return "({0} is not _MISSING)".format(self.field._source(source))
+
+    def sources(self):
+        return self.field.sources()
+
+    def _column(self, numpy, columns):
+        return numpy.fromiter(
+            (value is not MISSING for value in self.field.values(columns)),
+            dtype=bool,
+            count=columns.size,
+        )
+
+    def __repr__(self):
+        return "{0!r}.present()".format(self.field)
+
+
+class And(Expr):
+    def __init__(self, left, right):
+        self.left = left
+        self.right = right
+
+    def _closure(self):
+        left = self.left._closure()
+        right = self.right._closure()
+        return lambda raw, ctrl, val: bool(left(raw, ctrl, val)) and bool(right(raw, ctrl, val))
+
+    def _source(self, source):
+        return "({0} and {1})".format(self.left._source(source), self.right._source(source))
+
+    def sources(self):
+        return self.left.sources() | self.right.sources()
+
+    def _column(self, numpy, columns):
+        return self.left._column(numpy, columns) & self.right._column(numpy, columns)
+
+    def __repr__(self):
+        return "({0!r} & {1!r})".format(self.left, self.right)
+
+
+class Or(Expr):
+    def __init__(self, left, right):
+        self.left = left
+        self.right = right
+
+    def _closure(self):
+        left = self.left._closure()
+        right = self.right._closure()
+        return lambda raw, ctrl, val: bool(left(raw, ctrl, val)) or bool(right(raw, ctrl, val))
+
+    def _source(self, source):
+        return "({0} or {1})".format(self.left._source(source), self.right._source(source))
+
+    def sources(self):
+        return self.left.sources() | self.right.sources()
+
+    def _column(self, numpy, columns):
+        return self.left._column(numpy, columns) | self.right._column(numpy, columns)
+
+    def __repr__(self):
+        return "({0!r} | {1!r})".format(self.left, self.right)
+
+
+class Not(Expr):
+    def __init__(self, operand):
+        self.operand = operand
+
+    def _closure(self):
+        operand = self.operand._closure()
+        return lambda raw, ctrl, val: not operand(raw, ctrl, val)
+
+    def _source(self, source):
+        return "(not {0})".format(self.operand._source(source))
+
+    def sources(self):
+        return self.operand.sources()
+
+    def _column(self, numpy, columns):
+        return ~self.operand._column(numpy, columns)
+
+    def __repr__(self):
+        return "~{0!r}".format(self.operand)
+
+
+def _array(numpy, values):
+    array = numpy.empty(len(values), dtype=object)
+    # Slice assignment keeps list and dict values as single elements.
+    array[:] = values
+    if MISSING not in values:
+        return array, True
+    present = array != MISSING
+    # Missing slots get some present value, so ordering does not fail on them,
+    # and are masked out.
+    if present.any():
+        array[~present] = array[int(present.argmax())]
+    return array, present.astype(bool, copy=False)
+
+
+def raw(*path):
+    return Field("raw", path)
+
+
+def ctrl(*path):
+    return Field("ctrl", path)
+
+
+def val(*path):
+    return Field("val", path)
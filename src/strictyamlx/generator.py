@@ -0,0 +1,510 @@
+import array
+import datetime
+import decimal
+import random
+import re
+
+from strictyaml import Any, Map, MapCombined, MapPattern, Seq, FixedSeq, UniqueSeq
+from strictyaml.ruamel import dump
+from strictyaml.ruamel.dumper import RoundTripDumper
+from strictyaml.validators import OrValidator
+from strictyaml.scalar import (
+    ScalarValidator,
+    Str,
+    Int,
+    HexInt,
+    Bool,
+    Float,
+    Decimal,
+    Datetime,
+    Email,
+    Url,
+    Enum,
+    CommaSeparated,
+    NullNone,
+    EmptyNone,
+    EmptyDict,
+    EmptyList,
+)
+from strictyaml.exceptions import YAMLSerializationError, YAMLValidationError
+from strictyaml.compound import Optional
+from .blocks import Case, Overlay
+from .dmap import DMap, copy_data
+from .expr import Compare, Expr, Field, In
+from .forwardref import ForwardRef
+from .keyed_choice_map import KeyedChoiceMap
+from .native import _control_contents, validate_data
+from .number_array import FLOAT_TYPECODES, NumberArray
+from .table import Table
+from .utils import unpack
+
+SYLLABLES = ["ka", "lo", "mi", "nu", "pe", "ra", "si", "to", "ve", "zu", "an", "or"]
+EPOCH = datetime.datetime(2000, 1, 1, tzinfo=datetime.timezone.utc)
+PLAIN = re.compile(r"^[A-Za-z0-9_.+/$(~][^\t]*(?<![ :])$")
+
+
+def _constants(callback, found):
+    # Values a `when` compares against. Random text almost never equals
+    # ctrl["kind"] == "web", so these are offered to the DMap's scalars.
+    if isinstance(callback, Expr):
+        if isinstance(callback, Compare) and not isinstance(callback.right, Field):
+            found.append(callback.right)
+        elif isinstance(callback, In):
+            found.extend(callback.choices)
+        for child in ("left", "right", "operand"):
+            value = getattr(callback, child, None)
+            if isinstance(value, Expr):
+                _constants(value, found)
+        return found
+    code = getattr(callback, "__code__", None)
+    if code is None:
+        return found
+    stack = [code]
+    while stack:
+        code = stack.pop()
+        for constant in code.co_consts:
+            if hasattr(constant, "co_consts"):
+                stack.append(constant)
+            elif isinstance(constant, (str, int, float)) and not isinstance(constant, bool):
+                found.append(constant)
+    return found
+
+
+def _scalar(text):
+    # Plain when StrictYAML reads it back as the same string, single-quoted
+    # otherwise; None for text that needs the full dumper (line breaks, ...).
+    if not isinstance(text, str) or not text.isprintable():
+        return None
+    if PLAIN.match(text) and ": " not in text and " #" not in text:
+        return text
+    return "'{0}'".format(text.replace("'", "''"))
+
+
+def _write(node, indent, lines):
+    if isinstance(node, dict):
+        if not node:
+            return False
+        for key, value in node.items():
+            key = _scalar(key)
+            if key is None:
+                return False
+            if isinstance(value, (dict, list)):
+                lines.append("{0}{1}:".format(indent, key))
+                if not _write(value, indent + "  ", lines):
+                    return False
+            else:
+                value = _scalar(value)
+                if value is None:
+                    return False
+                lines.append("{0}{1}: {2}".format(indent, key, value))
+        return True
+    if isinstance(node, list):
+        if not node:
+            return False
+        for item in node:
+            start = len(lines)
+            if isinstance(item, (dict, list)):
+                if not _write(item, indent + "  ", lines):
+                    return False
+                lines[start] = "{0}- {1}".format(indent, lines[start][len(indent) + 2:])
+            else:
+                item = _scalar(item)
+                if item is None:
+                    return False
+                lines.append("{0}- {1}".format(indent, item))
+        return True
+    node = _scalar(node)
+    if node is None:
+        return False
+    lines.append(indent + node)
+    return True
+
+
+class DocumentGenerator:
+    # Produces random plain-data documents that validate against a schema, for
+    # benchmarks and stress tests. Every document is checked with validate_data
+    # before it is returned, so `when` predicates and constraints are respected
+    # by retrying rather than by understanding them.
+    def __init__(
+        self,
+        schema,
+        seed=None,
+        max_depth=6,
+        seq_length=(1, 4),
+        optional=0.5,
+        case_weights=None,
+        attempts=100,
+    ):
+        minimum, maximum = seq_length
+        # StrictYAML cannot write an empty sequence or mapping.
+        assert 1 <= minimum <= maximum, "seq_length must be (minimum, maximum) with 1 <= minimum <= maximum"
+        assert 0 <= optional <= 1, "optional must be a probability"
+        self.schema = schema
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.max_depth = max_depth
+        self.seq_length = (minimum, maximum)
+        self.optional = optional
+        # Case -> relative weight; cases not listed weigh 1.
+        self.case_weights = case_weights or {}
+        self.attempts = attempts
+        self._hints = ()
+        self._dmap_hints = {}
+        self._accepted_hints = {}
+        # (id(dmap), case) -> control values that selected the case.
+        self._controls = {}
+
+    def length(self, depth, minimum=1, maximum=None):
+        low = max(minimum, self.seq_length[0])
+        high = self.seq_length[1] if maximum is None else min(maximum, self.seq_length[1])
+        if depth >= self.max_depth or high <= low:
+            return low
+        return self.random.randint(low, high)
+
+    def include_optional(self, depth):
+        return depth < self.max_depth and self.random.random() < self.optional
+
+    def word(self):
+        return "".join(self.random.choice(SYLLABLES) for _ in range(self.random.randint(2, 5)))
+
+    def hint(self, validator):
+        # One of the enclosing DMap's `when` constants this validator accepts,
+        # half of the time there is one.
+        key = (id(validator), id(self._hints))
+        accepted = self._accepted_hints.get(key)
+        if accepted is None:
+            accepted = []
+            for value in self._hints:
+                try:
+                    validate_data(value, validator)
+                except (YAMLValidationError, YAMLSerializationError):
+                    continue
+                accepted.append(value)
+            self._accepted_hints[key] = accepted
+        if accepted and self.random.random() < 0.5:
+            return self.random.choice(accepted)
+        return None
+
+    def value(self, validator, depth=0):
+        validator_type = type(validator)
+        handler = GENERATORS.get(validator_type) or _resolve(validator_type)
+        return handler(self, validator, depth)
+
+    def pick_case(self, dmap):
+        cases = [block for block in dmap.blocks if isinstance(block, Case)]
+        weights = [self.case_weights.get(case, 1) for case in cases]
+        return self.random.choices(cases, weights)[0] if any(weights) else None
+
+    def generate(self):
+        schema = unpack(self.schema)
+        # Retries keep the case picked for a DMap root, so constraints that
+        # reject one case more often than another do not skew case_weights.
+        case = self.pick_case(schema) if isinstance(schema, DMap) else None
+        error = None
+        for _ in range(self.attempts):
+            if isinstance(schema, DMap):
+                document = _generate_dmap(self, schema, 0, case)
+            else:
+                document = self.value(schema)
+            try:
+                validate_data(document, self.schema)
+            except YAMLValidationError as invalid:
+                error = invalid
+                continue
+            return document
+        raise YAMLSerializationError(
+            "could not generate a valid document in {0} attempts; last error:\n{1}".format(self.attempts, error)
+        )
+
+    def documents(self, count=None):
+        generated = 0
+        while count is None or generated < count:
+            yield self.generate()
+            generated += 1
+
+    def to_yaml(self, document):
+        # The schema turns the document into mappings, lists and strings; those
+        # are written directly, since ruamel's dumper (and as_document(), which
+        # validates its result once more) cost several times the generation.
+        tree = self.schema.to_yaml(document)
+        lines = []
+        if not _write(tree, "", lines):
+            return dump(tree, Dumper=RoundTripDumper)
+        return "\n".join(lines) + "\n"
+
+    def write_yaml(self, stream, size):
+        # Writes documents as items of one top-level sequence, which loads
+        # with Seq(schema) and validate_parallel, until at least `size`
+        # characters are written. Returns the number of documents.
+        written = 0
+        count = 0
+        while written < size:
+            text = self.to_yaml(self.generate()).rstrip("\n")
+            item = "- {0}\n".format(text.replace("\n", "\n  "))
+            stream.write(item)
+            written += len(item)
+            count += 1
+        return count
+
+    def __repr__(self):
+        return "DocumentGenerator({0}, seed={1})".format(repr(self.schema), repr(self.seed))
+
+
+def _generate_scalar(generator, validator, depth):
+    hint = generator.hint(validator) if generator._hints else None
+    if hint is not None:
+        return hint
+    for cls in type(validator).__mro__:
+        if cls in SCALARS:
+            return SCALARS[cls](generator, validator)
+    raise YAMLSerializationError(
+        "cannot generate values for validator '{0}'".format(type(validator).__name__)
+    )
+
+
+def _datetime(generator, validator):
+    return EPOCH + datetime.timedelta(seconds=generator.random.randint(0, 10**9))
+
+
+def _comma_separated(generator, validator):
+    return [
+        _generate_scalar(generator, validator._item_validator, generator.max_depth)
+        for _ in range(generator.length(0))
+    ]
+
+
+SCALARS = {
+    Enum: lambda generator, validator: generator.random.choice(list(validator._restricted_to)),
+    CommaSeparated: _comma_separated,
+    Email: lambda generator, validator: "{0}@example.com".format(generator.word()),
+    Url: lambda generator, validator: "https://example.com/{0}".format(generator.word()),
+    Str: lambda generator, validator: generator.word(),
+    Int: lambda generator, validator: generator.random.randint(0, 10**6),
+    HexInt: lambda generator, validator: generator.random.randint(0, 10**6),
+    Bool: lambda generator, validator: generator.random.random() < 0.5,
+    Float: lambda generator, validator: round(generator.random.uniform(-1000, 1000), 3),
+    Decimal: lambda generator, validator: decimal.Decimal("{0:.2f}".format(generator.random.uniform(0, 1000))),
+    Datetime: _datetime,
+    NullNone: lambda generator, validator: None,
+    EmptyDict: lambda generator, validator: {},
+    EmptyList: lambda generator, validator: [],
+    EmptyNone: lambda generator, validator: None,
+}
+
+
+def _generate_map(generator, validator, depth):
+    result = {}
+    optional = []
+    for key, value_validator in validator._validator.items():
+        if isinstance(key, Optional):
+            if not generator.include_optional(depth):
+                optional.append((key.key, value_validator))
+                continue
+            key = key.key
+        result[key] = generator.value(value_validator, depth + 1)
+    if not result and optional:
+        # StrictYAML cannot write an empty mapping.
+        key, value_validator = generator.random.choice(optional)
+        result[key] = generator.value(value_validator, depth + 1)
+    return result
+
+
+def _add_pattern_keys(generator, key_validator, value_validator, result, count, depth):
+    for _ in range(generator.attempts):
+        if len(result) >= count:
+            break
+        key = generator.value(key_validator, depth + 1)
+        if key not in result:
+            result[key] = generator.value(value_validator, depth + 1)
+    return result
+
+
+def _generate_map_pattern(generator, validator, depth):
+    count = generator.length(depth, validator._minimum_keys or 1, validator._maximum_keys)
+    return _add_pattern_keys(generator, validator._key_validator, validator._value_validator, {}, count, depth)
+
+
+def _generate_map_combined(generator, validator, depth):
+    # What ValidatorBuilder makes of a MapPattern: fixed keys, plus any number
+    # of keys matching the pattern.
+    result = _generate_map(generator, validator, depth)
+    count = len(result) + generator.length(depth) - (1 if result else 0)
+    return _add_pattern_keys(generator, validator._key_validator, validator._value_validator, result, count, depth)
+
+
+def _generate_keyed_choice_map(generator, validator, depth):
+    keys = validator.choice_keys
+    minimum = validator.minimum_keys or 0
+    maximum = len(keys) if validator.maximum_keys is None else min(validator.maximum_keys, len(keys))
+    count = minimum if depth >= generator.max_depth else generator.random.randint(minimum, maximum)
+    return {
+        key: generator.value(validator._validator[key], depth + 1)
+        for key in generator.random.sample(keys, count)
+    }
+
+
+def _generate_seq(generator, validator, depth):
+    return [generator.value(validator._validator, depth + 1) for _ in range(generator.length(depth))]
+
+
+def _generate_fixed_seq(generator, validator, depth):
+    return [generator.value(item_validator, depth + 1) for item_validator in validator._validators]
+
+
+def _generate_unique_seq(generator, validator, depth):
+    count = generator.length(depth)
+    result = []
+    for _ in range(generator.attempts):
+        if len(result) >= count:
+            break
+        item = generator.value(validator._validator, depth + 1)
+        if item not in result:
+            result.append(item)
+    return result
+
+
+def _generate_number_array(generator, validator, depth):
+    low, high = validator._length or (None, None)
+    count = generator.length(depth, 1 if low is None else low, high)
+    minimum, maximum = validator._minimum, validator._maximum
+    if validator._typecode in FLOAT_TYPECODES:
+        minimum = (-1000 if maximum is None else maximum - 1000) if minimum is None else minimum
+        maximum = minimum + 2000 if maximum is None else maximum
+        return [
+            min(max(round(generator.random.uniform(minimum, maximum), 3), minimum), maximum)
+            for _ in range(count)
+        ]
+    # Within the bounds and what the typecode can hold.
+    bits = array.array(validator._typecode).itemsize * 8
+    signed = validator._typecode.islower()
+    minimum = max(0 if minimum is None else int(-(-minimum // 1)), -(2 ** (bits - 1)) if signed else 0)
+    maximum = min(10**6 if maximum is None else int(maximum // 1), 2 ** (bits - 1) - 1 if signed else 2**bits - 1)
+    return [generator.random.randint(minimum, maximum) for _ in range(count)]
+
+
+def _generate_table(generator, validator, depth):
+    # Rows, whatever the table returns.
+    return [generator.value(validator._map, depth + 1) for _ in range(generator.length(depth))]
+
+
+def _generate_or(generator, validator, depth):
+    chosen = validator._validator_a if generator.random.random() < 0.5 else validator._validator_b
+    return generator.value(chosen, depth)
+
+
+def _generate_any(generator, validator, depth):
+    return generator.word()
+
+
+def _generate_forward_ref(generator, validator, depth):
+    return generator.value(unpack(validator), depth)
+
+
+def _learn_control(generator, dmap, target, data):
+    # Distinct control values that selected a case are reused for most later
+    # attempts at it, so a case behind a narrow `when` costs a few attempts
+    # once rather than every time.
+    learned = generator._controls.setdefault((id(dmap), target), [])
+    contents = _control_contents(dmap.control, data, ())[0]
+    if len(learned) < 16 and contents not in learned:
+        learned.append(copy_data(contents))
+
+
+def _overlay(data, contents):
+    for key, value in contents.items():
+        if isinstance(value, dict) and isinstance(data.get(key), dict):
+            _overlay(data[key], value)
+        else:
+            data[key] = copy_data(value)
+
+
+def _set_control(data, control, contents):
+    source = control.source
+    if isinstance(source, str) and source != "":
+        source = (source,)
+    source = tuple(source) if source else ()
+    if not source:
+        _overlay(data, contents)
+        return
+    for key in source[:-1]:
+        data = data.get(key)
+        if not isinstance(data, dict):
+            return
+    if isinstance(contents, dict) and isinstance(data.get(source[-1]), dict):
+        _overlay(data[source[-1]], contents)
+    else:
+        data[source[-1]] = copy_data(contents)
+
+
+def _generate_dmap(generator, dmap, depth, target=None):
+    # Aim for one case (by case_weights) and a random set of overlays, build the
+    # merged validator for them and keep the data once select() agrees.
+    if target is None:
+        target = generator.pick_case(dmap)
+    overlays = [block for block in dmap.blocks if isinstance(block, Overlay)]
+    hints = generator._dmap_hints.get(id(dmap))
+    if hints is None:
+        hints = generator._dmap_hints[id(dmap)] = tuple(
+            dict.fromkeys(constant for block in dmap.blocks for constant in _constants(block.when, []))
+        )
+    outer_hints = generator._hints
+    generator._hints = hints
+    try:
+        for _ in range(generator.attempts):
+            chosen = [overlay for overlay in overlays if generator.random.random() < generator.optional]
+            # Overlays selected by the generated data are generated for in
+            # turn, until the data selects exactly what it was generated for.
+            for _ in range(len(overlays) + 1):
+                data = generator.value(dmap._merged_validator(target, chosen), depth)
+                learned = generator._controls.get((id(dmap), target))
+                if learned and generator.random.random() < 0.75:
+                    _set_control(data, dmap.control, generator.random.choice(learned))
+                try:
+                    # Not a validation, so not counted in first_match case hits.
+                    selection = dmap._selection(data, record=False)
+                except YAMLValidationError:
+                    break
+                if selection.case is not target:
+                    break
+                if list(selection.overlays) == chosen:
+                    if dmap.control is not None:
+                        _learn_control(generator, dmap, target, data)
+                    return data
+                chosen = list(selection.overlays)
+    finally:
+        generator._hints = outer_hints
+    raise YAMLSerializationError(
+        "could not generate a document selecting {0} in {1} attempts".format(repr(target), generator.attempts)
+    )
+
+
+GENERATORS = {
+    ForwardRef: _generate_forward_ref,
+    DMap: _generate_dmap,
+    KeyedChoiceMap: _generate_keyed_choice_map,
+    Map: _generate_map,
+    MapCombined: _generate_map_combined,
+    MapPattern: _generate_map_pattern,
+    Seq: _generate_seq,
+    FixedSeq: _generate_fixed_seq,
+    UniqueSeq: _generate_unique_seq,
+    NumberArray: _generate_number_array,
+    Table: _generate_table,
+    OrValidator: _generate_or,
+    Any: _generate_any,
+    ScalarValidator: _generate_scalar,
+}
+
+
+def _resolve(validator_type):
+    for cls in validator_type.__mro__:
+        if cls in GENERATORS:
+            GENERATORS[validator_type] = GENERATORS[cls]
+            return GENERATORS[cls]
+    raise YAMLSerializationError(
+        "cannot generate documents for validator '{0}'".format(validator_type.__name__)
+    )
+
+
+def generate(schema, count=1, seed=None, **options):
+    return list(DocumentGenerator(schema, seed=seed, **options).documents(count))
@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 from collections.abc import Iterable
-from typing import Any
 
 from strictyaml import Validator
 from strictyaml.validators import MapValidator
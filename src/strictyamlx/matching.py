@@ -0,0 +1,91 @@
+from strictyaml import Map, Str
+from strictyaml.exceptions import YAMLValidationError
+from strictyaml.ruamel.error import YAMLError
+
+from .codegen import CompiledSchema
+from .dmap import DMap
+from .document import ParsedDocument, parse
+from .native import validate_data
+
+
+class Match:
+    # What matches() found out. When a YAML document is rejected before full
+    # validation, its error is made, by validating it again, only when asked for.
+    __slots__ = ("schema", "document", "value", "_matched", "_error")
+
+    def __init__(self, schema, document, matched, value=None, error=None):
+        self.schema = schema
+        self.document = document
+        # The validated data (or YAML object for YAML input) when it matched.
+        self.value = value
+        self._matched = matched
+        self._error = error
+
+    def __bool__(self):
+        return self._matched
+
+    @property
+    def error(self):
+        if self._matched:
+            return None
+        if self._error is None:
+            try:
+                _validate(self.schema, self.document)
+            except YAMLError as error:
+                self._error = error
+        return self._error
+
+    def __repr__(self):
+        return "Match({0})".format(self._matched)
+
+
+def _validate(schema, document):
+    if isinstance(document, ParsedDocument):
+        return document.validate(schema)
+    if isinstance(schema, CompiledSchema):
+        return schema.validate(document)
+    return validate_data(document, schema)
+
+
+def _rejects_early(schema, document):
+    # A DMap's control and `when` predicates are checked on the parsed tree as
+    # it is, before validate() pays for a deep copy of the whole document. So
+    # is the one thing most candidate schemas trip over: a key that the
+    # selected combination does not have.
+    try:
+        # Counted towards first_match case hits only if validate() will not
+        # count it again.
+        selection = schema._selection(document, record=False)
+    except YAMLValidationError:
+        return True
+    merged = schema._merged_validator(selection.case, list(selection.overlays))
+    if type(merged) is not Map or type(merged._key_validator) is not Str:
+        return False
+    if document.contents.keys() <= merged._validator_dict.keys():
+        return False
+    schema._record_selection(selection.case)
+    return True
+
+
+def matches(schema, document):
+    # document is plain data, YAML text or a ParsedDocument. Parse text once
+    # with parse() when trying it against several schemas.
+    if isinstance(document, str):
+        try:
+            document = parse(document)
+        except YAMLError as error:
+            return Match(schema, document, False, error=error)
+    if isinstance(document, ParsedDocument):
+        assert not isinstance(schema, CompiledSchema), "compiled schemas validate plain data, not YAML"
+        if isinstance(schema, DMap) and _rejects_early(schema, document):
+            return Match(schema, document, False)
+        try:
+            return Match(schema, document, True, document.validate(schema))
+        except YAMLValidationError as error:
+            # Marks, and the document dump they need, are made on first access.
+            return Match(schema, document, False, error=error)
+    try:
+        return Match(schema, document, True, _validate(schema, document))
+    except YAMLValidationError as error:
+        # Plain-data errors are only put into words by str().
+        return Match(schema, document, False, error=error)
@@ -0,0 +1,485 @@
+from strictyaml import Any, Map, MapCombined, MapPattern, Seq, FixedSeq, UniqueSeq
+from strictyaml.validators import OrValidator
+from strictyaml.scalar import ScalarValidator, Str, Int, Bool, Float, Enum, CommaSeparated
+from strictyaml.exceptions import YAMLValidationError, YAMLSerializationError
+from strictyaml import utils
+from .forwardref import ForwardRef
+from .dmap import DMap, _Memo, no_control
+from .keyed_choice_map import KeyedChoiceMap
+from .number_array import NumberArray
+from .table import Table
+from .utils import unpack
+
+
+class DataValidationError(YAMLValidationError):
+    def __init__(self, context, problem, path):
+        self.context = context
+        self.problem = problem
+        self.path = path
+        self._chunk = None
+        self.note = None
+
+    @property
+    def context_mark(self):
+        return None
+
+    @property
+    def problem_mark(self):
+        return None
+
+    @property
+    def location(self):
+        return format_path(self.path)
+
+    def __str__(self):
+        return "{0}\n{1}\n  at {2}".format(self.context, self.problem, self.location)
+
+
+def format_path(path):
+    location = "$"
+    for part in path:
+        if isinstance(part, int):
+            location += "[{0}]".format(part)
+        else:
+            location += ".{0}".format(part)
+    return location
+
+
+def describe(value):
+    if isinstance(value, dict):
+        return "a mapping"
+    if isinstance(value, (list, tuple)):
+        return "a sequence"
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "a boolean"
+    if isinstance(value, int):
+        return "an arbitrary integer"
+    if isinstance(value, float):
+        return "an arbitrary number"
+    if value == "":
+        return "a blank string"
+    if utils.is_string(value) and utils.is_integer(value):
+        return "an arbitrary integer"
+    if utils.is_string(value) and utils.is_decimal(value):
+        return "an arbitrary number"
+    return "arbitrary text"
+
+
+class DataChunk:
+    # Stands in for YAMLChunk wherever a validator only needs contents and
+    # error reporting, so errors on plain data carry a path instead of a mark.
+    __slots__ = ("contents", "path")
+
+    def __init__(self, contents, path=()):
+        self.contents = contents
+        self.path = path
+
+    def found(self):
+        return describe(self.contents)
+
+    def expecting_but_found(self, expecting, found=None):
+        raise DataValidationError(
+            expecting,
+            found if found is not None else "found {0}".format(self.found()),
+            self.path,
+        )
+
+    def while_parsing_found(self, what, found=None):
+        self.expecting_but_found("while parsing {0}".format(what), found=found)
+
+
+SCALAR_DESCRIPTIONS = {
+    Str: "a string",
+    Int: "an integer",
+    Bool: "a boolean",
+    Float: "a float",
+}
+
+
+def _fail(value, path, expecting, found=None):
+    DataChunk(value, path).expecting_but_found(expecting, found)
+
+
+def _expect_mapping(value, path):
+    if not isinstance(value, dict):
+        _fail(value, path, "when expecting a mapping")
+    return value
+
+
+def _expect_sequence(value, path, expecting="when expecting a sequence"):
+    if not isinstance(value, list):
+        _fail(value, path, expecting)
+    return value
+
+
+def _validate_scalar(validator, value, path):
+    if isinstance(value, (dict, list)):
+        _fail(value, path, "when expecting {0}".format(validator.rule_description))
+    validator_type = type(validator)
+    if validator_type is Str and isinstance(value, str):
+        return value
+    if validator_type is Int and type(value) is int:
+        return value
+    if validator_type is Bool and type(value) is bool:
+        return value
+    if validator_type is Float and type(value) in (int, float):
+        return float(value)
+    if validator_type is Enum:
+        item = _validate_scalar(validator._item_validator, value, path)
+        if item not in validator._restricted_to:
+            _fail(
+                value,
+                path,
+                "when expecting one of: {0}".format(", ".join(map(str, validator._restricted_to))),
+            )
+        return item
+    if validator_type is CommaSeparated:
+        if isinstance(value, str):
+            if value == "":
+                return []
+            value = [
+                value[start:end]
+                for start, end in utils.comma_separated_positions(value)
+            ]
+        _expect_sequence(value, path, "when expecting a comma separated list")
+        return [
+            _validate_scalar(validator._item_validator, item, path + (index,))
+            for index, item in enumerate(value)
+        ]
+
+    to_yaml = getattr(validator, "to_yaml", None)
+    if to_yaml is None:
+        text = value if isinstance(value, str) else str(value)
+    else:
+        try:
+            text = to_yaml(value)
+        except YAMLSerializationError:
+            _fail(
+                value,
+                path,
+                "when expecting {0}".format(
+                    SCALAR_DESCRIPTIONS.get(validator_type, validator.rule_description)
+                ),
+            )
+    return validator.validate_scalar(DataChunk(str(text), path))
+
+
+def _validate_map(validator, value, path):
+    _expect_mapping(value, path)
+    validator_dict = validator._validator_dict
+    is_combined = isinstance(validator, MapCombined)
+    result = {}
+    for key, item in value.items():
+        strict_key = _validate_scalar(validator.key_validator, key, path + (key,))
+        if key not in validator_dict and not is_combined:
+            _fail(
+                key,
+                path + (key,),
+                "while parsing a mapping",
+                "unexpected key not in schema '{0}'".format(str(key)),
+            )
+        result[strict_key] = validate_data(item, validator.get_validator(key), path + (key,))
+
+    for default_key, default_data in validator._defaults.items():
+        if default_key not in value:
+            result[default_key] = validate_data(
+                default_data,
+                validator.get_validator(default_key),
+                path + (default_key,),
+            )
+
+    missing = set(validator._required_keys).difference(value.keys())
+    if missing:
+        _fail(
+            value,
+            path,
+            "while parsing a mapping",
+            "required key(s) '{0}' not found".format("', '".join(sorted(missing))),
+        )
+    return result
+
+
+def _validate_map_pattern(validator, value, path):
+    _expect_mapping(value, path)
+    if validator._maximum_keys is not None and len(value) > validator._maximum_keys:
+        _fail(
+            value,
+            path,
+            "while parsing a mapping",
+            "expected a maximum of {0} key{1}, found {2}.".format(
+                validator._maximum_keys,
+                "s" if validator._maximum_keys > 1 else "",
+                len(value),
+            ),
+        )
+    if validator._minimum_keys is not None and len(value) < validator._minimum_keys:
+        _fail(
+            value,
+            path,
+            "while parsing a mapping",
+            "expected a minimum of {0} key{1}, found {2}.".format(
+                validator._minimum_keys,
+                "s" if validator._minimum_keys > 1 else "",
+                len(value),
+            ),
+        )
+    return {
+        _validate_scalar(validator._key_validator, key, path + (key,)): validate_data(
+            item, validator._value_validator, path + (key,)
+        )
+        for key, item in value.items()
+    }
+
+
+def _validate_keyed_choice_map(validator, value, path):
+    _expect_mapping(value, path)
+    result = {}
+    for key, item in value.items():
+        strict_key = _validate_scalar(validator.key_validator, key, path + (key,))
+        value_validator = validator._resolve_validator(strict_key)
+        if value_validator is None:
+            _fail(
+                key,
+                path + (key,),
+                "while parsing a mapping",
+                "unexpected key not in schema '{0}'".format(str(strict_key)),
+            )
+        result[strict_key] = validate_data(item, value_validator, path + (key,))
+
+    choice_key_count = validator._choice_key_count(result.keys())
+    if validator.minimum_keys is not None and choice_key_count < validator.minimum_keys:
+        _fail(
+            value,
+            path,
+            "while parsing a mapping",
+            "expected a minimum of {0} choice key{1}, found {2}.".format(
+                validator.minimum_keys,
+                "s" if validator.minimum_keys != 1 else "",
+                choice_key_count,
+            ),
+        )
+    if validator.maximum_keys is not None and choice_key_count > validator.maximum_keys:
+        _fail(
+            value,
+            path,
+            "while parsing a mapping",
+            "expected a maximum of {0} choice key{1}, found {2}.".format(
+                validator.maximum_keys,
+                "s" if validator.maximum_keys != 1 else "",
+                choice_key_count,
+            ),
+        )
+    return result
+
+
+def _validate_seq(validator, value, path):
+    _expect_sequence(value, path)
+    item_validator = validator._validator
+    return [
+        validate_data(item, item_validator, path + (index,))
+        for index, item in enumerate(value)
+    ]
+
+
+def _validate_fixed_seq(validator, value, path):
+    expecting = "when expecting a sequence of {0} elements".format(len(validator._validators))
+    _expect_sequence(value, path, expecting)
+    if len(validator._validators) != len(value):
+        _fail(value, path, expecting, "found a sequence of {0} elements".format(len(value)))
+    return [
+        validate_data(item, item_validator, path + (index,))
+        for index, (item, item_validator) in enumerate(zip(value, validator._validators))
+    ]
+
+
+def _validate_unique_seq(validator, value, path):
+    _expect_sequence(value, path, "when expecting a unique sequence")
+    existing_items = []
+    result = []
+    for index, item in enumerate(value):
+        if item in existing_items:
+            _fail(value, path, "while parsing a sequence", "duplicate found")
+        existing_items.append(item)
+        result.append(validate_data(item, validator._validator, path + (index,)))
+    return result
+
+
+def _validate_number_array(validator, value, path):
+    if not isinstance(value, list) and hasattr(value, "tolist"):
+        # An array.array or NumPy array, e.g. an earlier result.
+        value = value.tolist()
+    _expect_sequence(value, path)
+
+    def fail(index, expecting, found):
+        _fail(value, path if index is None else path + (index,), expecting, found)
+
+    validator._check_length(len(value), fail)
+    return validator._parse(
+        value,
+        lambda index, item: validate_data(item, validator._item, path + (index,)),
+        fail,
+    )
+
+
+def _validate_table(validator, value, path):
+    if validator._columnar and isinstance(value, dict):
+        # Columns, e.g. an earlier result.
+        value = validator._rows(value)
+    _expect_sequence(value, path)
+
+    def fail(location, expecting, found=None):
+        target = value
+        for part in location[:2]:
+            target = target[part]
+        _fail(target, path + tuple(location[:2]), expecting, found)
+
+    return validator._validate(
+        value,
+        lambda index, key, item_validator, cell: validate_data(cell, item_validator, path + (index, key)),
+        fail,
+        lambda index: validate_data(value[index], validator._map, path + (index,)),
+    )
+
+
+def _validate_or(validator, value, path):
+    try:
+        return validate_data(value, validator._validator_a, path)
+    except YAMLValidationError:
+        return validate_data(value, validator._validator_b, path)
+
+
+def _validate_any(validator, value, path):
+    return value
+
+
+def _validate_forward_ref(validator, value, path):
+    return validate_data(value, unpack(validator), path)
+
+
+def _project(contents, validator):
+    validator = unpack(validator)
+    if not isinstance(contents, dict):
+        return contents
+    if hasattr(validator, "_validator_dict"):
+        keys = validator._validator_dict.items()
+    else:
+        keys = [
+            (k.key if hasattr(k, "key") else k, v)
+            for k, v in validator._validator.items()
+        ]
+    projected = {}
+    for key, val in keys:
+        if key in contents:
+            projected[key] = _project(contents[key], val)
+    return projected
+
+
+def _control_contents(control, value, path):
+    source = control.source
+    if isinstance(source, str) and source != "":
+        source = (source,)
+    source = tuple(source) if source else ()
+    contents = value
+    for key in source:
+        if not isinstance(contents, dict) or key not in contents:
+            _fail(
+                contents,
+                path,
+                "while parsing a mapping",
+                "required key(s) '{0}' not found".format(key),
+            )
+        contents = contents[key]
+        path = path + (key,)
+
+    unpacked_validator = unpack(control._validator)
+    is_mapping_validator = (
+        hasattr(unpacked_validator, "_validator_dict")
+        or (
+            hasattr(unpacked_validator, "_validator")
+            and isinstance(unpacked_validator._validator, dict)
+        )
+    )
+    if is_mapping_validator:
+        contents = _project(contents, unpacked_validator)
+    return contents, path
+
+
+def _validate_control(control, value, path):
+    contents, path = _control_contents(control, value, path)
+    return validate_data(contents, control._validator, path)
+
+
+def _validate_dmap(validator, value, path):
+    _expect_mapping(value, path)
+
+    def validate_selected(true_case_block, true_overlay_blocks):
+        final_validator = validator._merged_validator(true_case_block, true_overlay_blocks)
+        validated = validate_data(value, final_validator, path)
+        return validated, validated
+
+    return validator._validate_node(
+        DataChunk(value, path),
+        value,
+        no_control if validator.control is None else lambda: _validate_control(validator.control, value, path),
+        validate_selected,
+    )
+
+
+VALIDATORS = {
+    ForwardRef: _validate_forward_ref,
+    DMap: _validate_dmap,
+    KeyedChoiceMap: _validate_keyed_choice_map,
+    Map: _validate_map,
+    MapCombined: _validate_map,
+    MapPattern: _validate_map_pattern,
+    Seq: _validate_seq,
+    FixedSeq: _validate_fixed_seq,
+    UniqueSeq: _validate_unique_seq,
+    NumberArray: _validate_number_array,
+    Table: _validate_table,
+    OrValidator: _validate_or,
+    Any: _validate_any,
+    ScalarValidator: _validate_scalar,
+}
+
+
+def _resolve(validator_type):
+    for cls in validator_type.__mro__:
+        if cls in VALIDATORS:
+            VALIDATORS[validator_type] = VALIDATORS[cls]
+            return VALIDATORS[cls]
+    raise YAMLSerializationError(
+        "validate_data does not support validator '{0}'".format(validator_type.__name__)
+    )
+
+
+def recording(selections, validate, *args):
+    state = DMap._local
+    previous = state.selections
+    state.selections = selections
+    try:
+        return validate(*args)
+    finally:
+        state.selections = previous
+
+
+def memoizing(validate, *args):
+    state = DMap._local
+    previous = state.memo
+    state.memo = _Memo()
+    try:
+        return validate(*args)
+    finally:
+        state.memo = previous
+
+
+def validate_data(data, schema, path=(), selections=None, memoize=False):
+    if selections is not None:
+        return recording(selections, validate_data, data, schema, path, None, memoize)
+    if memoize:
+        return memoizing(validate_data, data, schema, path)
+    validator_type = type(schema)
+    handler = VALIDATORS.get(validator_type) or _resolve(validator_type)
+    return handler(schema, data, path)
@@ -0,0 +1,181 @@
+import array
+import math
+import re
+
+from strictyaml.representation import YAML
+from strictyaml.ruamel.comments import CommentedSeq
+from strictyaml.scalar import Float, Int
+from strictyaml.validators import SeqValidator
+
+from .utils import _numpy
+
+FLOAT_TYPECODES = ("d", "f")
+INT_TYPECODES = ("q", "l", "i", "h", "b", "Q", "L", "I", "H", "B")
+
+# Numbers whose text float()/int() read exactly as Float()/Int() do. Anything
+# else (underscores, inf, nan, errors) goes through the item validator.
+_FLOAT = r"[-+]?(?:[0-9]+(?:\.[0-9]*)?|\.[0-9]+)(?:[eE][-+]?[0-9]+)?"
+_INT = r"[-+]?[0-9]+"
+PLAIN = {
+    Float: (re.compile(_FLOAT), re.compile("{0}(?:\n{0})*".format(_FLOAT)), float, frozenset((int, float))),
+    Int: (re.compile(_INT), re.compile("{0}(?:\n{0})*".format(_INT)), int, frozenset((int,))),
+}
+
+
+class NumberArray(SeqValidator):
+    # A sequence of numbers parsed and range-checked in one pass, and returned
+    # as one array.array (or a NumPy array sharing its buffer) instead of a
+    # YAML object per number.
+    def __init__(self, item=None, minimum=None, maximum=None, length=None, typecode=None, use_numpy=None):
+        item = Float() if item is None else item
+        assert type(item) in PLAIN, "item must be Float() or Int()"
+        typecodes = FLOAT_TYPECODES if type(item) is Float else INT_TYPECODES
+        typecode = typecodes[0] if typecode is None else typecode
+        assert typecode in typecodes, "typecode must be one of {0} for {1}".format(", ".join(typecodes), repr(item))
+        if isinstance(length, int):
+            length = (length, length)
+        assert length is None or len(length) == 2, "length must be a count or (minimum, maximum)"
+        assert minimum is None or maximum is None or minimum <= maximum, "minimum must be <= maximum"
+        # use_numpy=None returns a NumPy array when NumPy is installed.
+        assert use_numpy is not True or _numpy() is not None, "use_numpy=True needs NumPy"
+        self._item = item
+        self._minimum = minimum
+        self._maximum = maximum
+        self._length = length
+        self._typecode = typecode
+        self._use_numpy = use_numpy
+        self._number, self._numbers, self._convert, self._types = PLAIN[type(item)]
+
+    def _length_description(self):
+        low, high = self._length
+        if low == high:
+            return "when expecting a sequence of {0} numbers".format(low)
+        if high is None:
+            return "when expecting a sequence of at least {0} numbers".format(low)
+        if low is None:
+            return "when expecting a sequence of at most {0} numbers".format(high)
+        return "when expecting a sequence of {0} to {1} numbers".format(low, high)
+
+    def _range_description(self):
+        if self._maximum is None:
+            return "when expecting a number of at least {0}".format(self._minimum)
+        if self._minimum is None:
+            return "when expecting a number of at most {0}".format(self._maximum)
+        return "when expecting a number between {0} and {1}".format(self._minimum, self._maximum)
+
+    # fail(index, expecting, found) raises, on the item at index or, with
+    # None, on the sequence.
+    def _check_length(self, count, fail):
+        if self._length is None:
+            return
+        low, high = self._length
+        if (low is not None and count < low) or (high is not None and count > high):
+            fail(None, self._length_description(), "found a sequence of {0} elements".format(count))
+
+    def _collect(self, items, parse_item, fail):
+        values = array.array(self._typecode)
+        for index, item in enumerate(items):
+            value = parse_item(index, item)
+            try:
+                values.append(value)
+                # float32 stores finite values beyond its range as inf instead
+                # of raising.
+                fits = self._typecode != "f" or not math.isinf(values[-1]) or math.isinf(value)
+            except OverflowError:
+                fits = False
+            if not fits:
+                fail(
+                    index,
+                    "when expecting a number an array of typecode '{0}' can hold".format(self._typecode),
+                    "found {0}".format(value),
+                )
+        return values
+
+    def _accepts(self, value):
+        # False for NaN whenever there is a bound.
+        return (self._minimum is None or value >= self._minimum) and (
+            self._maximum is None or value <= self._maximum
+        )
+
+    def _in_range(self, result):
+        if isinstance(result, array.array):
+            if self._typecode in FLOAT_TYPECODES:
+                total = sum(result)
+                if total != total:
+                    return False
+            low, high = min(result), max(result)
+        else:
+            # NumPy's min and max are NaN when any value is.
+            low, high = result.min(), result.max()
+        return (self._minimum is None or low >= self._minimum) and (self._maximum is None or high <= self._maximum)
+
+    def _finish(self, values, fail):
+        numpy = _numpy() if self._use_numpy is not False else None
+        result = values if numpy is None else numpy.frombuffer(values, dtype=self._typecode)
+        if values and (self._minimum is not None or self._maximum is not None) and not self._in_range(result):
+            for index, value in enumerate(values):
+                if not self._accepts(value):
+                    fail(index, self._range_description(), "found {0}".format(value))
+        return result
+
+    def _fast(self, items):
+        # One type check, or one match, and one conversion for the whole
+        # sequence; None when some item needs a closer look.
+        try:
+            if set(map(type, items)) <= self._types:
+                values = array.array(self._typecode, items)
+            elif self._numbers.fullmatch("\n".join(items)):
+                values = array.array(self._typecode, map(self._convert, items))
+            else:
+                return None
+        except (TypeError, ValueError, OverflowError):
+            return None
+        if self._typecode == "f" and (math.inf in values or -math.inf in values):
+            # Possibly a value too large for float32.
+            return None
+        return values
+
+    def _read(self, index, item, parse_item):
+        # parse_item(index, item) validates one item with the item validator.
+        if isinstance(item, str) and self._number.fullmatch(item):
+            return self._convert(item)
+        return parse_item(index, item)
+
+    def _parse(self, items, parse_item, fail):
+        values = self._fast(items)
+        if values is None:
+            values = self._collect(items, lambda index, item: self._read(index, item, parse_item), fail)
+        return self._finish(values, fail)
+
+    def validate(self, chunk):
+        if not chunk.is_sequence():
+            chunk.expecting_but_found("when expecting a sequence")
+
+        def fail(index, expecting, found):
+            (chunk if index is None else chunk.index(index)).expecting_but_found(expecting, found)
+
+        items = chunk.contents
+        self._check_length(len(items), fail)
+        return self._parse(items, lambda index, item: self._item(chunk.index(index)).data, fail)
+
+    def __call__(self, chunk):
+        values = self.validate(chunk)
+        result = YAML(chunk, validator=self)
+        # The parsed tree keeps the text; the YAML object holds the array.
+        result._value = values
+        return result
+
+    def to_yaml(self, data):
+        if hasattr(data, "tolist"):
+            data = data.tolist()
+        self._should_be_list(data)
+        return CommentedSeq([self._item.to_yaml(item) for item in data])
+
+    def __repr__(self):
+        return "NumberArray({0}, minimum={1}, maximum={2}, length={3}, typecode={4})".format(
+            repr(self._item),
+            repr(self._minimum),
+            repr(self._maximum),
+            repr(self._length),
+            repr(self._typecode),
+        )
@@ -0,0 +1,173 @@
+import importlib
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    # Python 3.14+: each worker is an interpreter with its own GIL, in this process.
+    from concurrent.futures import InterpreterPoolExecutor
+except ImportError:
+    InterpreterPoolExecutor = None
+
+from strictyaml import Seq, load
+from strictyaml.exceptions import YAMLValidationError
+
+# Schema built by each worker process or interpreter, keyed by factory spec.
+# Interpreters import modules afresh, so each has its own, as it has its own
+# DMap._local validation state.
+_WORKER_SCHEMAS = {}
+
+
+class ParallelValidationError(YAMLValidationError):
+    # A worker's validation error re-raised in the parent. The chunk it refers to
+    # (and the validators reachable from it) cannot cross the process boundary,
+    # so the marks are rendered in the worker and carried over as they are.
+    def __init__(self, context, problem, context_mark, problem_mark):
+        self.context = context
+        self.problem = problem
+        self._chunk = None
+        self._context_mark = context_mark
+        self._problem_mark = problem_mark
+        self.note = None
+
+    @property
+    def context_mark(self):
+        return self._context_mark
+
+    @property
+    def problem_mark(self):
+        return self._problem_mark
+
+
+def factory_spec(factory):
+    if isinstance(factory, str):
+        assert ":" in factory, "factory must be 'module:function' or an importable function"
+        return factory
+    qualname = getattr(factory, "__qualname__", "")
+    assert callable(factory) and "<" not in qualname, (
+        "factory must be 'module:function' or an importable function"
+    )
+    return "{0}:{1}".format(factory.__module__, qualname)
+
+
+def resolve_factory(spec):
+    module_name, _, attribute = spec.partition(":")
+    factory = importlib.import_module(module_name)
+    for part in attribute.split("."):
+        factory = getattr(factory, part)
+    return factory
+
+
+def schema_for(spec):
+    if spec not in _WORKER_SCHEMAS:
+        schema = resolve_factory(spec)()
+        assert type(schema) is Seq, "parallel validation needs a factory returning a top-level Seq"
+        _WORKER_SCHEMAS[spec] = schema
+    return _WORKER_SCHEMAS[spec]
+
+
+def is_item_start(line):
+    return line == "-" or line.startswith("- ") or line.startswith("-\t")
+
+
+def split_items(yaml_string):
+    # Returns (prefix line count, [(first line, item text)]) for a top-level block
+    # sequence, or None if the document is not one. An item starts at a "-" in
+    # column 0; everything up to the next one (comments included) belongs to it.
+    lines = yaml_string.splitlines(True)
+    items = []
+    start = None
+    for number, line in enumerate(lines):
+        stripped = line.rstrip("\r\n")
+        if is_item_start(stripped):
+            if start is not None:
+                items.append((start, "".join(lines[start:number])))
+            start = number
+        elif start is None:
+            if stripped.strip() and not stripped.startswith("#") and stripped != "---":
+                return None
+        elif stripped == "..." or stripped.startswith("---"):
+            return None
+        elif stripped and not stripped[0].isspace() and not stripped.startswith("#"):
+            return None
+    if start is None:
+        return None
+    items.append((start, "".join(lines[start:])))
+    return items
+
+
+def validate_chunk(spec, header, first_line, text, label):
+    # The document's own header (comments, "---") followed by blank lines keeps
+    # the line numbers in error marks the same as for the whole document.
+    padding = "\n" * (first_line - len(header.splitlines()))
+    try:
+        return True, load(header + padding + text, schema_for(spec), label=label).data
+    except YAMLValidationError as error:
+        return False, (error.context, error.problem, error.context_mark, error.problem_mark)
+
+
+def validate_serial(yaml_string, spec, label):
+    return load(yaml_string, schema_for(spec), label=label).data
+
+
+def make_executor(backend, workers):
+    if backend == "interpreter":
+        # A new interpreter starts from the default sys.path; the parent's makes
+        # strictyamlx and the factory's module importable there as they are here.
+        # exec is a builtin, so it can be sent before anything is imported; it
+        # gets its own globals, as it may run without a calling frame.
+        return InterpreterPoolExecutor(
+            max_workers=workers,
+            initializer=exec,
+            initargs=("import sys\nsys.path[:] = {0!r}".format(sys.path), {}),
+        )
+    return ProcessPoolExecutor(max_workers=workers)
+
+
+def validate_parallel(
+    yaml_string,
+    factory,
+    workers=None,
+    chunk_size=None,
+    label="<unicode string>",
+    min_items=1000,
+    executor=None,
+    backend="process",
+):
+    assert backend in ("process", "interpreter"), "backend must be 'process' or 'interpreter'"
+    assert backend == "process" or InterpreterPoolExecutor is not None, (
+        "backend='interpreter' needs concurrent.futures.InterpreterPoolExecutor (Python 3.14+)"
+    )
+    spec = factory_spec(factory)
+    items = split_items(yaml_string)
+    if items is None or len(items) < min_items or workers == 1:
+        return validate_serial(yaml_string, spec, label)
+
+    workers = workers or os.cpu_count() or 1
+    if chunk_size is None:
+        # A few chunks per worker keeps them busy when item sizes vary.
+        chunk_size = max(1, -(-len(items) // (workers * 4)))
+    chunks = [items[start:start + chunk_size] for start in range(0, len(items), chunk_size)]
+    header = "".join(yaml_string.splitlines(True)[:items[0][0]])
+    arguments = [
+        (spec, header, chunk[0][0], "".join(text for _, text in chunk), label)
+        for chunk in chunks
+    ]
+
+    owns_executor = executor is None
+    if owns_executor:
+        executor = make_executor(backend, workers)
+    try:
+        futures = [executor.submit(validate_chunk, *args) for args in arguments]
+        result = []
+        # Waiting in document order re-raises the error serial validation would
+        # have raised first.
+        for future in futures:
+            ok, value = future.result()
+            if not ok:
+                raise ParallelValidationError(*value)
+            result.extend(value)
+        return result
+    finally:
+        if owns_executor:
+            executor.shutdown(cancel_futures=True)
@@ -0,0 +1,189 @@
+import threading
+import time
+
+from .blocks import Case, Overlay
+from .dmap import DMap
+from .utils import unpack
+
+
+def callback_location(callback):
+    code = getattr(callback, "__code__", None)
+    if code is None:
+        code = getattr(getattr(callback, "__call__", None), "__code__", None)
+    if code is None:
+        return "<unknown>"
+    return "{0}:{1}".format(code.co_filename, code.co_firstlineno)
+
+
+def callback_name(callback):
+    return getattr(callback, "__qualname__", None) or type(callback).__name__
+
+
+def dmap_label(dmap):
+    if dmap.control is None:
+        return "DMap[no control]"
+    validator = unpack(dmap.control._validator)
+    keys = getattr(validator, "_validator_dict", None)
+    if keys is None:
+        return "DMap[{0}]".format(repr(validator))
+    return "DMap[{0}]".format(", ".join(sorted(str(key) for key in keys)))
+
+
+def block_label(dmap, block):
+    if block is None:
+        return dmap_label(dmap)
+    kind = "Case" if isinstance(block, Case) else "Overlay" if isinstance(block, Overlay) else "Block"
+    return "{0} {1} of {2}".format(kind, dmap.blocks.index(block), dmap_label(dmap))
+
+
+class CallbackStats:
+    __slots__ = ("kind", "callback", "owner", "calls", "total", "max")
+
+    def __init__(self, kind, callback, owner):
+        self.kind = kind
+        self.callback = callback
+        self.owner = owner
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    @property
+    def location(self):
+        return callback_location(self.callback)
+
+    @property
+    def name(self):
+        return callback_name(self.callback)
+
+    @property
+    def mean(self):
+        return self.total / self.calls if self.calls else 0.0
+
+    def __repr__(self):
+        return "CallbackStats({0} {1} at {2}, calls={3}, total={4:.6f})".format(
+            self.kind,
+            self.name,
+            self.location,
+            self.calls,
+            self.total,
+        )
+
+
+class CallbackProfiler:
+    SORT_KEYS = {
+        "total": lambda stats: stats.total,
+        "calls": lambda stats: stats.calls,
+        "max": lambda stats: stats.max,
+        "mean": lambda stats: stats.mean,
+    }
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self._stats = {}
+        self._callers = {}
+        self._lock = threading.Lock()
+        self._previous = None
+
+    def start(self):
+        assert DMap._profiler is not self, "profiler is already active"
+        self._previous = DMap._profiler
+        DMap._profiler = self
+        return self
+
+    def stop(self):
+        assert DMap._profiler is self, "profiler is not active"
+        DMap._profiler = self._previous
+        self._previous = None
+        # Timed callers keep their DMaps alive; the collected stats do not need them.
+        self._callers = {}
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _timed(self, kind, callback, owner, caller):
+        dmap, block = owner
+        # Copies made by ValidatorBuilder share blocks and constraint lists, so
+        # they report into the same row as the DMap they were copied from.
+        key = (kind, id(callback), id(block) if block is not None else id(dmap.constraints))
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = CallbackStats(kind, callback, block_label(*owner))
+        clock = self.clock
+        lock = self._lock
+
+        def timed(*args):
+            started = clock()
+            try:
+                return caller(*args)
+            finally:
+                elapsed = clock() - started
+                with lock:
+                    stats.calls += 1
+                    stats.total += elapsed
+                    if elapsed > stats.max:
+                        stats.max = elapsed
+
+        return timed
+
+    def callers_for(self, dmap):
+        cached = self._callers.get(id(dmap))
+        if cached is not None and cached[0] is dmap:
+            return cached[1]
+
+        when_callers = {}
+        for block, caller in dmap._when_callers.items():
+            if callable(block.when):
+                caller = self._timed("when", block.when, (dmap, block), caller)
+            when_callers[block] = caller
+        constraint_callers = {}
+        for owner, callers in dmap._constraint_callers.items():
+            constraints = dmap.constraints if owner is None else owner.constraints
+            constraint_callers[owner] = [
+                self._timed("constraint", constraint, (dmap, owner), caller)
+                if callable(constraint)
+                else caller
+                for constraint, caller in zip(constraints or [], callers)
+            ]
+        callers = (when_callers, constraint_callers)
+        self._callers[id(dmap)] = (dmap, callers)
+        return callers
+
+    def stats(self, sort="total"):
+        assert sort in self.SORT_KEYS, "sort must be one of: {0}".format(", ".join(sorted(self.SORT_KEYS)))
+        with self._lock:
+            rows = list(self._stats.values())
+        return sorted(rows, key=self.SORT_KEYS[sort], reverse=True)
+
+    def report(self, sort="total", limit=None):
+        rows = self.stats(sort)[:limit]
+        lines = [
+            "{0:>8} {1:>11} {2:>11} {3:>11}  {4:<10} {5:<30} {6}".format(
+                "calls", "total ms", "mean us", "max us", "kind", "owner", "callback"
+            )
+        ]
+        for stats in rows:
+            lines.append(
+                "{0:>8} {1:>11.3f} {2:>11.2f} {3:>11.2f}  {4:<10} {5:<30} {6} ({7})".format(
+                    stats.calls,
+                    stats.total * 1e3,
+                    stats.mean * 1e6,
+                    stats.max * 1e6,
+                    stats.kind,
+                    stats.owner,
+                    stats.name,
+                    stats.location,
+                )
+            )
+        return "\n".join(lines)
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+
+
+def profile_callbacks(clock=time.perf_counter):
+    return CallbackProfiler(clock=clock)
@@ -0,0 +1,172 @@
+import itertools
+
+from strictyaml import Enum, load
+from strictyaml.exceptions import InvalidValidatorError, YAMLValidationError
+from strictyaml.yamllocation import YAMLChunk
+
+from .dmap import DMap
+from .document import ParsedDocument, parse
+from .native import DataChunk, validate_data
+from .scanner import scan_keys
+from .utils import unpack
+
+_MISSING = object()
+
+
+def _text(value):
+    # YAML reads every scalar as text, so index keys are text too; `2` in plain
+    # data and `2` in YAML find the same schema.
+    return value if isinstance(value, str) else str(value)
+
+
+def _lookup(contents, path):
+    for key in path:
+        if not isinstance(contents, dict) or key not in contents:
+            return _MISSING
+        contents = contents[key]
+    return contents
+
+
+class SchemaRegistry:
+    # Top-level DMap schemas indexed by the values of a few discriminator keys,
+    # e.g. (apiVersion, kind). Each combination of values belongs to exactly one
+    # schema; a registration that would share one is rejected when it is made.
+    def __init__(self, keys):
+        keys = [(key,) if isinstance(key, str) else tuple(key) for key in keys]
+        assert keys, "a registry needs at least one discriminator key"
+        self.keys = tuple(keys)
+        self.schemas = []
+        self._index = {}
+        # Only the discriminator keys are read before the schema is known.
+        self._wanted = {}
+        for path in self.keys:
+            tree = self._wanted
+            for key in path[:-1]:
+                tree = tree.setdefault(key, {})
+            tree[path[-1]] = True
+
+    def _name(self, path):
+        return ".".join(path)
+
+    def _describe(self, values):
+        return ", ".join(
+            "{0} {1}".format(self._name(path), "missing" if value is _MISSING else repr(value))
+            for path, value in zip(self.keys, values)
+        )
+
+    def _control_validator(self, control, path):
+        # The validator the Control applies to the key at `path`, or None when
+        # the Control does not read that key.
+        source = control.source
+        if isinstance(source, str) and source != "":
+            source = (source,)
+        source = tuple(source) if source else ()
+        if path[: len(source)] != source:
+            return None
+        validator = unpack(control._validator)
+        for key in path[len(source):]:
+            validator_dict = getattr(validator, "_validator_dict", None)
+            if validator_dict is None or key not in validator_dict:
+                return None
+            validator = unpack(validator_dict[key])
+        return validator
+
+    def _accepted(self, schema, values):
+        validators = [self._control_validator(schema.control, path) for path in self.keys]
+        if values is None:
+            choices = []
+            for path, validator in zip(self.keys, validators):
+                if not isinstance(validator, Enum):
+                    raise InvalidValidatorError(
+                        "cannot derive the values of '{0}' from {1}; its Control must read it with an "
+                        "Enum, or pass values= explicitly".format(self._name(path), repr(schema.control))
+                    )
+                choices.append(validator._restricted_to)
+            return [tuple(_text(value) for value in combination) for combination in itertools.product(*choices)]
+
+        accepted = []
+        for combination in values:
+            if len(self.keys) == 1 and (isinstance(combination, str) or not isinstance(combination, tuple)):
+                combination = (combination,)
+            assert len(combination) == len(self.keys), "each value must have one item per discriminator key"
+            for path, validator, value in zip(self.keys, validators, combination):
+                if validator is None:
+                    continue
+                try:
+                    validate_data(value, validator)
+                except YAMLValidationError:
+                    raise InvalidValidatorError(
+                        "{0} does not accept {1} {2}".format(repr(schema.control), self._name(path), repr(value))
+                    )
+            accepted.append(tuple(_text(value) for value in combination))
+        return accepted
+
+    def register(self, schema, values=None):
+        # values: the discriminator values the schema is for, one tuple per
+        # combination (or plain values with a single key). By default they are
+        # read from the Enums its Control validates the keys with.
+        assert isinstance(schema, DMap) and schema.control is not None, "only a DMap with a Control can be registered"
+        accepted = self._accepted(schema, values)
+        for key in accepted:
+            other = self._index.get(key)
+            if other is not None:
+                raise InvalidValidatorError(
+                    "ambiguous registration: {0} is already registered for {1}".format(
+                        self._describe(key), repr(other)
+                    )
+                )
+        if len(set(accepted)) != len(accepted):
+            raise InvalidValidatorError("ambiguous registration: values are listed more than once")
+        for key in accepted:
+            self._index[key] = schema
+        self.schemas.append(schema)
+        return schema
+
+    def _values(self, contents):
+        values = []
+        for path in self.keys:
+            value = _lookup(contents, path)
+            values.append(value if value is _MISSING or isinstance(value, (dict, list)) else _text(value))
+        return tuple(values)
+
+    def _find(self, values, chunk):
+        try:
+            schema = self._index.get(values)
+        except TypeError:
+            schema = None
+        if schema is None:
+            chunk().expecting_but_found(
+                "when selecting a schema",
+                "found no schema registered for {0}".format(self._describe(values)),
+            )
+        return schema
+
+    def schema_for(self, document, label="<unicode string>"):
+        # YAML text is only parsed as far as the discriminator keys.
+        if isinstance(document, str):
+            values = self._values(scan_keys(document, self._wanted, label=label))
+            return self._find(values, lambda: YAMLChunk(parse(document, label).contents, label=label))
+        if isinstance(document, ParsedDocument):
+            return self._find(
+                self._values(document.contents),
+                lambda: YAMLChunk(document.contents, label=document.label),
+            )
+        return self._find(self._values(document), lambda: DataChunk(document))
+
+    def validate(self, document, label="<unicode string>"):
+        # Like load/ParsedDocument.validate/validate_data with the one schema
+        # registered for the document's discriminator values.
+        schema = self.schema_for(document, label)
+        if isinstance(document, str):
+            return load(document, schema, label=label)
+        if isinstance(document, ParsedDocument):
+            return document.validate(schema)
+        return validate_data(document, schema)
+
+    def __len__(self):
+        return len(self.schemas)
+
+    def __repr__(self):
+        return "SchemaRegistry({0}, schemas={1})".format(
+            repr([self._name(path) for path in self.keys]), len(self.schemas)
+        )
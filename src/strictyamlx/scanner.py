@@ -0,0 +1,182 @@
+from strictyaml import ruamel as ruamelyaml
+from strictyaml.parser import StrictYAMLLoader
+from strictyaml.validators import MapValidator
+from strictyaml.yamllocation import YAMLChunk
+from strictyaml.ruamel.comments import CommentedMap, CommentedSeq
+from strictyaml.ruamel.events import (
+    MappingStartEvent,
+    MappingEndEvent,
+    SequenceStartEvent,
+    SequenceEndEvent,
+    ScalarEvent,
+    CollectionStartEvent,
+)
+from strictyaml import utils
+from .control import Control
+from .utils import unpack
+
+
+class _ScanComplete(Exception):
+    pass
+
+
+def _is_mapping_validator(validator):
+    return hasattr(validator, "_validator_dict") or (
+        hasattr(validator, "_validator") and isinstance(validator._validator, dict)
+    )
+
+
+def control_keys(control):
+    # Nested dict of the keys a Control reads; True marks a value captured whole.
+    validator = unpack(control._validator)
+
+    def key_tree(validator):
+        if hasattr(validator, "_validator_dict"):
+            items = validator._validator_dict.items()
+        else:
+            items = [(k.key if hasattr(k, "key") else k, v) for k, v in validator._validator.items()]
+        tree = {}
+        for key, val in items:
+            val = unpack(val)
+            if isinstance(val, MapValidator) and _is_mapping_validator(val):
+                tree[key] = key_tree(val)
+            else:
+                tree[key] = True
+        return tree
+
+    tree = key_tree(validator) if _is_mapping_validator(validator) else True
+    source = control.source
+    if isinstance(source, str) and source != "":
+        source = (source,)
+    for key in reversed(tuple(source or ())):
+        tree = {key: tree}
+    return tree
+
+
+def _count_leaves(tree):
+    if tree is True:
+        return 1
+    return sum(_count_leaves(subtree) for subtree in tree.values())
+
+
+class _Scanner:
+    def __init__(self, events, wanted):
+        self._events = iter(events)
+        self._remaining = _count_leaves(wanted)
+        self.wanted = wanted
+
+    def next_event(self):
+        return next(self._events)
+
+    def document_start(self):
+        for event in self._events:
+            if isinstance(event, CollectionStartEvent) or isinstance(event, ScalarEvent):
+                return event
+        return None
+
+    def skip(self, event):
+        if not isinstance(event, CollectionStartEvent):
+            return
+        depth = 1
+        while depth:
+            event = self.next_event()
+            if isinstance(event, CollectionStartEvent):
+                depth += 1
+            elif isinstance(event, (MappingEndEvent, SequenceEndEvent)):
+                depth -= 1
+
+    def capture(self, event):
+        if isinstance(event, MappingStartEvent):
+            mapping = CommentedMap()
+            while True:
+                key_event = self.next_event()
+                if isinstance(key_event, MappingEndEvent):
+                    return mapping
+                mapping[key_event.value] = self.capture(self.next_event())
+        if isinstance(event, SequenceStartEvent):
+            sequence = CommentedSeq()
+            while True:
+                item_event = self.next_event()
+                if isinstance(item_event, SequenceEndEvent):
+                    return sequence
+                sequence.append(self.capture(item_event))
+        return event.value
+
+    def found_leaf(self):
+        self._remaining -= 1
+        if self._remaining == 0:
+            raise _ScanComplete()
+
+    def mapping(self, wanted, found):
+        while True:
+            key_event = self.next_event()
+            if isinstance(key_event, MappingEndEvent):
+                return found
+            value_event = self.next_event()
+            subtree = wanted.get(key_event.value)
+            if subtree is None:
+                self.skip(value_event)
+            elif subtree is True or not isinstance(value_event, MappingStartEvent):
+                found[key_event.value] = self.capture(value_event)
+                if subtree is True:
+                    self.found_leaf()
+                else:
+                    self._remaining_without(subtree)
+            else:
+                found[key_event.value] = CommentedMap()
+                self.mapping(subtree, found[key_event.value])
+
+    def _remaining_without(self, subtree):
+        # A nested key schema met a scalar or sequence; nothing below it can be found.
+        for _ in range(_count_leaves(subtree)):
+            self.found_leaf()
+
+
+def _events(yaml_string, label):
+    if not utils.is_string(yaml_string):
+        return yaml_string
+    DynamicStrictYAMLLoader = type(
+        "DynamicStrictYAMLLoader",
+        (StrictYAMLLoader,),
+        {"label": label, "allow_flow_style": False},
+    )
+    return ruamelyaml.parse(yaml_string, Loader=DynamicStrictYAMLLoader)
+
+
+def scan_keys(yaml_string, wanted, label="<unicode string>"):
+    document = CommentedMap()
+    events = _events(yaml_string, label)
+    scanner = _Scanner(events, wanted)
+    try:
+        first = scanner.document_start()
+        if first is None:
+            return ""
+        if wanted is True or not isinstance(first, MappingStartEvent):
+            return scanner.capture(first)
+        scanner.mapping(wanted, document)
+    except _ScanComplete:
+        pass
+    finally:
+        if events is not yaml_string:
+            # Stops the ruamel parser without reading the rest of the text.
+            events.close()
+    return document
+
+
+def prescan(yaml_string, control, label="<unicode string>"):
+    if not isinstance(control, Control):
+        control = control.control
+    assert control is not None, "prescan needs a DMap with a Control"
+    wanted = control_keys(control)
+    document = scan_keys(yaml_string, wanted, label=label)
+    chunk = YAMLChunk(document, label=label)
+    if wanted is not True:
+        # Keys are only read from a mapping; load() fails the same way.
+        chunk.expect_mapping()
+    if control.source:
+        contents = document
+        for key in (control.source,) if isinstance(control.source, str) else control.source:
+            if not isinstance(contents, CommentedMap) or key not in contents:
+                chunk.while_parsing_found("a mapping", "required key(s) '{0}' not found".format(key))
+            contents = contents[key]
+    return control.validate(chunk).data
@@ -0,0 +1,33 @@
+from strictyaml.representation import YAML
+
+
+def selection_of(node):
+    return getattr(node, "_selection", None)
+
+
+def selection_at(document, path):
+    node = document
+    for part in path:
+        node = node[part]
+    return selection_of(node)
+
+
+def selections(document):
+    found = {}
+
+    def walk(node, path):
+        if not isinstance(node, YAML):
+            return
+        selection = selection_of(node)
+        if selection is not None:
+            found[path] = selection
+        value = node._value
+        if isinstance(value, dict):
+            for key, item in value.items():
+                walk(item, path + (key.data if isinstance(key, YAML) else key,))
+        elif isinstance(value, list):
+            for index, item in enumerate(value):
+                walk(item, path + (index,))
+
+    walk(document, ())
+    return found
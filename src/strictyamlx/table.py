@@ -0,0 +1,214 @@
+import array
+
+from strictyaml import Map
+from strictyaml.exceptions import YAMLValidationError
+from strictyaml.representation import YAML
+from strictyaml.ruamel.comments import CommentedSeq
+from strictyaml.scalar import Enum, Float, Int, Str
+from strictyaml.validators import SeqValidator
+
+from .number_array import NumberArray
+from .utils import _numpy
+
+
+def _is_text(cells):
+    return all(issubclass(cell_type, str) for cell_type in set(map(type, cells)))
+
+
+def _generic_column(table, key, validator, cells, parse_cell):
+    return [parse_cell(index, cell) for index, cell in enumerate(cells)]
+
+
+def _str_column(table, key, validator, cells, parse_cell):
+    if _is_text(cells):
+        return cells
+    return _generic_column(table, key, validator, cells, parse_cell)
+
+
+def _enum_column(table, key, validator, cells, parse_cell):
+    if type(validator._item_validator) is Str and _is_text(cells) and set(cells) <= set(validator._restricted_to):
+        return cells
+    return _generic_column(table, key, validator, cells, parse_cell)
+
+
+def _number_column(table, key, validator, cells, parse_cell):
+    # An array.array when the column parses in one go, otherwise (underscores,
+    # inf, integers too large for 64 bits, errors) a list.
+    number = table._numbers[key]
+    values = number._fast(cells)
+    if values is None:
+        return [number._read(index, cell, parse_cell) for index, cell in enumerate(cells)]
+    return values
+
+
+# Validators whose whole column can be checked at once. Subclasses may read
+# text differently, so the type has to match exactly.
+COLUMNS = {
+    Str: _str_column,
+    Enum: _enum_column,
+    Int: _number_column,
+    Float: _number_column,
+}
+
+
+class Table(SeqValidator):
+    # A sequence of mappings with the same keys, such as routes or users. Each
+    # row's key set is checked once, then each column is validated as a whole,
+    # and the result is plain data: a list of dicts or, with columnar=True, a
+    # dict of columns.
+    def __init__(self, columns, columnar=False, use_numpy=None):
+        assert isinstance(columns, dict) and columns, "columns must be a non-empty dict of key: validator"
+        # use_numpy=None makes Int and Float columns NumPy arrays, when columnar
+        # and NumPy is installed.
+        assert use_numpy is not True or _numpy() is not None, "use_numpy=True needs NumPy"
+        # Keys, Optional keys and defaults mean what they mean in Map.
+        self._map = Map(columns)
+        self._columns = self._map._validator_dict
+        self._keys = frozenset(self._columns)
+        self._required = frozenset(self._map._required_keys)
+        self._columnar = columnar
+        self._use_numpy = use_numpy
+        self._numbers = {
+            key: NumberArray(validator, use_numpy=False)
+            for key, validator in self._columns.items()
+            if type(validator) in (Int, Float)
+        }
+
+    # fail(location, expecting, found=None) raises on the sequence for (), the
+    # row for (index,), a value for (index, key) and a key for (index, key, True).
+    def _check_row(self, index, row, fail):
+        if not isinstance(row, dict):
+            fail((index,), "when expecting a mapping")
+        keys = row.keys()
+        if keys == self._keys:
+            return True
+        for key in row:
+            if key not in self._columns:
+                fail((index, key, True), "while parsing a mapping", "unexpected key not in schema '{0}'".format(key))
+        missing = self._required - keys
+        if missing:
+            fail(
+                (index,),
+                "while parsing a mapping",
+                "required key(s) '{0}' not found".format("', '".join(sorted(missing))),
+            )
+        return False
+
+    def _default(self, key):
+        from .native import validate_data
+
+        return validate_data(self._map._defaults[key], self._columns[key])
+
+    def _column_result(self, key, values):
+        if key in self._numbers and not isinstance(values, array.array):
+            try:
+                values = array.array(self._numbers[key]._typecode, values)
+            except OverflowError:
+                return values
+        numpy = _numpy() if isinstance(values, array.array) and self._use_numpy is not False else None
+        return values if numpy is None else numpy.frombuffer(values, dtype=values.typecode)
+
+    def _validate(self, rows, parse_cell, fail, validate_row):
+        # validate_row(index) validates one row with the row Map, as
+        # Seq(Map(...)) would.
+        try:
+            return self._validate_columns(rows, parse_cell, fail)
+        except YAMLValidationError:
+            # Key sets, then columns, are checked before rows, so the error
+            # may not be the first in the document; report the one Seq(Map(...))
+            # reports.
+            for index in range(len(rows)):
+                validate_row(index)
+            raise
+
+    def _validate_columns(self, rows, parse_cell, fail):
+        # parse_cell(index, key, validator, cell) validates one value the usual
+        # way; each column is validated in one go where it can be.
+        partial = [index for index, row in enumerate(rows) if not self._check_row(index, row, fail)]
+        count = len(rows)
+        columns = {}
+        for key, validator in self._columns.items():
+            if partial and key not in self._required:
+                positions = [index for index, row in enumerate(rows) if key in row]
+            else:
+                positions = range(count)
+            values = COLUMNS.get(type(validator), _generic_column)(
+                self,
+                key,
+                validator,
+                [rows[index][key] for index in positions],
+                lambda position, cell: parse_cell(positions[position], key, validator, cell),
+            )
+            columns[key] = (positions, values)
+
+        if self._columnar:
+            result = {}
+            for key, (positions, values) in columns.items():
+                if len(positions) == count:
+                    result[key] = self._column_result(key, values)
+                    continue
+                # Rows without an Optional key get its default, or None.
+                full = [self._default(key) if key in self._map._defaults else None] * count
+                for position, index in enumerate(positions):
+                    full[index] = values[position]
+                result[key] = full if None in full else self._column_result(key, full)
+            return result
+
+        if not partial:
+            lists = [values.tolist() if isinstance(values, array.array) else values for _, values in columns.values()]
+            return [dict(zip(columns, row)) for row in zip(*lists)]
+        result = [{} for _ in range(count)]
+        for key, (positions, values) in columns.items():
+            for position, index in enumerate(positions):
+                result[index][key] = values[position]
+            if len(positions) != count and key in self._map._defaults:
+                default = self._default(key)
+                for row in result:
+                    row.setdefault(key, default)
+        return result
+
+    def validate(self, chunk):
+        if not chunk.is_sequence():
+            chunk.expecting_but_found("when expecting a sequence")
+
+        def fail(location, expecting, found=None):
+            target = chunk
+            if location:
+                target = target.index(location[0])
+            if len(location) == 3:
+                target = target.key(location[1], location[1])
+            elif len(location) == 2:
+                target = target.val(location[1])
+            target.expecting_but_found(expecting, found)
+
+        return self._validate(
+            chunk.contents,
+            lambda index, key, validator, cell: validator(chunk.index(index).val(key)).data,
+            fail,
+            lambda index: self._map(chunk.index(index)),
+        )
+
+    def __call__(self, chunk):
+        values = self.validate(chunk)
+        result = YAML(chunk, validator=self)
+        # The parsed tree keeps the text; the YAML object holds the plain data.
+        result._value = values
+        return result
+
+    def _rows(self, columns):
+        # Columns, as returned with columnar=True, back to rows; None stands for
+        # a missing Optional value.
+        columns = {key: values.tolist() if hasattr(values, "tolist") else values for key, values in columns.items()}
+        return [
+            {key: value for key, value in zip(columns, row) if value is not None or key in self._required}
+            for row in zip(*columns.values())
+        ]
+
+    def to_yaml(self, data):
+        if isinstance(data, dict):
+            data = self._rows(data)
+        self._should_be_list(data)
+        return CommentedSeq([self._map.to_yaml(row) for row in data])
+
+    def __repr__(self):
+        return "Table({0}, columnar={1})".format(repr(self._map._validator), repr(self._columnar))
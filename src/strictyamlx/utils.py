@@ -15,3 +15,15 @@ def ensure_validator_dict(validator):
     if isinstance(validator, MapPattern):
         return MapCombined({}, validator._key_validator, validator._value_validator)
     return validator
+
+_NUMPY = []
+
+def _numpy():
+    # NumPy is optional; None when it is not installed.
+    if not _NUMPY:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _NUMPY.append(numpy)
+    return _NUMPY[0]
@@ -0,0 +1,448 @@
+import fnmatch
+import hashlib
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from types import MappingProxyType
+
+from strictyaml import Validator, load
+
+# inotify(7) event bits.
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+INOTIFY_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+)
+INOTIFY_EVENT = struct.Struct("iIII")
+
+
+class Snapshot:
+    # Published as a whole and never changed afterwards, so readers holding one
+    # always see the documents of a single reload.
+    __slots__ = ("version", "documents", "errors", "published_at")
+
+    def __init__(self, version, documents, errors, published_at):
+        self.version = version
+        self.documents = MappingProxyType(documents)
+        self.errors = MappingProxyType(errors)
+        self.published_at = published_at
+
+    def __getitem__(self, path):
+        return self.documents[path]
+
+    def __contains__(self, path):
+        return path in self.documents
+
+    def __len__(self):
+        return len(self.documents)
+
+    def __repr__(self):
+        return "Snapshot(version={0}, documents={1}, errors={2})".format(
+            self.version, len(self.documents), len(self.errors)
+        )
+
+
+class WatcherMetrics:
+    def __init__(self):
+        self.reloads = 0
+        self.checked = 0
+        self.unchanged = 0
+        self.revalidated = 0
+        self.failed = 0
+        self.removed = 0
+        self.errors = 0
+        self.last_latency = None
+        self.max_latency = 0.0
+        self.total_latency = 0.0
+        self.last_duration = None
+
+    @property
+    def mean_latency(self):
+        return self.total_latency / self.reloads if self.reloads else 0.0
+
+    def __repr__(self):
+        return (
+            "WatcherMetrics(reloads={0}, checked={1}, unchanged={2}, revalidated={3}, "
+            "failed={4}, removed={5}, errors={6}, mean_latency={7:.6f})"
+        ).format(
+            self.reloads,
+            self.checked,
+            self.unchanged,
+            self.revalidated,
+            self.failed,
+            self.removed,
+            self.errors,
+            self.mean_latency,
+        )
+
+
+class _FileState:
+    __slots__ = ("stat", "digest")
+
+    def __init__(self, stat, digest):
+        self.stat = stat
+        self.digest = digest
+
+
+def stat_key(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class PollBackend:
+    # Reports the files whose (mtime, size) moved since the previous poll, so a
+    # burst of writes stops showing up once it is over.
+    def __init__(self, watcher):
+        self.watcher = watcher
+        self._seen = {path: state.stat for path, state in watcher._files.items()}
+
+    def changes(self, timeout):
+        if self.watcher._stopping.wait(timeout):
+            return set()
+        current = {path: stat_key(path) for path in self.watcher._paths()}
+        changed = {path for path, key in current.items() if self._seen.get(path) != key}
+        changed.update(path for path in self._seen if path not in current)
+        self._seen = current
+        return changed
+
+    def close(self):
+        pass
+
+
+class InotifyBackend:
+    # Linux inotify through ctypes. Events only name candidates; the watcher
+    # still confirms each one by stat and content hash.
+    def __init__(self, watcher):
+        import ctypes
+        import ctypes.util
+
+        self.watcher = watcher
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._directories = {}
+        self._watched = set()
+        for directory in watcher._directories():
+            self.add(directory)
+
+    def add(self, directory):
+        if directory in self._watched:
+            return
+        descriptor = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), INOTIFY_MASK)
+        if descriptor >= 0:
+            self._directories[descriptor] = directory
+            self._watched.add(directory)
+
+    def forget(self, descriptor):
+        # The watch is gone, so a directory created later at the same path is
+        # watched afresh.
+        directory = self._directories.pop(descriptor, None)
+        self._watched.discard(directory)
+
+    def remove_tree(self, directory):
+        # A directory moved out of the tree keeps its watches (and those of the
+        # directories below it) under the old paths; drop them.
+        prefix = directory + os.sep
+        for descriptor, watched in list(self._directories.items()):
+            if watched == directory or watched.startswith(prefix):
+                self._libc.inotify_rm_watch(self._fd, descriptor)
+                self.forget(descriptor)
+
+    def changes(self, timeout):
+        # Wake up regularly so stop() is noticed without a dedicated pipe.
+        deadline = time.monotonic() + timeout
+        while not self.watcher._stopping.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return set()
+            readable, _, _ = select.select([self._fd], [], [], min(remaining, 0.1))
+            if readable:
+                return self._read()
+        return set()
+
+    def _read(self):
+        paths = set()
+        while True:
+            try:
+                data = os.read(self._fd, 65536)
+            except BlockingIOError:
+                return paths
+            offset = 0
+            while offset < len(data):
+                descriptor, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+                offset += INOTIFY_EVENT.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    # Events were dropped; fall back to a full stat scan.
+                    paths |= self.watcher._stat_changes()
+                    continue
+                if mask & IN_IGNORED:
+                    self.forget(descriptor)
+                    continue
+                directory = self._directories.get(descriptor)
+                if directory is None:
+                    continue
+                if mask & IN_MOVE_SELF:
+                    self.remove_tree(directory)
+                    continue
+                if not name:
+                    continue
+                path = os.path.join(directory, os.fsdecode(name))
+                if mask & IN_ISDIR:
+                    if self.watcher.recursive and mask & (IN_CREATE | IN_MOVED_TO):
+                        self.add(path)
+                        paths |= self.watcher._stat_changes(path)
+                    elif mask & (IN_MOVED_FROM | IN_DELETE):
+                        # Documents below it are gone; reload() finds them missing.
+                        prefix = path + os.sep
+                        paths.update(known for known in self.watcher._files if known.startswith(prefix))
+                        self.remove_tree(path)
+                    continue
+                if self.watcher.matches(path):
+                    paths.add(path)
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def inotify_available():
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None)
+        return hasattr(libc, "inotify_init1")
+    except OSError:
+        return False
+
+
+BACKENDS = {"poll": PollBackend, "inotify": InotifyBackend}
+
+
+class ConfigWatcher:
+    def __init__(
+        self,
+        directory,
+        schema,
+        patterns=("*.yaml", "*.yml"),
+        recursive=True,
+        backend="auto",
+        poll_interval=1.0,
+        debounce=0.2,
+        on_publish=None,
+        clock=time.monotonic,
+    ):
+        assert backend == "auto" or backend in BACKENDS, "backend must be 'auto', 'poll' or 'inotify'"
+        assert debounce >= 0, "debounce must not be negative"
+        self.directory = os.path.abspath(directory)
+        # A schema, or a function from a file's path to the schema for it.
+        self.schema = schema
+        self.patterns = tuple(patterns)
+        self.recursive = recursive
+        if backend == "auto":
+            backend = "inotify" if inotify_available() else "poll"
+        self.backend_name = backend
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.on_publish = on_publish
+        self.clock = clock
+        self.metrics = WatcherMetrics()
+        self._files = {}
+        self._snapshot = Snapshot(0, {}, {}, None)
+        self._reload_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._backend = None
+        # The last exception the background thread caught from a reload.
+        self.last_error = None
+
+    @property
+    def snapshot(self):
+        return self._snapshot
+
+    def matches(self, path):
+        name = os.path.basename(path)
+        return any(fnmatch.fnmatch(name, pattern) for pattern in self.patterns)
+
+    def schema_for(self, path):
+        if isinstance(self.schema, Validator):
+            return self.schema
+        return self.schema(path)
+
+    def _directories(self):
+        if not self.recursive:
+            return [self.directory]
+        return [root for root, _, _ in os.walk(self.directory)]
+
+    def _paths(self, directory=None):
+        directory = directory or self.directory
+        if not self.recursive:
+            names = os.listdir(directory) if os.path.isdir(directory) else []
+            return [os.path.join(directory, name) for name in names if self.matches(name)]
+        return [
+            os.path.join(root, name)
+            for root, _, names in os.walk(directory)
+            for name in names
+            if self.matches(name)
+        ]
+
+    def _stat_changes(self, directory=None):
+        # Paths that are new, gone, or whose (mtime, size) moved since they were
+        # last read. Only these are read and hashed.
+        changed = set()
+        seen = set()
+        for path in self._paths(directory):
+            seen.add(path)
+            state = self._files.get(path)
+            if state is None or state.stat != stat_key(path):
+                changed.add(path)
+        if directory is None:
+            changed.update(path for path in self._files if path not in seen)
+        return changed
+
+    def refresh(self):
+        # One synchronous scan and reload; what the background thread does on
+        # every change, usable without starting it.
+        return self.reload(self._stat_changes())
+
+    def reload(self, paths, detected_at=None):
+        with self._reload_lock:
+            started = self.clock()
+            metrics = self.metrics
+            previous = self._snapshot
+            documents = dict(previous.documents)
+            errors = dict(previous.errors)
+            changed = False
+            for path in sorted(paths):
+                metrics.checked += 1
+                key = stat_key(path)
+                if key is None:
+                    if self._files.pop(path, None) is not None or path in errors:
+                        documents.pop(path, None)
+                        errors.pop(path, None)
+                        metrics.removed += 1
+                        changed = True
+                    continue
+                try:
+                    with open(path, "rb") as handle:
+                        content = handle.read()
+                except OSError:
+                    continue
+                digest = hashlib.sha256(content).digest()
+                state = self._files.get(path)
+                if state is not None and state.digest == digest:
+                    # Touched, or rewritten with the same bytes.
+                    state.stat = key
+                    metrics.unchanged += 1
+                    continue
+                metrics.revalidated += 1
+                changed = True
+                try:
+                    documents[path] = load(content.decode("utf-8"), self.schema_for(path), label=path)
+                    errors.pop(path, None)
+                except Exception as error:
+                    # Invalid YAML, or a schema function or `when` that raised.
+                    # The last valid version stays published next to the error.
+                    errors[path] = error
+                    metrics.failed += 1
+                # Only now, so a file is read again if anything escaped above.
+                self._files[path] = _FileState(key, digest)
+
+            if not changed:
+                return previous
+            finished = self.clock()
+            snapshot = Snapshot(previous.version + 1, documents, errors, finished)
+            self._snapshot = snapshot
+            metrics.reloads += 1
+            metrics.last_duration = finished - started
+            latency = finished - (detected_at if detected_at is not None else started)
+            metrics.last_latency = latency
+            metrics.total_latency += latency
+            if latency > metrics.max_latency:
+                metrics.max_latency = latency
+        if self.on_publish is not None:
+            self.on_publish(snapshot)
+        return snapshot
+
+    def start(self):
+        assert self._thread is None, "watcher is already running"
+        self._stopping.clear()
+        self.refresh()
+        self._backend = BACKENDS[self.backend_name](self)
+        self._thread = threading.Thread(target=self._run, name="strictyamlx-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        assert self._thread is not None, "watcher is not running"
+        self._stopping.set()
+        self._thread.join()
+        self._thread = None
+        self._backend.close()
+        self._backend = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _run(self):
+        backend = self._backend
+        while not self._stopping.is_set():
+            paths = backend.changes(self.poll_interval)
+            if not paths:
+                continue
+            detected_at = self.clock()
+            # Editors and deploy tools write in bursts; wait until the directory
+            # has been quiet for `debounce` seconds before reloading.
+            while self.debounce and not self._stopping.is_set():
+                more = backend.changes(self.debounce)
+                if not more:
+                    break
+                paths |= more
+            if self._stopping.is_set():
+                break
+            try:
+                self.reload(paths, detected_at)
+            except Exception as error:
+                # E.g. on_publish raised, or the directory went away. Keep
+                # watching; the failure is left for callers to inspect.
+                self.last_error = error
+                self.metrics.errors += 1
+
+    def __repr__(self):
+        return "ConfigWatcher({0}, backend={1})".format(repr(self.directory), repr(self.backend_name))
@@ -0,0 +1,113 @@
+import pytest
+from strictyaml.exceptions import YAMLValidationError
+
+from strictyamlx import (
+    BatchValidator,
+    Bool,
+    Case,
+    Control,
+    DMap,
+    Int,
+    Map,
+    Optional,
+    Overlay,
+    Seq,
+    Str,
+    validate_batch,
+    validate_data,
+)
+
+
+def make_schema(calls=None):
+    def port_positive(raw, ctrl, val):
+        if calls is not None:
+            calls.append("port")
+        return val["port"] > 0
+
+    tag = DMap(
+        Control(Map({"name": Str()})),
+        [Case(when=True, schema=Map({"value": Str()}), constraints=[lambda raw, ctrl, val: val["value"] != ""])],
+    )
+    return DMap(
+        Control(Map({"kind": Str()})),
+        [
+            Case(
+                when=lambda raw, ctrl: ctrl["kind"] == "web",
+                schema=Map({"port": Int(), Optional("tags"): Seq(tag)}),
+                constraints=[port_positive],
+            ),
+            Case(when=lambda raw, ctrl: ctrl["kind"] == "worker", schema=Map({"queue": Str()})),
+            Overlay(when=lambda raw, ctrl: "debug" in raw, schema=Map({"debug": Bool()})),
+        ],
+        constraints=[lambda raw, ctrl, val: ctrl["kind"] != "web" or "port" in val],
+    )
+
+
+def documents(count):
+    docs = []
+    for index in range(count):
+        if index % 3 == 0:
+            docs.append({"kind": "worker", "queue": "q{0}".format(index)})
+        elif index % 3 == 1:
+            docs.append({"kind": "web", "port": index, "tags": [{"name": "t", "value": "v"}]})
+        else:
+            docs.append({"kind": "web", "port": index, "debug": True})
+    return docs
+
+
+@pytest.mark.parametrize("compiled", [False, True])
+def test_batch_matches_sequence_validation(compiled):
+    schema = make_schema()
+    docs = documents(30)
+    assert validate_batch(docs, schema, compiled=compiled) == validate_data(docs, Seq(schema))
+
+
+def test_batch_groups_documents_by_selection():
+    schema = make_schema()
+    batch = BatchValidator(schema).collect(documents(9))
+    web, worker, debug = schema.blocks
+    assert batch.groups == {(worker, ()): 3, (web, ()): 3, (web, (debug,)): 3}
+    assert batch.errors == {}
+
+
+@pytest.mark.parametrize(
+    "broken",
+    [
+        {"kind": "web", "port": -1},
+        {"kind": "web", "port": "x"},
+        {"kind": "web", "port": 1, "tags": [{"name": "t", "value": ""}]},
+        {"kind": "other"},
+        {"port": 1},
+        ["not", "a", "mapping"],
+    ],
+)
+def test_batch_raises_first_error_in_document_order(broken):
+    schema = make_schema()
+    docs = documents(12)
+    docs[7] = broken
+    docs[10] = {"kind": "worker", "queue": 1.5, "extra": 1}
+    with pytest.raises(YAMLValidationError) as serial:
+        validate_data(docs, Seq(schema))
+    with pytest.raises(YAMLValidationError) as batch:
+        validate_batch(docs, schema)
+    assert str(batch.value) == str(serial.value)
+    assert batch.value.path == serial.value.path
+    assert DMap._local.frame is None
+    assert DMap._local.active_validations == 0
+
+
+def test_batch_collect_reports_every_failure():
+    calls = []
+    docs = documents(6)
+    docs[1] = {"kind": "web", "port": 0}
+    docs[3] = {"kind": "web", "port": "x"}
+    batch = BatchValidator(make_schema(calls)).collect(docs)
+    assert sorted(batch.errors) == [1, 3]
+    assert batch.results[1] is None and batch.results[3] is None
+    assert batch.results[2] == {"kind": "web", "port": 2, "debug": True}
+    assert calls.count("port") == 4
+
+
+def test_batch_needs_dmap():
+    with pytest.raises(AssertionError, match="needs a DMap"):
+        BatchValidator(Map({"a": Str()}))
@@ -51,3 +51,12 @@ def test_block_repr_with_constraints():
 
 def test_case_is_block():
     assert issubclass(Case, Block)
+
+def test_block_requires_keys():
+    assert Block(when=True, schema=Map({"a": Str()})).required_keys() is None
+    assert Block(when=True, schema=Map({"a": Str()}), requires_keys=["b"]).required_keys() == frozenset(["b"])
+    assert Block(when=True, schema=Map({"a": Str()}), requires_keys=True).required_keys() == frozenset(["a"])
+
+def test_block_requires_keys_rejects_string():
+    with pytest.raises(AssertionError, match="requires_keys must be True or an iterable of keys"):
+        Block(when=True, schema=Map({"a": Str()}), requires_keys="a")
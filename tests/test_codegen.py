@@ -0,0 +1,130 @@
+import pytest
+
+from strictyamlx import (
+    Bool,
+    Case,
+    Control,
+    DataValidationError,
+    DMap,
+    Enum,
+    ForwardRef,
+    Int,
+    KeyedChoiceMap,
+    Map,
+    Optional,
+    Overlay,
+    Seq,
+    Str,
+    validate_data,
+)
+from strictyamlx import codegen
+from strictyamlx.codegen import compile_schema
+
+
+def service_schema():
+    return DMap(
+        Control(Map({"kind": Str()})),
+        [
+            Case(
+                when=lambda raw, ctrl: ctrl["kind"] == "web",
+                schema=Map({"port": Int(), Optional("hosts"): Seq(Str())}),
+                constraints=[lambda raw, ctrl, val: val["port"] > 0],
+            ),
+            Case(
+                when=lambda raw, ctrl: ctrl["kind"] == "worker",
+                schema=Map({"queue": Str(), "mode": Enum(["fast", "slow"])}),
+            ),
+            Overlay(
+                when=lambda raw, ctrl: "debug" in raw,
+                schema=Map({"debug": Bool()}),
+            ),
+            Overlay(
+                when=lambda raw, ctrl: "match" in raw,
+                schema=Map({"match": KeyedChoiceMap(choices=[("eq", Str()), ("in", Seq(Str()))])}),
+            ),
+        ],
+    )
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"kind": "web", "port": 80},
+        {"kind": "web", "port": "8080", "hosts": ["a", "b"], "debug": True},
+        {"kind": "worker", "queue": "q", "mode": "fast", "match": {"in": ["x"]}},
+        {"kind": "worker", "queue": "q", "mode": "fast", "debug": False, "match": {"eq": "x"}},
+    ],
+)
+def test_compiled_schema_matches_interpreter(data):
+    schema = service_schema()
+    assert compile_schema(schema)(data) == validate_data(data, schema)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"kind": "web", "port": "eighty"},
+        {"kind": "web", "port": -1},
+        {"kind": "web", "port": 80, "extra": 1},
+        {"kind": "worker", "queue": "q", "mode": "medium"},
+        {"kind": "worker", "queue": "q", "mode": "fast", "match": {"eq": "x", "in": ["y"]}},
+        {"port": 80},
+        ["not", "a", "mapping"],
+    ],
+)
+def test_compiled_schema_errors_match_interpreter(data):
+    schema = service_schema()
+    with pytest.raises(DataValidationError) as expected:
+        validate_data(data, schema)
+    with pytest.raises(DataValidationError) as actual:
+        compile_schema(schema)(data)
+    assert str(actual.value) == str(expected.value)
+    assert actual.value.path == expected.value.path
+
+
+def test_compiled_schema_recursive_forward_ref():
+    ref = ForwardRef()
+    schema = DMap(
+        Control(Map({"type": Str()})),
+        [
+            Case(when=lambda raw, ctrl: ctrl["type"] == "node", schema=Map({"value": Int(), Optional("child"): ref})),
+            Case(when=lambda raw, ctrl: ctrl["type"] == "leaf", schema=Map({"value": Int()})),
+        ],
+    )
+    ref.set(schema)
+    data = {"type": "node", "value": 1, "child": {"type": "node", "value": 2, "child": {"type": "leaf", "value": 3}}}
+    assert compile_schema(schema)(data) == validate_data(data, schema)
+
+
+def test_compiled_code_is_shared_by_schemas_with_the_same_structure(monkeypatch):
+    def schema(minimum):
+        return DMap(
+            Control(Map({"kind": Str()})),
+            [
+                Case(
+                    when=lambda raw, ctrl: True,
+                    schema=Map({"shared_port": Int()}),
+                    constraints=[lambda raw, ctrl, val: val["shared_port"] > minimum],
+                )
+            ],
+        )
+
+    compiled = []
+    monkeypatch.setattr(codegen, "compile", lambda *args: compiled.append(args) or compile(*args), raising=False)
+    first = compile_schema(schema(123456))
+    assert len(compiled) == 1
+    second = compile_schema(schema(0))
+    assert second.fingerprint == first.fingerprint
+    assert len(compiled) == 1
+    # Each schema keeps its own callbacks.
+    assert second({"kind": "web", "shared_port": 1}) == {"kind": "web", "shared_port": 1}
+    with pytest.raises(DataValidationError):
+        first({"kind": "web", "shared_port": 1})
+
+
+def test_compiled_schema_fingerprint_tracks_structure():
+    other = DMap(
+        Control(Map({"kind": Str()})),
+        [Case(when=lambda raw, ctrl: True, schema=Map({"port": Str()}))],
+    )
+    assert compile_schema(other).fingerprint != compile_schema(service_schema()).fingerprint
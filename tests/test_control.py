@@ -30,8 +30,8 @@ def test_control_projection_invalid_validator():
 def test_control_validation_root():
     ctrl = Control(Map({"kind": Str()}))
     chunk = YAMLChunk(generic_load("kind: test\nother: 123", Map({"kind": Str(), "other": Int()}))._chunk.whole_document)
-    ctrl.validate(chunk)
-    assert ctrl.validated.data == {"kind": "test"}
+    assert ctrl.validate(chunk).data == {"kind": "test"}
+    assert not hasattr(ctrl, "validated")
 
 
 def test_control_validation_missing_key():
@@ -66,8 +66,7 @@ def test_control_ensure_validator_dict_scalar():
 def test_control_scalar_with_tuple_source_validates():
     ctrl = Control(Str(), source=("meta", "mode"))
     chunk = YAMLChunk({"meta": {"mode": "advanced"}})
-    ctrl.validate(chunk)
-    assert ctrl.validated.data == "advanced"
+    assert ctrl.validate(chunk).data == "advanced"
 
 
 def test_control_scalar_with_tuple_source_rejects_invalid_value():
@@ -80,5 +79,4 @@ def test_control_scalar_with_tuple_source_rejects_invalid_value():
 def test_control_scalar_with_string_source_validates():
     ctrl = Control(Str(), source="mode")
     chunk = YAMLChunk({"mode": "simple"})
-    ctrl.validate(chunk)
-    assert ctrl.validated.data == "simple"
+    assert ctrl.validate(chunk).data == "simple"
@@ -66,7 +66,7 @@ def test_dmap_compile_when_signature_fallback(monkeypatch):
     def func(r, c):
         return r == "raw" and c == "ctrl"
 
-    monkeypatch.setattr("strictyamlx.dmap.inspect.signature", lambda _func: (_ for _ in ()).throw(ValueError("no signature")))
+    monkeypatch.setattr("inspect.signature", lambda _func: (_ for _ in ()).throw(ValueError("no signature")))
     compiled = DMap.compile_when(func)
     assert compiled("raw", "ctrl") is True
 
@@ -0,0 +1,74 @@
+import pytest
+
+from strictyamlx import Bool, Case, Control, DMap, Int, Map, Overlay, Str, compile_schema, load, validate_data
+
+
+def make_schema(calls, reorder_every=1000):
+    def when_kind(kind):
+        def when(raw, ctrl):
+            calls.append(kind)
+            return ctrl["kind"] == kind
+
+        return when
+
+    rare = Case(when=when_kind("rare"), schema=Map({"a": Int()}))
+    common = Case(when=when_kind("common"), schema=Map({"b": Int()}))
+    debug = Overlay(when=lambda raw, ctrl: "debug" in raw, schema=Map({"debug": Bool()}))
+    schema = DMap(
+        Control(Map({"kind": Str()})),
+        [rare, common, debug],
+        first_match=True,
+        reorder_every=reorder_every,
+    )
+    return schema, rare, common, debug
+
+
+def test_first_match_validates_like_default():
+    schema, rare, common, debug = make_schema([])
+    assert load("kind: common\nb: 1\ndebug: yes", schema).data == {"kind": "common", "b": 1, "debug": True}
+    assert load("kind: rare\na: 2", schema).data == {"kind": "rare", "a": 2}
+
+
+def test_first_match_stops_at_first_true_case():
+    calls = []
+    schema = make_schema(calls)[0]
+    load("kind: rare\na: 1", schema)
+    assert calls == ["rare"]
+
+
+def test_first_match_counts_hits():
+    schema, rare, common, debug = make_schema([])
+    for _ in range(3):
+        load("kind: common\nb: 1", schema)
+    validate_data({"kind": "rare", "a": 1}, schema)
+    load("kind: other", schema)
+    assert schema.case_hits() == {rare: 1, common: 3, None: 1}
+
+
+def test_first_match_reorders_by_frequency():
+    calls = []
+    schema, rare, common, debug = make_schema(calls, reorder_every=4)
+    for _ in range(4):
+        load("kind: common\nb: 1", schema)
+    del calls[:]
+    load("kind: common\nb: 1\ndebug: no", schema)
+    assert calls == ["common"]
+    assert schema.select({"kind": "rare"}).case is rare
+
+
+def test_first_match_overlays_still_evaluated():
+    schema, rare, common, debug = make_schema([])
+    assert schema.select({"kind": "common", "debug": True}).overlays == (debug,)
+
+
+def test_first_match_compiled_schema_shares_counters():
+    schema, rare, common, debug = make_schema([])
+    validate = compile_schema(schema)
+    assert validate({"kind": "common", "b": 1, "debug": False}) == {"kind": "common", "b": 1, "debug": False}
+    assert schema.case_hits()[common] == 1
+
+
+def test_case_hits_requires_first_match():
+    schema = DMap(Control(Map({"kind": Str()})), [Case(when=True, schema=Map({}))])
+    with pytest.raises(AssertionError, match="first_match=True"):
+        schema.case_hits()
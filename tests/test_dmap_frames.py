@@ -0,0 +1,117 @@
+import threading
+
+import pytest
+from strictyaml.exceptions import YAMLValidationError
+
+from strictyamlx import Case, Control, DMap, ForwardRef, Int, Map, Optional, Str, load, validate_data
+from strictyamlx.dmap import _Frame
+
+
+def nested_schema(when, constraint=None):
+    ref = ForwardRef()
+    schema = DMap(
+        Control(Map({"kind": Str()})),
+        [
+            Case(
+                when=when,
+                schema=Map({"value": Int(), Optional("child"): ref}),
+                constraints=[constraint] if constraint else None,
+            )
+        ],
+    )
+    ref.set(schema)
+    return schema
+
+
+def nested_data(depth):
+    data = {"kind": "node", "value": depth}
+    for level in range(depth - 1, 0, -1):
+        data = {"kind": "node", "value": level, "child": data}
+    return data
+
+
+def test_parents_not_built_for_callbacks_without_parents(monkeypatch):
+    def fail(self):
+        raise AssertionError("parents were built")
+
+    monkeypatch.setattr(_Frame, "when_parents", fail)
+    monkeypatch.setattr(_Frame, "constraint_parents", fail)
+    schema = nested_schema(lambda raw, ctrl: True, lambda raw, ctrl, val: val["value"] > 0)
+    assert validate_data(nested_data(5), schema) == nested_data(5)
+
+
+def test_parents_built_for_callbacks_with_parents():
+    seen = []
+
+    def when(raw, ctrl, parents=None):
+        seen.append([parent["raw"]["value"] for parent in parents])
+        return True
+
+    def constraint(raw, ctrl, val, parents):
+        return all(parent["val"]["value"] < val["value"] for parent in parents)
+
+    schema = nested_schema(when, constraint)
+    load("kind: node\nvalue: 1\nchild:\n  kind: node\n  value: 2\n  child:\n    kind: node\n    value: 3", schema)
+    assert seen == [[], ["1"], ["1", "2"]]
+
+
+def test_deep_nesting():
+    depth = 150
+    assert validate_data(nested_data(depth), nested_schema(lambda raw, ctrl: True)) == nested_data(depth)
+
+
+def test_state_reset_after_failure():
+    schema = nested_schema(lambda raw, ctrl: True, lambda raw, ctrl, val: val["value"] != 3)
+    with pytest.raises(YAMLValidationError, match="constraints not fulfilled"):
+        validate_data(nested_data(4), schema)
+    assert DMap._local.frame is None
+    assert DMap._local.active_validations == 0
+    assert DMap._local.pending_constraints == []
+
+
+def test_state_is_per_thread():
+    seen = []
+
+    def when(raw, ctrl, parents=None):
+        seen.append(len(parents))
+        return True
+
+    schema = nested_schema(when)
+
+    def run():
+        validate_data(nested_data(2), schema)
+
+    DMap._local.frame = _Frame({"outer": True})
+    try:
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+    finally:
+        DMap._local.frame = None
+    assert seen == [0, 1]
+
+
+def test_deprecated_state_accessors():
+    seen = []
+
+    def when(raw, ctrl):
+        with pytest.deprecated_call():
+            stack = DMap.get_stack()
+        with pytest.deprecated_call():
+            state = DMap.get_constraint_state()
+        seen.append(([frame["raw"]["value"] for frame in stack], len(stack[-1]["parents"]), state))
+        return True
+
+    schema = nested_schema(when, lambda raw, ctrl, val: True)
+    validate_data(nested_data(3), schema)
+    assert [(values, parents) for values, parents, _ in seen] == [([1], 0), ([1, 2], 1), ([1, 2, 3], 2)]
+    assert seen[0][2]["active_validations"] == 1
+    assert seen[2][2]["active_validations"] == 3
+    assert seen[0][2]["pending_constraints"] == []
+
+    DMap._local.active_validations = 2
+    with pytest.deprecated_call():
+        DMap.reset_constraint_state()
+    assert DMap._local.active_validations == 0
+    with pytest.deprecated_call():
+        assert DMap.get_stack() == []
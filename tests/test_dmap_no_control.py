@@ -0,0 +1,79 @@
+import pytest
+from strictyaml.exceptions import InvalidValidatorError, YAMLValidationError
+
+from strictyamlx import (
+    Bool,
+    Case,
+    Control,
+    DMap,
+    Int,
+    Map,
+    Overlay,
+    Str,
+    as_document,
+    compile_schema,
+    load,
+    prescan,
+    validate_data,
+)
+
+
+def make_schema(seen):
+    def when_port(raw, ctrl):
+        seen.append(ctrl)
+        return "port" in raw
+
+    return DMap(
+        None,
+        [
+            Case(when=when_port, schema=Map({"port": Int()})),
+            Case(when=lambda raw, ctrl: "queue" in raw, schema=Map({"queue": Str()})),
+            Overlay(when=lambda raw, ctrl: "debug" in raw, schema=Map({"debug": Bool()})),
+        ],
+    )
+
+
+def test_no_control_selects_on_raw():
+    seen = []
+    schema = make_schema(seen)
+    assert load("port: 80\ndebug: yes", schema).data == {"port": 80, "debug": True}
+    assert load("queue: q", schema).data == {"queue": "q"}
+    assert seen == [None, None]
+
+
+def test_no_control_does_not_merge_control_keys():
+    with pytest.raises(YAMLValidationError, match="unexpected key not in schema 'kind'"):
+        load("kind: web\nport: 80", make_schema([]))
+
+
+def test_no_control_native_compiled_and_select():
+    schema = make_schema([])
+    data = {"queue": "q", "debug": False}
+    assert validate_data(data, schema) == data
+    assert compile_schema(schema)(data) == data
+    selection = schema.select(data)
+    assert selection.case is schema.blocks[1]
+    assert selection.ctrl is None
+
+
+def test_no_control_to_yaml():
+    schema = make_schema([])
+    assert as_document({"port": 80}, schema).as_yaml() == "port: 80\n"
+
+
+def test_no_control_nested_in_case():
+    inner = DMap(None, [Case(when=lambda raw, ctrl: "a" in raw, schema=Map({"a": Int()}))])
+    outer = DMap(None, [Case(when=True, schema=Map({"inner": inner}))])
+    assert load("inner:\n  a: 1", outer).data == {"inner": {"a": 1}}
+
+
+def test_no_control_as_case_schema_with_control_keys():
+    inner = DMap(None, [Case(when=True, schema=Map({"a": Int()}))])
+    outer = DMap(Control(Map({"kind": Str()})), [Case(when=True, schema=inner)])
+    with pytest.raises(InvalidValidatorError, match="without a Control"):
+        load("kind: x\na: 1", outer)
+
+
+def test_no_control_prescan():
+    with pytest.raises(AssertionError, match="prescan needs a DMap with a Control"):
+        prescan("port: 80", make_schema([]))
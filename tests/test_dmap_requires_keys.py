@@ -0,0 +1,91 @@
+import pytest
+from strictyaml.exceptions import YAMLValidationError
+
+from strictyamlx import (
+    Bool,
+    Case,
+    Control,
+    DMap,
+    ForwardRef,
+    Int,
+    Map,
+    Optional,
+    Overlay,
+    Str,
+    compile_schema,
+    load,
+    validate_data,
+)
+
+
+def make_schema(calls, first_match=False):
+    def tracked(name, result=True):
+        def when(raw, ctrl):
+            calls.append(name)
+            return result
+
+        return when
+
+    return DMap(
+        Control(Map({"kind": Str()})),
+        [
+            Case(
+                when=tracked("web"),
+                schema=Map({"port": Int(), Optional("host"): Str()}),
+                requires_keys=True,
+            ),
+            Case(when=tracked("worker"), schema=Map({"queue": Str()}), requires_keys=["queue"]),
+            Overlay(when=tracked("tls"), schema=Map({"tls": Bool()}), requires_keys=["tls"]),
+            Overlay(when=tracked("any", result=False), schema=Map({"debug": Bool()})),
+        ],
+        first_match=first_match,
+    )
+
+
+@pytest.mark.parametrize("first_match", [False, True])
+def test_blocks_without_required_keys_are_skipped(first_match):
+    calls = []
+    schema = make_schema(calls, first_match=first_match)
+    assert load("kind: w\nqueue: q\ntls: yes", schema).data == {"kind": "w", "queue": "q", "tls": True}
+    assert sorted(calls) == ["any", "tls", "worker"]
+
+
+@pytest.mark.parametrize("first_match", [False, True])
+def test_required_keys_derived_from_schema(first_match):
+    calls = []
+    schema = make_schema(calls, first_match=first_match)
+    assert validate_data({"kind": "web", "port": 80}, schema) == {"kind": "web", "port": 80}
+    assert sorted(calls) == ["any", "web"]
+
+
+def test_required_keys_in_compiled_schema():
+    calls = []
+    validate = compile_schema(make_schema(calls))
+    assert validate({"kind": "web", "port": 80, "host": "h"}) == {"kind": "web", "port": 80, "host": "h"}
+    assert sorted(calls) == ["any", "web"]
+
+
+def test_skipped_case_leaves_keys_unexpected():
+    schema = make_schema([])
+    with pytest.raises(YAMLValidationError, match="unexpected key not in schema 'host'"):
+        load("kind: web\nhost: h", schema)
+
+
+def test_required_keys_preserve_overlay_order():
+    schema = DMap(
+        Control(Map({"kind": Str()})),
+        [
+            Overlay(when=True, schema=Map({"b": Int()}), requires_keys=["b"]),
+            Overlay(when=True, schema=Map({"a": Int()}), requires_keys=["a"]),
+            Overlay(when=True, schema=Map({Optional("c"): Int()})),
+        ],
+    )
+    assert schema.select({"kind": "x", "a": 1, "b": 2}).overlays == tuple(schema.blocks[:3])
+
+
+def test_required_keys_with_forward_ref():
+    ref = ForwardRef()
+    schema = DMap(Control(Map({"kind": Str()})), [Case(when=True, schema=ref, requires_keys=True)])
+    ref.set(Map({"value": Int()}))
+    assert schema.blocks[0].required_keys() == frozenset(["value"])
+    assert load("kind: x\nvalue: 1", schema).data == {"kind": "x", "value": 1}
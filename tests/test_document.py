@@ -0,0 +1,90 @@
+import pytest
+import strictyaml
+from strictyaml.exceptions import YAMLValidationError
+
+from strictyamlx import Case, Control, DMap, Int, Map, Optional, ParsedDocument, Seq, Str, load, parse
+from strictyamlx.document import copy_tree
+
+
+def old_schema():
+    return DMap(
+        Control(Map({"kind": Str()})),
+        [Case(when=lambda r, c: c["kind"] == "svc", schema=Map({"port": Int()}))],
+    )
+
+
+def new_schema():
+    return DMap(
+        Control(Map({"kind": Str()})),
+        [
+            Case(
+                when=lambda r, c: c["kind"] == "svc",
+                schema=Map({"port": Int(), Optional("replicas", default=1): Int()}),
+            )
+        ],
+    )
+
+
+def error_of(validate):
+    with pytest.raises(YAMLValidationError) as error:
+        validate()
+    return error.value
+
+
+def test_parse_returns_parsed_document():
+    parsed = parse("kind: svc\nport: 80\n", label="svc.yaml")
+    assert isinstance(parsed, ParsedDocument)
+    assert parsed.label == "svc.yaml"
+
+
+def test_validate_many_schemas_parses_once(monkeypatch):
+    calls = []
+    real_load = strictyaml.ruamel.load
+
+    def counting_load(*args, **kwargs):
+        calls.append(args)
+        return real_load(*args, **kwargs)
+
+    monkeypatch.setattr(strictyaml.ruamel, "load", counting_load)
+    parsed = parse("kind: svc\nport: 80\n")
+    assert parsed.validate(old_schema()).data == {"kind": "svc", "port": 80}
+    assert parsed.validate(new_schema()).data == {"kind": "svc", "port": 80, "replicas": 1}
+    assert len(calls) == 1
+
+
+def test_validation_leaves_document_unmodified():
+    text = "kind: svc\nport: 80\n"
+    parsed = parse(text)
+    first = parsed.validate(new_schema())
+    first["port"] = 81
+    assert first.data["port"] == 81
+    assert parsed.validate(old_schema()).data == {"kind": "svc", "port": 80}
+    assert parsed.validate().as_yaml() == text
+
+
+def test_copies_keep_comments_and_marks():
+    text = "# ports\nports:\n- 1  # first\n- 2\n- x\n"
+    parsed = parse(text)
+    copied = copy_tree(parsed.contents)
+    assert copied == parsed.contents and copied["ports"] is not parsed.contents["ports"]
+    assert copied["ports"].lc.data == parsed.contents["ports"].lc.data
+    assert parsed.validate().as_yaml() == text
+    schema = Map({"ports": Seq(Int())})
+    assert str(error_of(lambda: parsed.validate(schema))) == str(error_of(lambda: load(text, schema)))
+
+
+def test_results_match_load():
+    text = "kind: svc\nport: 80\n"
+    assert parse(text).validate(new_schema()).data == load(text, new_schema()).data
+
+
+def test_failed_validation_reports_label():
+    parsed = parse("kind: svc\nport: eighty\n", label="svc.yaml")
+    with pytest.raises(YAMLValidationError, match="svc.yaml"):
+        parsed.validate(old_schema())
+    assert parsed.validate(Map({"kind": Str(), "port": Str()})).data["port"] == "eighty"
+
+
+def test_parse_rejects_non_string():
+    with pytest.raises(TypeError):
+        parse(b"kind: svc")
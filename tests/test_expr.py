@@ -0,0 +1,160 @@
+import pytest
+from strictyaml.exceptions import YAMLValidationError
+
+from strictyamlx import Case, Control, DMap, Int, Map, Optional, Overlay, Seq, Str, load, validate_batch, validate_data
+from strictyamlx.codegen import compile_schema
+from strictyamlx.expr import ctrl, raw, val
+
+
+def order_schema():
+    return DMap(
+        Control(Map({"kind": Str()})),
+        [
+            Case(
+                when=ctrl("kind") == "order",
+                schema=Map({"amount": Int(), "currency": Str(), Optional("refund"): Int()}),
+                constraints=[(val("amount") > 0) & ((val("refund") <= val("amount")) | ~val("refund").present())],
+            ),
+            Case(when=ctrl("kind").isin(["note", "memo"]), schema=Map({"text": Str()})),
+            Overlay(
+                when=raw("billing").present(),
+                schema=Map({"billing": Map({"currency": Str()})}),
+                constraints=[val("billing", "currency") == val("currency")],
+            ),
+        ],
+    )
+
+
+def test_expressions_evaluate_like_lambdas():
+    expression = (val("a") >= 2) & ~(val("b") == "x") | val("c").present()
+    assert expression({}, {}, {"a": 2, "b": "y"})
+    assert not expression({}, {}, {"a": 2, "b": "x"})
+    assert not expression({}, {}, {"a": 1})
+    assert expression({}, {}, {"c": None})
+    # A missing field makes comparisons false rather than raising.
+    assert not (val("a", "b") != 1)({}, {}, {"a": 3})
+    assert (val("a") == val("b"))({}, {}, {"a": [1], "b": [1]})
+    assert not (val("a") == val("b"))({}, {}, {"a": 1})
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"kind": "order", "amount": 10, "currency": "EUR"},
+        {"kind": "order", "amount": 10, "currency": "EUR", "refund": 10, "billing": {"currency": "EUR"}},
+        {"kind": "memo", "text": "hi"},
+    ],
+)
+def test_expression_constraints_accept(data):
+    assert validate_data(data, order_schema()) == data
+    assert compile_schema(order_schema())(data) == data
+
+
+@pytest.mark.parametrize(
+    "data, where",
+    [
+        ({"kind": "order", "amount": 0, "currency": "EUR"}, "case"),
+        ({"kind": "order", "amount": 5, "currency": "EUR", "refund": 6}, "case"),
+        ({"kind": "order", "amount": 5, "currency": "EUR", "billing": {"currency": "USD"}}, "overlay"),
+    ],
+)
+def test_expression_constraints_reject(data, where):
+    with pytest.raises(YAMLValidationError, match="when evaluating DMap {0} constraints".format(where)):
+        validate_data(data, order_schema())
+    with pytest.raises(YAMLValidationError, match="when evaluating DMap {0} constraints".format(where)):
+        compile_schema(order_schema())(data)
+
+
+def test_expression_constraints_on_yaml():
+    assert load("kind: order\namount: 3\ncurrency: EUR\n", order_schema()).data["amount"] == 3
+    with pytest.raises(YAMLValidationError, match="constraints not fulfilled"):
+        load("kind: order\namount: -3\ncurrency: EUR\n", order_schema())
+
+
+@pytest.mark.parametrize(
+    "build",
+    [
+        lambda: 0 < raw("a") < 10,
+        lambda: raw("a") == 1 and raw("b") == 2,
+        lambda: raw("a") == 1 or raw("b") == 2,
+        lambda: not raw("a").present(),
+    ],
+)
+def test_expressions_have_no_truth_value(build):
+    with pytest.raises(TypeError, match="combine expressions with &"):
+        build()
+
+
+def test_when_expression_cannot_read_val():
+    with pytest.raises(AssertionError, match="cannot read val"):
+        DMap(Control(Map({"kind": Str()})), [Case(when=val("x") == 1, schema=Map({}))])
+
+
+def test_expressions_do_not_make_a_dmap_parent_aware():
+    assert order_schema()._is_parent_aware() is False
+
+
+COLUMN_CASES = [
+    val("n") > 2,
+    val("n") == val("m"),
+    val("s") < "m",
+    val("s") == 3,
+    val("mixed") >= 1,
+    val("big") > 0,
+    val("n").present() & ~(val("m") != 1),
+    val("s").isin(["a", "z"]) | (val("n") <= 1),
+]
+
+
+@pytest.mark.parametrize("expression", COLUMN_CASES, ids=repr)
+def test_evaluate_many_matches_per_document(expression):
+    pytest.importorskip("numpy")
+    vals = [
+        {"n": 1, "m": 1, "s": "a", "mixed": 1, "big": 2**70},
+        {"n": 3, "m": 2.5, "s": "z", "mixed": "1", "big": 1},
+        {"m": 3, "mixed": 2},
+        {"n": 5, "m": 5, "s": "m", "big": -1},
+    ]
+    expected = [bool(expression(None, None, item)) for item in vals]
+    raws = ctrls = [None] * len(vals)
+    assert list(expression.evaluate_many(raws, ctrls, vals, use_numpy=True)) == expected
+    assert expression.evaluate_many(raws, ctrls, vals, use_numpy=False) == expected
+
+
+@pytest.mark.parametrize("rows", [2, 3])
+@pytest.mark.parametrize(
+    "expression",
+    [val("tags") == ["a", "b"], val("tags") != ("a", "b"), val("tags") == {"a": 1}, val("tags") < ["b"]],
+    ids=repr,
+)
+def test_evaluate_many_compares_sequence_constants_whole(expression, rows):
+    pytest.importorskip("numpy")
+    vals = ([{"tags": ["a", "b"]}, {"tags": ["a"]}, {"tags": {"a": 1}}, {}] * rows)[:rows]
+    expected = [bool(expression(None, None, item)) for item in vals]
+    raws = ctrls = [None] * rows
+    assert list(expression.evaluate_many(raws, ctrls, vals, use_numpy=True)) == expected
+    assert expression.evaluate_many(raws, ctrls, vals, use_numpy=False) == expected
+
+
+def test_batch_evaluates_expressions_per_group():
+    schema = order_schema()
+    docs = [{"kind": "order", "amount": index, "currency": "EUR"} for index in range(1, 50)]
+    docs.append({"kind": "memo", "text": "x"})
+    assert validate_batch(docs, schema) == validate_data(docs, Seq(schema))
+
+    docs[30] = {"kind": "order", "amount": 5, "currency": "EUR", "refund": 9}
+    with pytest.raises(YAMLValidationError) as serial:
+        validate_data(docs, Seq(schema))
+    with pytest.raises(YAMLValidationError) as batch:
+        validate_batch(docs, schema)
+    assert str(batch.value) == str(serial.value)
+
+
+@pytest.mark.parametrize("count", [2, 3])
+def test_batch_sequence_constant(count):
+    schema = DMap(
+        Control(Map({"kind": Str()})),
+        [Case(when=True, schema=Map({"tags": Seq(Str())}), constraints=[val("tags") == ["a", "b"]])],
+    )
+    docs = [{"kind": "k", "tags": ["a", "b"]}] * count
+    assert validate_batch(docs, schema) == validate_data(docs, Seq(schema))
@@ -0,0 +1,132 @@
+import io
+from collections import Counter
+
+import pytest
+from strictyaml.exceptions import YAMLSerializationError
+
+from strictyamlx import (
+    Bool,
+    Case,
+    CommaSeparated,
+    Control,
+    Datetime,
+    DMap,
+    DocumentGenerator,
+    Enum,
+    ForwardRef,
+    Int,
+    KeyedChoiceMap,
+    Map,
+    MapPattern,
+    Optional,
+    Overlay,
+    Regex,
+    Seq,
+    Str,
+    load,
+    validate_data,
+)
+from strictyamlx.expr import ctrl
+from strictyamlx.generator import _scalar
+
+
+def service_schema():
+    return DMap(
+        Control(Map({"kind": Str()})),
+        [
+            Case(
+                when=lambda raw, ctrl: ctrl["kind"] == "web",
+                schema=Map({"port": Int(), Optional("hosts"): Seq(Str()), "started": Datetime()}),
+                constraints=[lambda raw, ctrl, val: val["port"] % 2 == 0],
+            ),
+            Case(
+                when=ctrl("kind").isin(["db", "cache"]),
+                schema=Map({"engine": Enum(["pg", "my"]), "opts": MapPattern(Str(), Int()), "tags": CommaSeparated(Str())}),
+            ),
+            Case(
+                when=lambda raw, ctrl: ctrl["kind"] == "queue",
+                schema=Map({"mode": KeyedChoiceMap([("fifo", Bool()), ("lifo", Int())])}),
+            ),
+            Overlay(when=lambda raw, ctrl: "debug" in raw, schema=Map({"debug": Bool()})),
+        ],
+    )
+
+
+def tree_schema():
+    tree = ForwardRef()
+    tree.set(Map({"name": Str(), Optional("children"): Seq(tree)}))
+    return tree
+
+
+def test_documents_are_valid():
+    schema = service_schema()
+    documents = list(DocumentGenerator(schema, seed=1).documents(200))
+    for document in documents:
+        validate_data(document, schema)
+    assert {document["kind"] for document in documents} >= {"web", "db", "cache", "queue"}
+    assert any("debug" in document for document in documents)
+    assert all(document["port"] % 2 == 0 for document in documents if document["kind"] == "web")
+
+
+def test_seed_makes_documents_reproducible():
+    schema = service_schema()
+    first = list(DocumentGenerator(schema, seed=7).documents(20))
+    assert list(DocumentGenerator(schema, seed=7).documents(20)) == first
+    assert list(DocumentGenerator(schema, seed=8).documents(20)) != first
+
+
+def test_case_weights():
+    schema = service_schema()
+    web, db, queue = schema.blocks[:3]
+    generator = DocumentGenerator(schema, seed=3, case_weights={web: 8, db: 2, queue: 0})
+    kinds = Counter(document["kind"] for document in generator.documents(500))
+    assert kinds["queue"] == 0
+    assert 300 < kinds["web"] < 500
+
+
+def depth(node):
+    return 1 + max((depth(child) for child in node.get("children", [])), default=0)
+
+
+def test_depth_and_sequence_length():
+    generator = DocumentGenerator(tree_schema(), seed=5, max_depth=4, seq_length=(2, 3), optional=1)
+    for document in generator.documents(20):
+        # Map, Seq, Map, ...: one level of the tree takes two levels of nesting.
+        assert depth(document) == 3
+        assert len(document["children"]) in (2, 3)
+
+
+def test_generating_counts_case_hits_once_per_document():
+    schema = DMap(
+        Control(Map({"kind": Str()})),
+        [
+            Case(when=lambda raw, ctrl: ctrl["kind"] == "a", schema=Map({"size": Int()})),
+            Case(when=lambda raw, ctrl: ctrl["kind"] == "b", schema=Map({"port": Int()})),
+        ],
+        first_match=True,
+    )
+    assert len(list(DocumentGenerator(schema, seed=1).documents(5))) == 5
+    # Each document is validated once before it is returned; that is all.
+    assert sum(schema.case_hits().values()) == 5
+
+
+def test_write_yaml():
+    schema = service_schema()
+    generator = DocumentGenerator(schema, seed=2)
+    stream = io.StringIO()
+    count = generator.write_yaml(stream, 20000)
+    assert len(stream.getvalue()) >= 20000
+    assert len(load(stream.getvalue(), Seq(schema)).data) == count
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["abc", "a: b", "x #y", "-x", "x:", "'q'", "", " a", "yes", "it's", "#x", "2020-01-01T00:00:00+00:00", "=", "=a"],
+)
+def test_scalars_read_back_unchanged(text):
+    assert load("key: {0}\n".format(_scalar(text))).data == {"key": text}
+
+
+def test_unsupported_validator():
+    with pytest.raises(YAMLSerializationError, match="cannot generate values for validator 'Regex'"):
+        DocumentGenerator(Map({"code": Regex("[A-Z]{3}")})).generate()
@@ -0,0 +1,48 @@
+import subprocess
+import sys
+
+import pytest
+
+import strictyamlx
+
+
+def loaded_modules(statement):
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            statement + "\nimport sys\nprint(' '.join(sorted(m for m in sys.modules if m.startswith('strictyamlx'))))",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return set(completed.stdout.split())
+
+
+def test_import_does_not_load_submodules():
+    assert loaded_modules("import strictyamlx") == {"strictyamlx"}
+
+
+def test_attribute_access_loads_only_what_is_needed():
+    modules = loaded_modules("from strictyamlx import load, DMap")
+    assert "strictyamlx.dmap" in modules
+    assert "strictyamlx.native" not in modules
+    assert "strictyamlx.codegen" not in modules
+
+
+def test_star_import_exposes_public_api():
+    namespace = {}
+    exec("from strictyamlx import *", namespace)
+    for name in ("DMap", "Control", "Case", "Overlay", "KeyedChoiceMap", "validate_data", "load", "Map"):
+        assert name in namespace
+    assert namespace["DMap"] is strictyamlx.DMap
+
+
+def test_dir_lists_lazy_attributes():
+    assert "ForwardRef" in dir(strictyamlx)
+
+
+def test_unknown_attribute_raises():
+    with pytest.raises(AttributeError, match="no attribute 'Missing'"):
+        strictyamlx.Missing
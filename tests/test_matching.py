@@ -0,0 +1,123 @@
+import pytest
+from strictyaml.exceptions import YAMLValidationError
+from strictyaml.ruamel.error import YAMLError
+
+from strictyamlx import Case, Control, DMap, Int, Map, Optional, Overlay, Seq, Str, load, matches, parse, validate_data
+from strictyamlx.codegen import compile_schema
+from strictyamlx.document import ParsedDocument
+
+
+def kind_schema(kind, source=None):
+    return DMap(
+        Control(Map({"kind": Str()}), source=source),
+        [
+            Case(when=lambda raw, ctrl: ctrl["kind"] == kind, schema=Map({"port": Int(), Optional("hosts"): Seq(Str())})),
+            Overlay(when=lambda raw, ctrl: "debug" in raw, schema=Map({"debug": Str()})),
+        ],
+    )
+
+
+CANDIDATES = [kind_schema("db"), kind_schema("cache"), kind_schema("web")]
+
+
+def error_of(validate):
+    with pytest.raises(YAMLValidationError) as error:
+        validate()
+    return str(error.value)
+
+
+def test_plain_data():
+    data = {"kind": "web", "port": 80}
+    match = matches(CANDIDATES[2], data)
+    assert match
+    assert match.value == validate_data(data, CANDIDATES[2])
+    assert match.error is None
+
+    miss = matches(CANDIDATES[0], data)
+    assert not miss
+    assert miss.value is None
+    assert str(miss.error) == error_of(lambda: validate_data(data, CANDIDATES[0]))
+
+
+def test_compiled_schema():
+    compiled = compile_schema(CANDIDATES[1])
+    assert matches(compiled, {"kind": "cache", "port": 1}).value == {"kind": "cache", "port": 1}
+    assert not matches(compiled, {"kind": "cache", "port": "x"})
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "kind: web\nport: 80\n",
+        "kind: web\nport: 80\ndebug: yes\nhosts:\n- a\n",
+    ],
+)
+def test_yaml_routes_to_the_one_candidate(text):
+    document = parse(text)
+    found = [match for match in (matches(schema, document) for schema in CANDIDATES) if match]
+    assert len(found) == 1
+    assert found[0].schema is CANDIDATES[2]
+    assert found[0].value.data == load(text, CANDIDATES[2]).data
+    # Text is parsed by matches() itself.
+    assert matches(CANDIDATES[2], text).value.data == found[0].value.data
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "kind: db\nport: 80\n",  # no case; `port` is unexpected
+        "kind: 1\nport: 80\nextra: 1\n",
+        "- kind: web\n",
+        "port: 80\n",  # control fails
+        "kind: web\nport: eighty\n",  # rejected by full validation
+        "kind: web\n",
+    ],
+)
+def test_yaml_errors_match_load(text):
+    match = matches(CANDIDATES[2], text)
+    assert not match
+    assert str(match.error) == error_of(lambda: load(text, CANDIDATES[2]))
+
+
+def test_yaml_rejections_skip_the_copy(monkeypatch):
+    copies = []
+    original = ParsedDocument.chunk
+
+    def chunk(self):
+        copies.append(self)
+        return original(self)
+
+    monkeypatch.setattr(ParsedDocument, "chunk", chunk)
+    document = parse("kind: web\nport: 80\nhosts:\n- a\n- b\n")
+    assert [bool(matches(schema, document)) for schema in CANDIDATES] == [False, False, True]
+    assert len(copies) == 1
+    # The error of an early rejection is made when asked for.
+    assert "unexpected key not in schema 'port'" in str(matches(CANDIDATES[0], document).error)
+    assert len(copies) == 2
+
+
+def test_first_match_hits_are_counted_once():
+    schema = DMap(
+        Control(Map({"kind": Str()})),
+        [
+            Case(when=lambda raw, ctrl: ctrl["kind"] == "db", schema=Map({"size": Int()})),
+            Case(when=lambda raw, ctrl: ctrl["kind"] == "web", schema=Map({"port": Int()})),
+        ],
+        first_match=True,
+    )
+    assert matches(schema, "kind: web\nport: 80\n")
+    assert not matches(schema, "kind: web\nsize: 80\n")
+    assert list(schema.case_hits().values()) == [0, 2, 0]
+
+
+def test_control_source():
+    schema = kind_schema("web", source="meta")
+    assert matches(schema, "meta:\n  kind: web\nport: 1\n")
+    assert not matches(schema, "meta:\n  kind: db\nport: 1\n")
+    assert not matches(schema, "meta:\n  kind: web\n  other: x\nport: 1\n")
+
+
+def test_invalid_yaml():
+    match = matches(CANDIDATES[0], "kind: [web\n")
+    assert not match
+    assert isinstance(match.error, YAMLError)
@@ -0,0 +1,168 @@
+import pytest
+from strictyaml.exceptions import YAMLValidationError
+
+from strictyamlx import Case, Control, DMap, Int, Map, Optional, Seq, Str, load, parse, validate_data
+from strictyamlx.codegen import compile_schema
+
+
+def sidecar_schema(calls, constraint=lambda raw, ctrl, val: True):
+    def when(raw, ctrl):
+        calls.append(ctrl["kind"])
+        return ctrl["kind"] == "sidecar"
+
+    return DMap(
+        Control(Map({"kind": Str()})),
+        [Case(when=when, schema=Map({"image": Str(), "port": Int()}), constraints=[constraint])],
+    )
+
+
+def pod_schema(sidecar):
+    return DMap(
+        Control(Map({"kind": Str()})),
+        [
+            Case(
+                when=lambda raw, ctrl: ctrl["kind"] == "pod",
+                schema=Map({"name": Str(), "containers": Seq(sidecar), Optional("extra"): sidecar}),
+            )
+        ],
+    )
+
+
+def sidecar(port=8080):
+    return {"kind": "sidecar", "image": "proxy:1", "port": port}
+
+
+def pods(count):
+    return [{"kind": "pod", "name": "p{0}".format(index), "containers": [sidecar(), sidecar()]} for index in range(count)]
+
+
+def test_memoize_reuses_identical_subtrees():
+    data = pods(5)
+    plain_calls, memo_calls = [], []
+    expected = validate_data(data, Seq(pod_schema(sidecar_schema(plain_calls))))
+    assert validate_data(data, Seq(pod_schema(sidecar_schema(memo_calls))), memoize=True) == expected
+    assert len(plain_calls) == 10
+    assert len(memo_calls) == 1
+    assert DMap._local.memo is None
+
+
+def test_memoized_results_are_independent_copies():
+    result = validate_data(pods(2), Seq(pod_schema(sidecar_schema([]))), memoize=True)
+    result[0]["containers"][0]["port"] = 1
+    assert [container["port"] for pod in result for container in pod["containers"]] == [1, 8080, 8080, 8080]
+
+
+def test_memoized_constraint_error_points_at_first_failing_copy():
+    sidecar_dmap = sidecar_schema([], lambda raw, ctrl, val: val["port"] < 1024)
+    group = DMap(Control(Map({"kind": Str()})), [Case(when=True, schema=Map({"inner": sidecar_dmap}))])
+    schema = DMap(
+        Control(Map({"kind": Str()})),
+        [Case(when=True, schema=Map({"group": group, "extra": sidecar_dmap}))],
+    )
+    # The deeper copy comes first in the document, but constraints run shallowest
+    # first, so the copy that is reused is the one reported.
+    data = {"kind": "pod", "group": {"kind": "group", "inner": sidecar()}, "extra": sidecar()}
+    with pytest.raises(YAMLValidationError) as plain:
+        validate_data(data, schema)
+    with pytest.raises(YAMLValidationError) as memoized:
+        validate_data(data, schema, memoize=True)
+    assert memoized.value.path == plain.value.path == ("extra",)
+    assert DMap._local.pending_constraints == []
+
+
+def test_memoize_respects_parent_context():
+    leaf = DMap(
+        Control(Map({"kind": Str()})),
+        [
+            Case(when=lambda raw, ctrl, parents: parents[0]["ctrl"]["mode"] == "int", schema=Map({"value": Int()})),
+            Case(when=lambda raw, ctrl, parents: parents[0]["ctrl"]["mode"] == "str", schema=Map({"value": Str()})),
+        ],
+    )
+    calls = []
+
+    def when(raw, ctrl):
+        calls.append(1)
+        return True
+
+    # The middle DMap takes no parents itself; the leaf below it does.
+    middle = DMap(Control(Map({"kind": Str()})), [Case(when=when, schema=Map({"leaf": leaf}))])
+    root = DMap(Control(Map({"mode": Str()})), [Case(when=True, schema=Map({"items": Seq(middle)}))])
+    item = {"kind": "m", "leaf": {"kind": "l", "value": "5"}}
+    assert validate_data({"mode": "int", "items": [item, item]}, root, memoize=True)["items"][1]["leaf"] == {
+        "kind": "l",
+        "value": 5,
+    }
+    assert validate_data({"mode": "str", "items": [item, item]}, root, memoize=True)["items"][1]["leaf"] == {
+        "kind": "l",
+        "value": "5",
+    }
+    assert len(calls) == 2
+
+
+def test_memoize_with_selections_records_every_copy():
+    found = {}
+    validate_data(pods(2), Seq(pod_schema(sidecar_schema([]))), selections=found, memoize=True)
+    assert (1, "containers", 1) in found
+
+
+def test_compiled_schema_memoize():
+    calls = []
+    compiled = compile_schema(Seq(pod_schema(sidecar_schema(calls))))
+    assert compiled(pods(3), memoize=True) == compiled(pods(3))
+    assert len(calls) == 1 + 6
+
+
+def pods_yaml(count, port=8080):
+    container = "  - kind: sidecar\n    image: proxy:1\n    port: {0}\n".format(port)
+    return "".join("- kind: pod\n  name: p{0}\n  containers:\n{1}".format(index, container * 2) for index in range(count))
+
+
+def test_memoize_yaml_reuses_selection_per_copy():
+    plain_calls, memo_calls = [], []
+    text = pods_yaml(3)
+    expected = load(text, Seq(pod_schema(sidecar_schema(plain_calls))))
+    document = parse(text).validate(Seq(pod_schema(sidecar_schema(memo_calls))), memoize=True)
+    assert document.data == expected.data
+    assert len(plain_calls) == 6
+    assert len(memo_calls) == 1
+    # Every copy is still validated against its own chunk.
+    lines = [pod["containers"][1]["port"].start_line for pod in document]
+    assert lines == [pod["containers"][1]["port"].start_line for pod in expected] == [9, 18, 27]
+    assert document[2]["containers"][1]._selection.case is not None
+    assert DMap._local.memo is None
+
+
+def test_memoize_yaml_constraint_errors_point_at_each_copy():
+    checked = []
+
+    def constraint(raw, ctrl, val):
+        checked.append(1)
+        return val["port"] < 1024
+
+    text = pods_yaml(3)
+    with pytest.raises(YAMLValidationError) as plain:
+        load(text, Seq(pod_schema(sidecar_schema([], constraint))))
+    checked.clear()
+    with pytest.raises(YAMLValidationError) as memoized:
+        parse(text).validate(Seq(pod_schema(sidecar_schema([], constraint))), memoize=True)
+    assert str(memoized.value) == str(plain.value)
+    assert "line 4" in str(memoized.value)
+    assert checked == [1]
+
+
+def test_memoize_yaml_respects_parent_context():
+    leaf = DMap(
+        Control(Map({"kind": Str()})),
+        [
+            Case(when=lambda raw, ctrl, parents: parents[0]["ctrl"]["mode"] == "int", schema=Map({"value": Int()})),
+            Case(when=lambda raw, ctrl, parents: parents[0]["ctrl"]["mode"] == "str", schema=Map({"value": Str()})),
+        ],
+    )
+    root = DMap(Control(Map({"mode": Str()})), [Case(when=True, schema=Map({"items": Seq(leaf)}))])
+    schema = Seq(root)
+    text = "".join(
+        "- mode: {0}\n  items:\n  - kind: l\n    value: 5\n  - kind: l\n    value: 5\n".format(mode)
+        for mode in ["int", "str"]
+    )
+    assert parse(text).validate(schema, memoize=True).data == load(text, schema).data
+    assert load(text, schema).data[1]["items"][1]["value"] == "5"
@@ -0,0 +1,136 @@
+import pytest
+from strictyaml.exceptions import YAMLValidationError
+
+from strictyamlx import (
+    Bool,
+    Case,
+    Control,
+    DataValidationError,
+    DMap,
+    Enum,
+    Float,
+    ForwardRef,
+    Int,
+    KeyedChoiceMap,
+    Map,
+    MapPattern,
+    Optional,
+    Overlay,
+    Seq,
+    Str,
+    load,
+    validate_data,
+)
+
+
+def transfer_schema():
+    return DMap(
+        Control(Map({"action": Str()})),
+        [
+            Case(
+                when=lambda raw, ctrl: ctrl["action"] == "message",
+                schema=Map({"text": Str()}),
+            ),
+            Case(
+                when=lambda raw, ctrl: ctrl["action"] == "transfer",
+                schema=Map({"amount": Int(), "to": Str()}),
+                constraints=[lambda raw, ctrl, val: val["amount"] > 0],
+            ),
+            Overlay(
+                when=lambda raw, ctrl: "debug" in raw,
+                schema=Map({"debug": Bool()}),
+            ),
+        ],
+    )
+
+
+def test_validate_data_matches_load():
+    schema = transfer_schema()
+    yaml_str = "action: transfer\namount: 10\nto: bob\ndebug: yes"
+    data = {"action": "transfer", "amount": 10, "to": "bob", "debug": True}
+    assert validate_data(data, schema) == load(yaml_str, schema).data
+
+
+def test_validate_data_returns_plain_python():
+    result = validate_data({"action": "message", "text": "hi"}, transfer_schema())
+    assert type(result) is dict
+    assert result == {"action": "message", "text": "hi"}
+
+
+def test_validate_data_wrong_scalar_type_reports_path():
+    schema = Map({"outer": Map({"items": Seq(Int())})})
+    with pytest.raises(DataValidationError) as excinfo:
+        validate_data({"outer": {"items": [1, "two"]}}, schema)
+    assert excinfo.value.path == ("outer", "items", 1)
+    assert "$.outer.items[1]" in str(excinfo.value)
+    assert "when expecting an integer" in str(excinfo.value)
+
+
+def test_validate_data_errors_are_validation_errors():
+    with pytest.raises(YAMLValidationError, match="required key\\(s\\) 'to' not found"):
+        validate_data({"action": "transfer", "amount": 1}, transfer_schema())
+
+
+def test_validate_data_unexpected_key():
+    with pytest.raises(DataValidationError, match="unexpected key not in schema 'extra'"):
+        validate_data({"action": "message", "text": "hi", "extra": 1}, transfer_schema())
+
+
+def test_validate_data_constraints():
+    with pytest.raises(DataValidationError, match="constraints not fulfilled"):
+        validate_data({"action": "transfer", "amount": -1, "to": "bob"}, transfer_schema())
+
+
+def test_validate_data_multiple_cases():
+    schema = DMap(
+        Control(Map({"t": Str()})),
+        [
+            Case(when=lambda raw, ctrl: True, schema=Map({"a": Int()})),
+            Case(when=lambda raw, ctrl: True, schema=Map({"b": Int()})),
+        ],
+    )
+    with pytest.raises(DataValidationError, match="multiple cases were true"):
+        validate_data({"t": "x", "a": 1}, schema)
+
+
+def test_validate_data_control_source_and_parents():
+    child = DMap(
+        Control(Map({"kind": Str()}), source=("meta",)),
+        [
+            Case(
+                when=lambda raw, ctrl, parents=None: parents[-1]["ctrl"]["type"] == "outer"
+                and ctrl["kind"] == "leaf",
+                schema=Map({"meta": Map({"kind": Str()}), "value": Float()}),
+            )
+        ],
+    )
+    schema = DMap(
+        Control(Map({"type": Str()})),
+        [Case(when=lambda raw, ctrl: ctrl["type"] == "outer", schema=Map({"child": child}))],
+    )
+    data = {"type": "outer", "child": {"meta": {"kind": "leaf"}, "value": 2}}
+    assert validate_data(data, schema) == {
+        "type": "outer",
+        "child": {"meta": {"kind": "leaf"}, "value": 2.0},
+    }
+
+
+def test_validate_data_forward_ref_and_defaults():
+    tree = ForwardRef()
+    tree.set(Map({"name": Str(), Optional("size", default=1): Int(), Optional("children"): Seq(tree)}))
+    result = validate_data({"name": "root", "children": [{"name": "leaf", "size": 3}]}, tree)
+    assert result == {"name": "root", "size": 1, "children": [{"name": "leaf", "size": 3}]}
+
+
+def test_validate_data_keyed_choice_map_and_or():
+    schema = KeyedChoiceMap(choices=[("eq", Str() | Bool()), ("in", Seq(Str()))])
+    assert validate_data({"eq": True}, schema) == {"eq": True}
+    with pytest.raises(DataValidationError, match="expected a maximum of 1 choice key"):
+        validate_data({"eq": "a", "in": ["b"]}, schema)
+
+
+def test_validate_data_enum_and_map_pattern():
+    schema = MapPattern(Str(), Enum(["a", "b"]), maximum_keys=2)
+    assert validate_data({"x": "a"}, schema) == {"x": "a"}
+    with pytest.raises(DataValidationError, match="when expecting one of: a, b"):
+        validate_data({"x": "c"}, schema)
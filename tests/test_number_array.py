@@ -0,0 +1,176 @@
+import array
+import math
+
+import pytest
+from strictyaml.exceptions import YAMLValidationError
+
+from strictyamlx import (
+    Case,
+    Control,
+    DMap,
+    DocumentGenerator,
+    Float,
+    Int,
+    Map,
+    NumberArray,
+    Seq,
+    Str,
+    load,
+    parse,
+    validate_data,
+)
+from strictyamlx.codegen import compile_schema
+
+
+def error_of(validate):
+    with pytest.raises(YAMLValidationError) as error:
+        validate()
+    return str(error.value)
+
+
+def table(values):
+    return "table:\n" + "".join("- {0}\n".format(value) for value in values)
+
+
+def test_returns_array():
+    data = load(table([0.5, "1e-3", -2, ".25"]), Map({"table": NumberArray(use_numpy=False)})).data
+    assert isinstance(data["table"], array.array)
+    assert data["table"].typecode == "d"
+    assert list(data["table"]) == [0.5, 0.001, -2.0, 0.25]
+
+    ints = load(table([1, 2, 3]), Map({"table": NumberArray(Int(), typecode="h", use_numpy=False)})).data
+    assert ints["table"] == array.array("h", [1, 2, 3])
+
+
+def test_returns_numpy_array():
+    numpy = pytest.importorskip("numpy")
+    data = validate_data({"table": [1, 2.5]}, Map({"table": NumberArray()}))
+    assert isinstance(data["table"], numpy.ndarray)
+    assert data["table"].dtype == numpy.float64
+    assert data["table"].tolist() == [1.0, 2.5]
+    with pytest.raises(AssertionError):
+        NumberArray(Int(), typecode="d")
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        [1, 2.5, "-3e2", "+.5"],
+        ["1_000.5", ".inf", "-Inf", 7],  # read by Float() item by item
+    ],
+)
+def test_same_numbers_as_seq(values):
+    expected = load(table(values), Map({"table": Seq(Float())})).data["table"]
+    assert list(load(table(values), Map({"table": NumberArray(use_numpy=False)})).data["table"]) == expected
+
+
+def test_float32_keeps_infinity():
+    data = load(table([".inf", "-3e38"]), Map({"table": NumberArray(typecode="f", use_numpy=False)})).data
+    assert list(data["table"])[0] == float("inf")
+    assert validate_data([float("-inf")], NumberArray(typecode="f", use_numpy=False)) == array.array("f", [float("-inf")])
+
+
+def test_nan():
+    data = load(table(["nan", 1]), Map({"table": NumberArray(use_numpy=False)})).data
+    assert math.isnan(data["table"][0])
+
+
+@pytest.mark.parametrize("values", [[1, "x"], [1, "1.5"], [1, "true"]])
+def test_item_errors_match_seq(values):
+    text = table(values)
+    item = Int() if values[1] == "1.5" else Float()
+    assert error_of(lambda: load(text, Map({"table": NumberArray(item)}))) == error_of(
+        lambda: load(text, Map({"table": Seq(item)}))
+    )
+
+
+@pytest.mark.parametrize(
+    "schema, values, expecting, found, line",
+    [
+        (NumberArray(minimum=0, maximum=1), [0, 0.5, 1.5], "a number between 0 and 1", "1.5", 4),
+        (NumberArray(minimum=0), [0, float("nan")], "a number of at least 0", "nan", 3),
+        (NumberArray(maximum=0), [float("-inf"), 1], "a number of at most 0", "1.0", 3),
+        (NumberArray(Int(), typecode="b"), [1, 300], "a number an array of typecode 'b' can hold", "300", 3),
+        (NumberArray(typecode="f"), [1, -1e40], "a number an array of typecode 'f' can hold", "-1e+40", 3),
+    ],
+)
+def test_item_range_errors(schema, values, expecting, found, line):
+    message = error_of(lambda: load(table(values), Map({"table": schema})))
+    assert message.startswith("when expecting {0}\nfound {1}\n".format(expecting, found))
+    assert "line {0}".format(line) in message
+
+    assert error_of(lambda: validate_data({"table": values}, Map({"table": schema}))) == (
+        "when expecting {0}\nfound {1}\n  at $.table[{2}]".format(expecting, found, line - 2)
+    )
+
+
+@pytest.mark.parametrize(
+    "length, expecting",
+    [(2, "2 numbers"), ((4, None), "at least 4 numbers"), ((None, 2), "at most 2 numbers"), ((1, 2), "1 to 2 numbers")],
+)
+def test_length(length, expecting):
+    schema = Map({"table": NumberArray(length=length)})
+    assert "when expecting a sequence of {0}\n".format(expecting) in error_of(lambda: load(table([1, 2, 3]), schema))
+    assert error_of(lambda: validate_data({"table": [1, 2, 3]}, schema)) == (
+        "when expecting a sequence of {0}\nfound a sequence of 3 elements\n  at $.table".format(expecting)
+    )
+
+
+def test_not_a_sequence():
+    schema = Map({"table": NumberArray()})
+    assert error_of(lambda: load("table: 1\n", schema)).startswith("when expecting a sequence\nfound an arbitrary integer")
+    assert error_of(lambda: validate_data({"table": 1}, schema)).startswith("when expecting a sequence\n")
+
+
+def test_plain_data():
+    schema = NumberArray(Int(), use_numpy=False)
+    assert validate_data([1, "2", 3], schema) == array.array("q", [1, 2, 3])
+    assert validate_data(array.array("q", [4, 5]), schema) == array.array("q", [4, 5])
+    assert error_of(lambda: validate_data([1, True], schema)) == "when expecting an integer\nfound a boolean\n  at $[1]"
+    assert error_of(lambda: validate_data([1, 2.5], schema)).startswith("when expecting an integer\n")
+
+
+def test_compiled_schema():
+    schema = Map({"name": Str(), "table": NumberArray(minimum=0, use_numpy=False)})
+    compiled = compile_schema(schema)
+    assert compiled({"name": "a", "table": [1, 2]}) == validate_data({"name": "a", "table": [1, 2]}, schema)
+    with pytest.raises(YAMLValidationError):
+        compiled({"name": "a", "table": [-1]})
+
+
+def test_inside_dmap_case():
+    schema = DMap(
+        Control(Map({"kind": Str()})),
+        [
+            Case(
+                when=lambda raw, ctrl: ctrl["kind"] == "calibration",
+                schema=Map({"gains": NumberArray(minimum=0, use_numpy=False)}),
+                constraints=[lambda raw, ctrl, val: len(val["gains"]) > 1],
+            )
+        ],
+    )
+    text = "kind: calibration\ngains:\n- 1.5\n- 2\n"
+    assert load(text, schema).data["gains"] == array.array("d", [1.5, 2.0])
+    assert parse(text).validate(schema).data["gains"] == array.array("d", [1.5, 2.0])
+    assert validate_data({"kind": "calibration", "gains": [3, 4]}, schema)["gains"] == array.array("d", [3.0, 4.0])
+    with pytest.raises(YAMLValidationError):
+        load("kind: calibration\ngains:\n- 1.5\n", schema)
+    with pytest.raises(YAMLValidationError):
+        validate_data({"kind": "calibration", "gains": [-1, 2]}, schema)
+
+
+def test_to_yaml():
+    document = load(table([1, 2]), Map({"table": NumberArray(use_numpy=False)}))
+    document["table"] = array.array("d", [3.5, 4])
+    assert document.as_yaml() == "table:\n- 3.5\n- 4.0\n"
+    assert document.data["table"] == array.array("d", [3.5, 4.0])
+
+
+def test_generated_tables_are_valid():
+    schema = Map({"gains": NumberArray(minimum=0.5, maximum=0.75, length=(2, 3)), "ids": NumberArray(Int(), typecode="B")})
+    generator = DocumentGenerator(schema, seed=3)
+    for document in generator.documents(20):
+        assert 2 <= len(document["gains"]) <= 3
+        assert all(0.5 <= value <= 0.75 for value in document["gains"])
+        assert all(0 <= value <= 255 for value in document["ids"])
+        load(generator.to_yaml(document), schema)
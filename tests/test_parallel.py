@@ -0,0 +1,92 @@
+import pytest
+from strictyaml.exceptions import YAMLValidationError
+
+from strictyamlx import Bool, Case, Control, DMap, Int, Map, Seq, Str, load, validate_parallel
+from strictyamlx.parallel import InterpreterPoolExecutor, split_items
+
+BACKENDS = [
+    "process",
+    pytest.param(
+        "interpreter",
+        marks=pytest.mark.skipif(InterpreterPoolExecutor is None, reason="needs InterpreterPoolExecutor (Python 3.14+)"),
+    ),
+]
+
+
+def make_schema():
+    return Seq(
+        DMap(
+            Control(Map({"kind": Str()})),
+            [
+                Case(
+                    when=lambda raw, ctrl: ctrl["kind"] == "host",
+                    schema=Map({"name": Str(), "cores": Int()}),
+                    constraints=[lambda raw, ctrl, val: val["cores"] > 0],
+                ),
+                Case(when=lambda raw, ctrl: ctrl["kind"] == "switch", schema=Map({"ports": Int(), "managed": Bool()})),
+            ],
+        )
+    )
+
+
+def inventory(count, broken=None):
+    lines = ["# inventory", "---"]
+    for index in range(count):
+        if index == broken:
+            lines.extend(["- kind: host", "  name: h{0}".format(index), "  cores: 0"])
+        elif index % 3:
+            lines.extend(["- kind: host", "  name: h{0}".format(index), "  cores: {0}".format(index)])
+        else:
+            lines.extend(["# switch", "- kind: switch", "  ports: 48", "  managed: yes"])
+    return "\n".join(lines) + "\n"
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_parallel_matches_serial(backend):
+    text = inventory(60)
+    assert validate_parallel(
+        text, make_schema, workers=2, chunk_size=7, min_items=0, backend=backend
+    ) == load(text, make_schema()).data
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_parallel_error_points_at_original_line(backend):
+    text = inventory(60, broken=37)
+    with pytest.raises(YAMLValidationError) as serial:
+        load(text, make_schema())
+    with pytest.raises(YAMLValidationError) as parallel:
+        validate_parallel(
+            text, "tests.test_parallel:make_schema", workers=2, chunk_size=5, min_items=0, backend=backend
+        )
+    assert str(parallel.value) == str(serial.value)
+    assert "line 127" in str(parallel.value)
+
+
+def test_parallel_falls_back_to_serial():
+    assert validate_parallel(inventory(5), make_schema) == load(inventory(5), make_schema()).data
+    with pytest.raises(AssertionError, match="top-level Seq"):
+        validate_parallel("kind: host\n", "tests.test_parallel:make_map_schema")
+
+
+def make_map_schema():
+    return Map({"kind": Str()})
+
+
+def test_parallel_rejects_unimportable_factory():
+    with pytest.raises(AssertionError, match="importable function"):
+        validate_parallel(inventory(5), lambda: make_schema())
+
+
+def test_parallel_backend_is_checked():
+    with pytest.raises(AssertionError, match="backend must be"):
+        validate_parallel(inventory(5), make_schema, backend="thread")
+    if InterpreterPoolExecutor is None:
+        with pytest.raises(AssertionError, match="Python 3.14"):
+            validate_parallel(inventory(5), make_schema, backend="interpreter")
+
+
+def test_split_items():
+    text = "# head\n---\n- a: 1\n  b: 2\n# note\n- c\n-\n  d: 3\n"
+    assert split_items(text) == [(2, "- a: 1\n  b: 2\n# note\n"), (5, "- c\n"), (6, "-\n  d: 3\n")]
+    assert split_items("a: 1\n") is None
+    assert split_items("- a\n---\n- b\n") is None
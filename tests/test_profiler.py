@@ -0,0 +1,99 @@
+import itertools
+
+import pytest
+
+from strictyamlx import (
+    Bool,
+    Case,
+    Control,
+    DMap,
+    Int,
+    Map,
+    Overlay,
+    Str,
+    compile_schema,
+    load,
+    profile_callbacks,
+    validate_data,
+)
+
+
+def is_web(raw, ctrl):
+    return ctrl["kind"] == "web"
+
+
+def is_worker(raw, ctrl):
+    return ctrl["kind"] == "worker"
+
+
+def positive_port(raw, ctrl, val):
+    return val["port"] > 0
+
+
+def make_schema():
+    return DMap(
+        Control(Map({"kind": Str()})),
+        [
+            Case(when=is_web, schema=Map({"port": Int()}), constraints=[positive_port]),
+            Case(when=is_worker, schema=Map({"queue": Str()})),
+            Overlay(when=lambda raw, ctrl: "debug" in raw, schema=Map({"debug": Bool()})),
+        ],
+        constraints=[lambda raw, ctrl, val: True],
+    )
+
+
+def ticking_clock():
+    ticks = itertools.count()
+    return lambda: next(ticks) * 0.001
+
+
+def test_profiler_counts_calls_per_callback():
+    schema = make_schema()
+    with profile_callbacks(clock=ticking_clock()) as profiler:
+        for _ in range(3):
+            load("kind: web\nport: 80", schema)
+        validate_data({"kind": "worker", "queue": "q"}, schema)
+
+    rows = {(stats.kind, stats.name): stats for stats in profiler.stats()}
+    assert rows[("when", "is_web")].calls == 4
+    assert rows[("when", "is_worker")].calls == 4
+    assert rows[("constraint", "positive_port")].calls == 3
+    assert rows[("when", "is_web")].total == pytest.approx(0.004)
+    assert rows[("when", "is_web")].max == pytest.approx(0.001)
+    assert rows[("when", "is_web")].owner == "Case 0 of DMap[kind]"
+    assert rows[("constraint", "positive_port")].owner == "Case 0 of DMap[kind]"
+    assert rows[("when", "is_web")].location.endswith(
+        "test_profiler.py:{0}".format(is_web.__code__.co_firstlineno)
+    )
+    dmap_constraint = [stats for stats in profiler.stats() if stats.owner == "DMap[kind]"]
+    assert [stats.calls for stats in dmap_constraint] == [4]
+
+
+def test_profiler_covers_compiled_schemas():
+    schema = make_schema()
+    validate = compile_schema(schema)
+    with profile_callbacks() as profiler:
+        validate({"kind": "web", "port": 1})
+    assert {stats.name: stats.calls for stats in profiler.stats() if stats.kind == "when"}["is_web"] == 1
+
+
+def test_profiler_is_inactive_outside_context():
+    schema = make_schema()
+    profiler = profile_callbacks()
+    with profiler:
+        load("kind: web\nport: 80", schema)
+    load("kind: web\nport: 80", schema)
+    assert DMap._profiler is None
+    assert {stats.name: stats.calls for stats in profiler.stats()}["is_web"] == 1
+
+
+def test_profiler_report_sorting():
+    schema = make_schema()
+    with profile_callbacks(clock=ticking_clock()) as profiler:
+        load("kind: web\nport: 80\ndebug: yes", schema)
+    report = profiler.report(sort="calls", limit=2)
+    lines = report.splitlines()
+    assert lines[0].split()[:4] == ["calls", "total", "ms", "mean"]
+    assert len(lines) == 3
+    with pytest.raises(AssertionError, match="sort must be one of"):
+        profiler.report(sort="name")
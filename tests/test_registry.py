@@ -0,0 +1,100 @@
+import pytest
+from strictyaml.exceptions import InvalidValidatorError, YAMLValidationError
+
+from strictyamlx import Case, Control, DMap, Enum, Int, Map, SchemaRegistry, Str, load, parse, validate_data
+
+
+def resource(api_versions, kinds, spec):
+    return DMap(
+        Control(Map({"apiVersion": Enum(api_versions), "kind": Enum(kinds)})),
+        [Case(when=lambda raw, ctrl: True, schema=Map({"spec": spec}))],
+    )
+
+
+SERVICE = resource(["v1"], ["Service"], Map({"port": Int()}))
+DEPLOYMENT = resource(["apps/v1", "apps/v1beta1"], ["Deployment"], Map({"replicas": Int()}))
+
+
+def registry():
+    registry = SchemaRegistry(["apiVersion", "kind"])
+    registry.register(SERVICE)
+    registry.register(DEPLOYMENT)
+    return registry
+
+
+def test_values_come_from_control_enums():
+    assert registry()._index == {
+        ("v1", "Service"): SERVICE,
+        ("apps/v1", "Deployment"): DEPLOYMENT,
+        ("apps/v1beta1", "Deployment"): DEPLOYMENT,
+    }
+
+
+@pytest.mark.parametrize(
+    "text, schema",
+    [
+        ("apiVersion: v1\nkind: Service\nspec:\n  port: 80\n", SERVICE),
+        ("kind: Deployment\napiVersion: apps/v1beta1\nspec:\n  replicas: 2\n", DEPLOYMENT),
+    ],
+)
+def test_dispatch(text, schema):
+    assert registry().schema_for(text) is schema
+    assert registry().validate(text).data == load(text, schema).data
+    assert registry().validate(parse(text)).data == load(text, schema).data
+    data = load(text, schema).data
+    assert registry().validate(data) == validate_data(data, schema)
+
+
+def test_yaml_is_only_scanned_up_to_the_discriminators():
+    # The flow mapping would be rejected by a full parse.
+    assert registry().schema_for("apiVersion: v1\nkind: Service\nspec: {port: 80}\n") is SERVICE
+
+
+@pytest.mark.parametrize(
+    "document, found",
+    [
+        ("apiVersion: v2\nkind: Service\n", "found no schema registered for apiVersion 'v2', kind 'Service'"),
+        ("kind: Service\n", "found no schema registered for apiVersion missing, kind 'Service'"),
+        ({"apiVersion": "v1", "kind": ["Service"]}, "found no schema registered for apiVersion 'v1', kind ['Service']"),
+        ("- a\n", "found no schema registered for apiVersion missing, kind missing"),
+    ],
+)
+def test_no_schema(document, found):
+    with pytest.raises(YAMLValidationError, match="when selecting a schema") as error:
+        registry().validate(document)
+    assert found in str(error.value)
+
+
+def test_ambiguous_registration_is_rejected_when_registered():
+    registry_ = registry()
+    overlapping = resource(["apps/v1beta1", "apps/v1beta2"], ["Deployment"], Map({}))
+    with pytest.raises(InvalidValidatorError, match="apiVersion 'apps/v1beta1', kind 'Deployment' is already registered"):
+        registry_.register(overlapping)
+    # Nothing of the rejected schema was indexed.
+    assert len(registry_) == 2
+    assert ("apps/v1beta2", "Deployment") not in registry_._index
+
+
+def test_explicit_values_are_checked_against_the_control():
+    schema = DMap(
+        Control(Map({"apiVersion": Str(), "kind": Enum(["Job", "CronJob"])})),
+        [Case(when=lambda raw, ctrl: True, schema=Map({}))],
+    )
+    registry_ = SchemaRegistry(["apiVersion", "kind"])
+    with pytest.raises(InvalidValidatorError, match="pass values= explicitly"):
+        registry_.register(schema)
+    with pytest.raises(InvalidValidatorError, match="does not accept kind 'Pod'"):
+        registry_.register(schema, values=[("batch/v1", "Pod")])
+    registry_.register(schema, values=[("batch/v1", "Job"), ("batch/v1", "CronJob")])
+    assert registry_.schema_for("apiVersion: batch/v1\nkind: CronJob\n") is schema
+
+
+def test_nested_key_and_control_source():
+    schema = DMap(
+        Control(Enum(["a", "b"]), source=("meta", "type")),
+        [Case(when=lambda raw, ctrl: True, schema=Map({"meta": Map({"type": Str()}), "size": Int()}))],
+    )
+    registry_ = SchemaRegistry([("meta", "type")])
+    registry_.register(schema)
+    assert registry_.validate("meta:\n  type: b\nsize: 3\n").data == {"meta": {"type": "b"}, "size": 3}
+    assert registry_.schema_for({"meta": {"type": "a"}}) is schema
@@ -0,0 +1,68 @@
+import gc
+import tracemalloc
+
+from strictyamlx import Bool, Case, Control, DMap, Int, Map, Optional, Overlay, Seq, Str, load, validate_data
+
+ITEM = DMap(
+    Control(Map({"kind": Str()})),
+    [
+        Case(
+            when=lambda raw, ctrl: ctrl["kind"] == "item",
+            schema=Map({"name": Str(), "size": Int()}),
+            constraints=[lambda raw, ctrl, val: val["size"] >= 0],
+        ),
+        Overlay(when=lambda raw, ctrl: "flag" in raw, schema=Map({"flag": Bool()})),
+    ],
+)
+SCHEMA = DMap(
+    Control(Map({"kind": Str()})),
+    [Case(when=lambda raw, ctrl: ctrl["kind"] == "list", schema=Map({Optional("items"): Seq(ITEM)}))],
+)
+
+
+def big_yaml(count):
+    lines = ["kind: list", "items:"]
+    for index in range(count):
+        lines.append("- kind: item")
+        lines.append("  name: item-{0}".format(index))
+        lines.append("  size: {0}".format(index))
+        if index % 2:
+            lines.append("  flag: yes")
+    return "\n".join(lines) + "\n"
+
+
+def retained_after(run):
+    # Warm up so caches filled on first use (merged validators, callers) are
+    # part of the baseline rather than counted as retained.
+    run(10)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        run(100)
+        gc.collect()
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return retained - baseline, peak - baseline
+
+
+def test_load_does_not_retain_document():
+    retained, peak = retained_after(lambda count: load(big_yaml(count), SCHEMA).data)
+    assert peak > 200000
+    assert retained < peak / 100
+
+
+def test_validate_data_does_not_retain_document():
+    def run(count):
+        data = [{"kind": "item", "name": "n", "size": index, "flag": True} for index in range(count)]
+        validate_data({"kind": "list", "items": data}, SCHEMA)
+
+    retained, peak = retained_after(run)
+    assert retained < peak / 100
+
+
+def test_schema_holds_no_validation_result():
+    load("kind: item\nname: a\nsize: 1", ITEM)
+    assert not hasattr(ITEM, "validated")
+    assert not hasattr(ITEM.control, "validated")
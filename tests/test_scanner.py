@@ -0,0 +1,86 @@
+import pytest
+from strictyaml.exceptions import YAMLValidationError
+from strictyaml import ruamel as ruamelyaml
+
+from strictyamlx import Case, Control, DMap, Enum, Int, Map, Seq, Str, load, prescan
+from strictyamlx.scanner import control_keys, scan_keys
+
+
+def test_prescan_reads_top_level_keys():
+    ctrl = Control(Map({"kind": Str(), "apiVersion": Str()}))
+    doc = "apiVersion: v1\nkind: Service\nspec:\n  port: 80\n"
+    assert prescan(doc, ctrl) == {"kind": "Service", "apiVersion": "v1"}
+
+
+def test_prescan_stops_after_discriminator_keys():
+    ctrl = Control(Map({"kind": Str()}))
+    # The flow sequence would be rejected by a full parse; it is never reached.
+    assert prescan("kind: Service\nspec: [1, 2]\n", ctrl) == {"kind": "Service"}
+
+
+def test_prescan_skips_nested_values_before_keys():
+    ctrl = Control(Map({"kind": Str()}))
+    doc = "spec:\n  kind: nested\n  items:\n  - kind: deeper\nkind: top\n"
+    assert prescan(doc, ctrl) == {"kind": "top"}
+
+
+def test_prescan_follows_control_source():
+    ctrl = Control(Enum(["simple", "advanced"]), source=("meta", "mode"))
+    assert control_keys(ctrl) == {"meta": {"mode": True}}
+    doc = "name: x\nmeta:\n  other:\n  - a\n  mode: advanced\nbody: 1\n"
+    assert prescan(doc, ctrl) == "advanced"
+
+
+def test_prescan_nested_control_map():
+    ctrl = Control(Map({"meta": Map({"type": Str()}), "version": Int()}))
+    doc = "meta:\n  type: a\n  note: b\nversion: 2\n"
+    assert prescan(doc, ctrl) == {"meta": {"type": "a"}, "version": 2}
+
+
+def test_prescan_accepts_dmap_and_routes_to_schema():
+    schemas = {
+        "a": DMap(Control(Map({"kind": Str()})), [Case(when=lambda r, c: True, schema=Map({"a": Int()}))]),
+        "b": DMap(Control(Map({"kind": Str()})), [Case(when=lambda r, c: True, schema=Map({"b": Seq(Str())}))]),
+    }
+    doc = "kind: b\nb:\n- x\n"
+    ctrl = prescan(doc, schemas["a"])
+    assert load(doc, schemas[ctrl["kind"]]).data == {"kind": "b", "b": ["x"]}
+
+
+def test_prescan_missing_key_fails_validation():
+    with pytest.raises(YAMLValidationError, match="required key\\(s\\) 'kind' not found"):
+        prescan("apiVersion: v1\n", Control(Map({"kind": Str()})))
+
+
+def test_prescan_missing_source_fails_validation():
+    with pytest.raises(YAMLValidationError, match="required key\\(s\\) 'meta' not found"):
+        prescan("mode: simple\n", Control(Str(), source="meta"))
+
+
+@pytest.mark.parametrize(
+    "doc, found",
+    [("kind\n", "found arbitrary text"), ("- a\n- b\n", "found a sequence"), ("", "found a blank string")],
+)
+def test_prescan_needs_a_mapping(doc, found):
+    ctrl = Control(Map({"kind": Str()}))
+    with pytest.raises(YAMLValidationError) as error:
+        prescan(doc, ctrl, label="service.yaml")
+    message = str(error.value)
+    assert message.startswith("when expecting a mapping\n")
+    assert found in message
+    assert 'in "service.yaml"' in message
+
+
+def test_prescan_errors_carry_label():
+    ctrl = Control(Map({"kind": Enum(["a"])}))
+    with pytest.raises(YAMLValidationError) as error:
+        prescan("kind: b\n", ctrl, label="service.yaml")
+    with pytest.raises(YAMLValidationError) as loaded:
+        load("kind: b\n", DMap(ctrl, [Case(when=lambda r, c: True, schema=Map({"kind": Str()}))]), label="service.yaml")
+    assert 'in "service.yaml", line 1' in str(error.value)
+    assert str(error.value) == str(loaded.value)
+
+
+def test_scan_keys_accepts_event_stream():
+    events = ruamelyaml.parse("kind: a\nother: b\n")
+    assert scan_keys(events, {"kind": True}) == {"kind": "a"}
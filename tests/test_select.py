@@ -0,0 +1,92 @@
+import pytest
+from strictyaml.exceptions import YAMLValidationError
+
+from strictyamlx import (
+    Bool,
+    Case,
+    Control,
+    DataValidationError,
+    DMap,
+    Int,
+    Map,
+    Overlay,
+    Selection,
+    Str,
+    parse,
+)
+
+
+def make_schema(calls):
+    def positive(raw, ctrl, val):
+        calls.append("constraint")
+        return val["amount"] > 0
+
+    message = Case(when=lambda raw, ctrl: ctrl["action"] == "message", schema=Map({"text": Str()}))
+    transfer = Case(
+        when=lambda raw, ctrl: ctrl["action"] == "transfer",
+        schema=Map({"amount": Int(), "to": Str()}),
+        constraints=[positive],
+    )
+    debug = Overlay(when=lambda raw, ctrl: "debug" in raw, schema=Map({"debug": Bool()}))
+    schema = DMap(Control(Map({"action": Str()})), [message, transfer, debug])
+    return schema, message, transfer, debug
+
+
+@pytest.mark.parametrize(
+    "document",
+    [
+        "action: transfer\namount: 10\nto: bob\ndebug: yes\n",
+        parse("action: transfer\namount: 10\nto: bob\ndebug: yes\n"),
+        {"action": "transfer", "amount": 10, "to": "bob", "debug": True},
+    ],
+)
+def test_select_returns_case_and_overlays(document):
+    schema, message, transfer, debug = make_schema([])
+    selection = schema.select(document)
+    assert selection.case is transfer
+    assert selection.overlays == (debug,)
+    assert selection.ctrl == {"action": "transfer"}
+    assert selection == Selection(transfer, [debug], {"action": "transfer"})
+
+
+def test_select_skips_case_validation_and_constraints():
+    calls = []
+    schema, message, transfer, debug = make_schema(calls)
+    selection = schema.select("action: transfer\namount: -1\nunknown: key\n")
+    assert selection.case is transfer
+    assert selection.overlays == ()
+    assert calls == []
+
+
+def test_select_does_not_touch_parsed_document():
+    schema = make_schema([])[0]
+    parsed = parse("action: message\ntext: hi\n")
+    assert schema.select(parsed).ctrl == {"action": "message"}
+    assert parsed.validate(schema).data == {"action": "message", "text": "hi"}
+
+
+def test_select_without_matching_case():
+    schema = make_schema([])[0]
+    assert schema.select({"action": "refund"}).case is None
+
+
+def test_select_multiple_cases():
+    schema = DMap(
+        Control(Map({"t": Str()})),
+        [
+            Case(when=lambda raw, ctrl: True, schema=Map({"a": Int()})),
+            Case(when=lambda raw, ctrl: True, schema=Map({"b": Int()})),
+        ],
+    )
+    with pytest.raises(YAMLValidationError, match="multiple cases were true"):
+        schema.select("t: x\n")
+    with pytest.raises(DataValidationError, match="multiple cases were true"):
+        schema.select({"t": "x"})
+
+
+def test_select_invalid_control():
+    schema = make_schema([])[0]
+    with pytest.raises(YAMLValidationError, match="required key\\(s\\) 'action' not found"):
+        schema.select("text: hi\n")
+    with pytest.raises(YAMLValidationError, match="when expecting a mapping"):
+        schema.select("- a\n- b\n")
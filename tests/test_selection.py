@@ -0,0 +1,89 @@
+from strictyamlx import (
+    Bool,
+    Case,
+    Control,
+    DMap,
+    Int,
+    Map,
+    Overlay,
+    Selection,
+    Seq,
+    Str,
+    compile_schema,
+    load,
+    selection_at,
+    selection_of,
+    selections,
+    validate_data,
+)
+
+WEB = Case(when=lambda raw, ctrl: ctrl["kind"] == "web", schema=Map({"port": Int()}))
+WORKER = Case(when=lambda raw, ctrl: ctrl["kind"] == "worker", schema=Map({"queue": Str()}))
+DEBUG = Overlay(when=lambda raw, ctrl: "debug" in raw, schema=Map({"debug": Bool()}))
+SERVICE = DMap(Control(Map({"kind": Str()})), [WEB, WORKER, DEBUG])
+LIST = Case(when=True, schema=Map({"services": Seq(SERVICE)}))
+ROOT = DMap(Control(Map({"kind": Str()})), [LIST])
+
+YAML_TEXT = """\
+kind: list
+services:
+- kind: web
+  port: 80
+  debug: yes
+- kind: worker
+  queue: jobs
+"""
+DATA = {
+    "kind": "list",
+    "services": [
+        {"kind": "web", "port": 80, "debug": True},
+        {"kind": "worker", "queue": "jobs"},
+    ],
+}
+EXPECTED = {
+    (): Selection(LIST, [], {"kind": "list"}),
+    ("services", 0): Selection(WEB, [DEBUG], {"kind": "web"}),
+    ("services", 1): Selection(WORKER, [], {"kind": "worker"}),
+}
+
+
+def test_load_attaches_selection_to_each_dmap_node():
+    document = load(YAML_TEXT, ROOT)
+    assert selection_of(document) == EXPECTED[()]
+    assert selection_of(document["services"][0]).case is WEB
+    assert selection_at(document, ("services", 1)).ctrl == {"kind": "worker"}
+    assert selection_at(document, ("services",)) is None
+    assert selections(document) == EXPECTED
+
+
+def test_validate_data_records_selections_by_path():
+    recorded = {}
+    assert validate_data(DATA, ROOT, selections=recorded) == DATA
+    assert recorded == EXPECTED
+
+
+def test_compiled_schema_records_selections_by_path():
+    recorded = {}
+    assert compile_schema(ROOT)(DATA, selections=recorded) == DATA
+    assert recorded == EXPECTED
+
+
+def test_recording_is_off_by_default():
+    validate_data(DATA, ROOT)
+    assert DMap._local.selections is None
+
+
+def test_chained_dmap_selection_is_nested():
+    leaf = Case(when=lambda raw, ctrl: ctrl["mode"] == "a", schema=Map({"a": Int()}))
+    inner = DMap(Control(Map({"mode": Str()})), [leaf])
+    outer_case = Case(when=True, schema=inner)
+    outer = DMap(Control(Map({"kind": Str()})), [outer_case])
+
+    selection = selection_of(load("kind: x\nmode: a\na: 1", outer))
+    assert selection.case is outer_case
+    assert selection.nested.case is leaf
+    assert selection.nested.ctrl == {"kind": "x", "mode": "a"}
+
+    recorded = {}
+    validate_data({"kind": "x", "mode": "a", "a": 1}, outer, selections=recorded)
+    assert recorded[()] == selection
@@ -0,0 +1,190 @@
+import array
+
+import pytest
+from strictyaml.exceptions import YAMLValidationError
+
+from strictyamlx import (
+    Case,
+    Control,
+    DMap,
+    DocumentGenerator,
+    Enum,
+    Float,
+    Int,
+    Map,
+    NumberArray,
+    Optional,
+    Seq,
+    Str,
+    Table,
+    load,
+    parse,
+    validate_data,
+)
+from strictyamlx.codegen import compile_schema
+
+
+def columns():
+    return {
+        "path": Str(),
+        "port": Int(),
+        Optional("weight", default=1.5): Float(),
+        "method": Enum(["GET", "POST"]),
+        Optional("note"): Str(),
+    }
+
+
+ROUTES = (
+    "- path: /a\n  port: 80\n  method: GET\n"
+    "- path: /b\n  port: 8_080\n  weight: 2\n  method: POST\n  note: hi\n"
+    "- path: /c\n  port: 443\n  weight: .inf\n  method: GET\n"
+)
+
+
+def error_of(validate):
+    with pytest.raises(YAMLValidationError) as error:
+        validate()
+    return str(error.value)
+
+
+def test_rows_match_seq_of_map():
+    expected = load(ROUTES, Seq(Map(columns()))).data
+    assert load(ROUTES, Table(columns())).data == expected
+    assert validate_data(expected, Table(columns())) == expected
+
+
+def test_columnar():
+    data = load(ROUTES, Table(columns(), columnar=True, use_numpy=False)).data
+    assert data == {
+        "path": ["/a", "/b", "/c"],
+        "port": array.array("q", [80, 8080, 443]),
+        "weight": array.array("d", [1.5, 2.0, float("inf")]),
+        "method": ["GET", "POST", "GET"],
+        "note": [None, "hi", None],
+    }
+    # Columns are accepted back, e.g. to validate an earlier result again.
+    assert validate_data(data, Table(columns(), columnar=True, use_numpy=False)) == data
+
+
+def test_columnar_numpy():
+    numpy = pytest.importorskip("numpy")
+    data = validate_data([{"x": 1, "y": 2.5}, {"x": 2, "y": 3}], Table({"x": Int(), "y": Float()}, columnar=True))
+    assert isinstance(data["x"], numpy.ndarray) and data["x"].dtype == numpy.int64
+    assert data["y"].tolist() == [2.5, 3.0]
+
+
+def test_large_integers_stay_python_ints():
+    text = "- n: 1\n- n: 100000000000000000000\n"
+    assert load(text, Table({"n": Int()}, columnar=True)).data == {"n": [1, 10**20]}
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "- path: /a\n  port: x\n  method: GET\n",
+        "- path: /a\n  port: 1\n  method: PUT\n",
+        "- path: /a\n  port: 1\n  method: GET\n  extra: 1\n",
+        "- path: /a\n  method: GET\n",
+        "- path: /a\n  port: 1\n  method: GET\n  note:\n    a: b\n",
+        "- x\n",
+        "path: /a\n",
+        # The first error in the document, not the first column or check.
+        "- path: /a\n  port: x\n  method: GET\n- path: /b\n  port: 1\n  method: GET\n  extra: 1\n",
+        "- path: /a\n  port: 1\n  method: GET\n  note:\n    a: b\n- path: /b\n  port: x\n  method: GET\n",
+        "- path: /a\n  port: 1\n  method: PUT\n- path: /b\n  method: GET\n",
+    ],
+)
+def test_errors_match_seq_of_map(text):
+    assert error_of(lambda: load(text, Table(columns()))) == error_of(lambda: load(text, Seq(Map(columns()))))
+
+
+@pytest.mark.parametrize(
+    "rows",
+    [
+        [{"path": "/a", "port": "x", "method": "GET"}],
+        [{"path": "/a", "port": 1, "method": "GET", "extra": 1}],
+        [{"path": "/a", "method": "GET"}],
+        [{"path": "/a", "port": True, "method": "GET"}],
+        ["x"],
+        [{"path": "/a", "port": "x", "method": "GET"}, {"path": "/b", "port": 1, "method": "GET", "extra": 1}],
+        [{"path": "/a", "port": 1, "method": "GET", "note": 5}, {"path": "/b", "port": "x", "method": "GET"}],
+    ],
+)
+def test_plain_data_errors_match_seq_of_map(rows):
+    assert error_of(lambda: validate_data(rows, Table(columns()))) == error_of(
+        lambda: validate_data(rows, Seq(Map(columns())))
+    )
+
+
+def test_first_error_in_document_order():
+    schema = Table({"a": Int(), "b": Str()})
+    assert "line 1" in error_of(lambda: load("- a: x\n  b: q\n- a: 2\n  b: q\n  c: 1\n", schema))
+    rows = [{"a": 1, "b": {}}, {"a": "x", "b": "q"}]
+    assert error_of(lambda: validate_data(rows, schema)).endswith("at $[0].b")
+
+
+def test_columns_are_checked_in_bulk(monkeypatch):
+    cells = []
+    original = Int.validate_scalar
+
+    def validate_scalar(self, chunk):
+        cells.append(chunk.contents)
+        return original(self, chunk)
+
+    monkeypatch.setattr(Int, "validate_scalar", validate_scalar)
+    load(ROUTES, Table(columns()))
+    # Only the one port the column's single pass could not read.
+    assert cells == ["8_080"]
+
+
+def test_any_validator_as_column():
+    kind = DMap(
+        Control(Map({"kind": Str()})),
+        [
+            Case(when=lambda raw, ctrl: ctrl["kind"] == "a", schema=Map({"size": Int()})),
+            Case(when=lambda raw, ctrl: ctrl["kind"] == "b", schema=Map({"name": Str()})),
+        ],
+    )
+    schema = Table({"id": Int(), "spec": kind, "gains": NumberArray(use_numpy=False)})
+    text = "- id: 1\n  spec:\n    kind: a\n    size: 2\n  gains:\n  - 1\n- id: 2\n  spec:\n    kind: b\n    name: x\n  gains:\n  - 2\n"
+    assert load(text, schema).data == [
+        {"id": 1, "spec": {"kind": "a", "size": 2}, "gains": array.array("d", [1.0])},
+        {"id": 2, "spec": {"kind": "b", "name": "x"}, "gains": array.array("d", [2.0])},
+    ]
+    assert "line 10" in error_of(lambda: load(text.replace("name: x", "size: 3"), schema))
+
+
+def test_inside_dmap_case():
+    schema = DMap(
+        Control(Map({"kind": Str()})),
+        [
+            Case(
+                when=lambda raw, ctrl: ctrl["kind"] == "router",
+                schema=Map({"routes": Table(columns(), columnar=True, use_numpy=False)}),
+                constraints=[lambda raw, ctrl, val: len(set(val["routes"]["path"])) == len(val["routes"]["path"])],
+            )
+        ],
+    )
+    text = "kind: router\nroutes:\n" + "".join("  " + line + "\n" for line in ROUTES.splitlines())
+    assert parse(text).validate(schema).data["routes"]["port"] == array.array("q", [80, 8080, 443])
+    with pytest.raises(YAMLValidationError, match="constraints not fulfilled"):
+        load(text.replace("/b", "/a"), schema)
+    rows = load(ROUTES, Seq(Map(columns()))).data
+    assert validate_data({"kind": "router", "routes": rows}, schema)["routes"]["path"] == ["/a", "/b", "/c"]
+    assert compile_schema(schema)({"kind": "router", "routes": rows})["routes"]["method"] == ["GET", "POST", "GET"]
+
+
+def test_to_yaml():
+    text = "routes:\n" + "".join("  " + line + "\n" for line in ROUTES.splitlines())
+    document = load(text, Map({"routes": Table(columns(), columnar=True)}))
+    document["routes"] = {"path": ["/z"], "port": [1], "weight": [0.5], "method": ["POST"], "note": [None]}
+    assert document.as_yaml() == "routes:\n- path: /z\n  port: 1\n  weight: 0.5\n  method: POST\n"
+    assert document.data["routes"]["path"] == ["/z"]
+
+
+def test_generated_tables_are_valid():
+    schema = Map({"routes": Table(columns())})
+    generator = DocumentGenerator(schema, seed=5)
+    for document in generator.documents(10):
+        validate_data(document, schema)
+        load(generator.to_yaml(document), schema)
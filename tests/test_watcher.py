@@ -0,0 +1,232 @@
+import os
+import shutil
+import threading
+import time
+
+import pytest
+
+from strictyamlx import Case, ConfigWatcher, Control, DMap, Int, Map, Str
+from strictyamlx.watcher import inotify_available
+
+
+def service_schema():
+    return DMap(
+        Control(Map({"kind": Str()})),
+        [Case(when=lambda raw, ctrl: ctrl["kind"] == "web", schema=Map({"port": Int()}))],
+    )
+
+
+def write(path, text, mtime=None):
+    path.write_text(text)
+    if mtime is not None:
+        os.utime(str(path), ns=(mtime, mtime))
+
+
+def config_dir(tmp_path, count=3):
+    for index in range(count):
+        write(tmp_path / "s{0}.yaml".format(index), "kind: web\nport: {0}\n".format(8000 + index))
+    (tmp_path / "notes.txt").write_text("ignored")
+    return tmp_path
+
+
+def test_refresh_loads_matching_files(tmp_path):
+    watcher = ConfigWatcher(str(config_dir(tmp_path)), service_schema(), backend="poll")
+    snapshot = watcher.refresh()
+    assert snapshot.version == 1
+    assert sorted(os.path.basename(path) for path in snapshot.documents) == ["s0.yaml", "s1.yaml", "s2.yaml"]
+    assert snapshot[str(tmp_path / "s1.yaml")].data == {"kind": "web", "port": 8001}
+    assert watcher.metrics.revalidated == 3
+
+
+def test_refresh_revalidates_only_changed_files(tmp_path):
+    watcher = ConfigWatcher(str(config_dir(tmp_path)), service_schema(), backend="poll")
+    first = watcher.refresh()
+    assert watcher.refresh() is first
+
+    write(tmp_path / "s1.yaml", "kind: web\nport: 9001\n", mtime=1)
+    second = watcher.refresh()
+    assert second.version == 2
+    assert second[str(tmp_path / "s1.yaml")].data["port"] == 9001
+    assert first[str(tmp_path / "s1.yaml")].data["port"] == 8001
+    assert watcher.metrics.revalidated == 4
+    assert watcher.metrics.checked == 4
+
+
+def test_touch_without_content_change_is_confirmed_by_hash(tmp_path):
+    watcher = ConfigWatcher(str(config_dir(tmp_path)), service_schema(), backend="poll")
+    first = watcher.refresh()
+    os.utime(str(tmp_path / "s0.yaml"), ns=(1, 1))
+    assert watcher.refresh() is first
+    assert watcher.metrics.unchanged == 1
+    assert watcher.metrics.revalidated == 3
+    # The new stat is remembered, so the file is not hashed again.
+    assert watcher.refresh() is first
+    assert watcher.metrics.unchanged == 1
+
+
+def test_invalid_file_keeps_last_valid_document(tmp_path):
+    watcher = ConfigWatcher(str(config_dir(tmp_path)), service_schema(), backend="poll")
+    watcher.refresh()
+    path = str(tmp_path / "s2.yaml")
+    write(tmp_path / "s2.yaml", "kind: web\nport: many\n", mtime=1)
+    snapshot = watcher.refresh()
+    assert snapshot[path].data["port"] == 8002
+    assert "when expecting an integer" in str(snapshot.errors[path])
+    assert watcher.metrics.failed == 1
+
+    write(tmp_path / "s2.yaml", "kind: web\nport: 1\n", mtime=2)
+    snapshot = watcher.refresh()
+    assert snapshot[path].data["port"] == 1
+    assert path not in snapshot.errors
+
+
+def test_raising_schema_is_recorded_as_error(tmp_path):
+    schema = DMap(
+        Control(Map({"kind": Str()})),
+        [Case(when=lambda raw, ctrl: raw["port"] != "0", schema=Map({"port": Int()}))],
+    )
+    watcher = ConfigWatcher(str(config_dir(tmp_path)), schema, backend="poll")
+    watcher.refresh()
+    path = str(tmp_path / "s0.yaml")
+    write(tmp_path / "s0.yaml", "kind: web\nother: 1\n", mtime=1)
+    snapshot = watcher.refresh()
+    assert snapshot.version == 2
+    assert isinstance(snapshot.errors[path], KeyError)
+    assert snapshot[path].data["port"] == 8000
+    assert watcher.metrics.failed == 1
+
+    write(tmp_path / "s0.yaml", "kind: web\nport: 5\n", mtime=2)
+    snapshot = watcher.refresh()
+    assert snapshot[path].data["port"] == 5
+    assert path not in snapshot.errors
+
+
+def test_removed_and_added_files(tmp_path):
+    watcher = ConfigWatcher(str(config_dir(tmp_path)), service_schema(), backend="poll")
+    watcher.refresh()
+    (tmp_path / "s0.yaml").unlink()
+    (tmp_path / "nested").mkdir()
+    write(tmp_path / "nested" / "extra.yml", "kind: web\nport: 1\n")
+    snapshot = watcher.refresh()
+    assert str(tmp_path / "s0.yaml") not in snapshot
+    assert snapshot[str(tmp_path / "nested" / "extra.yml")].data["port"] == 1
+    assert watcher.metrics.removed == 1
+
+
+def test_schema_per_path(tmp_path):
+    write(tmp_path / "a.yaml", "name: x\n")
+    write(tmp_path / "b.yaml", "kind: web\nport: 1\n")
+    schemas = {"a.yaml": Map({"name": Str()}), "b.yaml": service_schema()}
+    watcher = ConfigWatcher(str(tmp_path), lambda path: schemas[os.path.basename(path)], backend="poll")
+    snapshot = watcher.refresh()
+    assert snapshot[str(tmp_path / "a.yaml")].data == {"name": "x"}
+    assert not snapshot.errors
+
+
+@pytest.mark.parametrize(
+    "backend",
+    ["poll", pytest.param("inotify", marks=pytest.mark.skipif(not inotify_available(), reason="needs inotify"))],
+)
+def test_background_reload(tmp_path, backend):
+    published = []
+    event = threading.Event()
+
+    def on_publish(snapshot):
+        published.append(snapshot)
+        event.set()
+
+    watcher = ConfigWatcher(
+        str(config_dir(tmp_path)),
+        service_schema(),
+        backend=backend,
+        poll_interval=0.02,
+        debounce=0.02,
+        on_publish=on_publish,
+    )
+    with watcher:
+        assert watcher.snapshot.version == 1
+        event.clear()
+        write(tmp_path / "s1.yaml", "kind: web\nport: 1\n", mtime=1)
+        assert event.wait(5)
+    assert watcher.snapshot[str(tmp_path / "s1.yaml")].data["port"] == 1
+    assert watcher.metrics.reloads == 2
+    assert watcher.metrics.last_latency >= 0.02
+
+
+needs_inotify = pytest.mark.skipif(not inotify_available(), reason="needs inotify")
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def inotify_watcher(directory):
+    return ConfigWatcher(str(directory), service_schema(), backend="inotify", poll_interval=0.02, debounce=0.02)
+
+
+@needs_inotify
+def test_inotify_directory_moved_out_of_tree(tmp_path):
+    root = tmp_path / "root"
+    (root / "sub").mkdir(parents=True)
+    write(root / "sub" / "one.yaml", "kind: web\nport: 1\n")
+    write(root / "top.yaml", "kind: web\nport: 2\n")
+    path = str(root / "sub" / "one.yaml")
+    with inotify_watcher(root) as watcher:
+        assert path in watcher.snapshot
+        os.rename(str(root / "sub"), str(tmp_path / "outside"))
+        assert wait_for(lambda: path not in watcher.snapshot)
+        # The moved directory is no longer watched under its old path.
+        write(tmp_path / "outside" / "one.yaml", "kind: web\nport: 3\n")
+        write(root / "top.yaml", "kind: web\nport: 4\n")
+        assert wait_for(lambda: watcher.snapshot[str(root / "top.yaml")].data["port"] == 4)
+        assert path not in watcher.snapshot
+
+
+@needs_inotify
+def test_inotify_directory_recreated_at_same_path(tmp_path):
+    write(tmp_path / "top.yaml", "kind: web\nport: 1\n")
+    with inotify_watcher(tmp_path) as watcher:
+        (tmp_path / "sub2").mkdir()
+        time.sleep(0.1)
+        shutil.rmtree(str(tmp_path / "sub2"))
+        time.sleep(0.1)
+        (tmp_path / "sub2").mkdir()
+        time.sleep(0.1)
+        write(tmp_path / "sub2" / "two.yaml", "kind: web\nport: 2\n")
+        path = str(tmp_path / "sub2" / "two.yaml")
+        assert wait_for(lambda: path in watcher.snapshot)
+        assert watcher.snapshot[path].data["port"] == 2
+
+
+def test_background_thread_survives_failing_reload(tmp_path):
+    published = []
+    event = threading.Event()
+
+    def on_publish(snapshot):
+        published.append(snapshot)
+        event.set()
+        if snapshot.version == 2:
+            raise RuntimeError("subscriber failed")
+
+    watcher = ConfigWatcher(
+        str(config_dir(tmp_path)),
+        service_schema(),
+        backend="poll",
+        poll_interval=0.02,
+        debounce=0,
+        on_publish=on_publish,
+    )
+    with watcher:
+        for version, port in [(2, 1), (3, 2)]:
+            event.clear()
+            write(tmp_path / "s1.yaml", "kind: web\nport: {0}\n".format(port), mtime=version)
+            assert event.wait(5)
+            assert watcher.snapshot.version == version
+    assert isinstance(watcher.last_error, RuntimeError)
+    assert watcher.metrics.errors == 1
+    assert watcher.snapshot[str(tmp_path / "s1.yaml")].data["port"] == 2